@@ -0,0 +1,30 @@
+"""add (market, updated_at) index on stock_prices
+
+Revision ID: t4u5v6w7x8y9
+Revises: s3t4u5v6w7x8
+Create Date: 2026-10-16 10:00:00
+
+Lets get_stale_catalog_tickers read the oldest prices for a market in index
+order (ticker included, so no heap visit) and stop at LIMIT instead of
+sorting the whole catalog.
+"""
+from alembic import op
+from sqlalchemy.sql import text
+
+revision = 't4u5v6w7x8y9'
+down_revision = 's3t4u5v6w7x8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_stock_prices_market_updated "
+        "ON stock_prices (market, updated_at) INCLUDE (ticker)"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(text("DROP INDEX IF EXISTS idx_stock_prices_market_updated"))
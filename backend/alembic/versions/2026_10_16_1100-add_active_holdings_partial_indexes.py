@@ -0,0 +1,34 @@
+"""add partial indexes for active holdings tickers
+
+Revision ID: u5v6w7x8y9z0
+Revises: t4u5v6w7x8y9
+Create Date: 2026-10-16 11:00:00
+
+get_active_tickers runs every 15 minutes and only looks at holdings with
+quantity > 0 — index just those rows so the lookup is an index-only scan.
+"""
+from alembic import op
+from sqlalchemy.sql import text
+
+revision = 'u5v6w7x8y9z0'
+down_revision = 't4u5v6w7x8y9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_world_holding_active_ticker "
+        "ON world_stock_holdings (ticker) WHERE quantity > 0"
+    ))
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_israeli_stock_holding_active_symbol "
+        "ON israeli_stock_holdings (symbol) WHERE quantity > 0"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(text("DROP INDEX IF EXISTS idx_israeli_stock_holding_active_symbol"))
+    bind.execute(text("DROP INDEX IF EXISTS idx_world_holding_active_ticker"))
@@ -0,0 +1,52 @@
+"""make stock_prices price_change / price_change_pct generated columns
+
+Revision ID: v6w7x8y9z0a1
+Revises: u5v6w7x8y9z0
+Create Date: 2026-10-16 12:00:00
+
+Both are pure functions of current_price and previous_close. Let Postgres
+derive them on write instead of shipping them in every price upsert.
+A zero price means "missing", hence the NULLIFs (same rule the upsert used).
+"""
+from alembic import op
+from sqlalchemy.sql import text
+
+revision = 'v6w7x8y9z0a1'
+down_revision = 'u5v6w7x8y9z0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "ALTER TABLE stock_prices "
+        "DROP COLUMN IF EXISTS price_change, "
+        "DROP COLUMN IF EXISTS price_change_pct"
+    ))
+    bind.execute(text(
+        "ALTER TABLE stock_prices "
+        "ADD COLUMN price_change NUMERIC(18, 4) GENERATED ALWAYS AS "
+        "(NULLIF(current_price, 0) - NULLIF(previous_close, 0)) STORED, "
+        "ADD COLUMN price_change_pct NUMERIC(8, 4) GENERATED ALWAYS AS "
+        "((NULLIF(current_price, 0) - previous_close) / NULLIF(previous_close, 0) * 100) STORED"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "ALTER TABLE stock_prices "
+        "DROP COLUMN IF EXISTS price_change, "
+        "DROP COLUMN IF EXISTS price_change_pct"
+    ))
+    bind.execute(text(
+        "ALTER TABLE stock_prices "
+        "ADD COLUMN price_change NUMERIC(18, 4), "
+        "ADD COLUMN price_change_pct NUMERIC(8, 4)"
+    ))
+    bind.execute(text(
+        "UPDATE stock_prices SET "
+        "price_change = NULLIF(current_price, 0) - NULLIF(previous_close, 0), "
+        "price_change_pct = (NULLIF(current_price, 0) - previous_close) / NULLIF(previous_close, 0) * 100"
+    ))
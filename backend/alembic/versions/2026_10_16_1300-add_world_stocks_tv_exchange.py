@@ -0,0 +1,24 @@
+"""add tv_exchange to world_stocks
+
+Revision ID: w7x8y9z0a1b2
+Revises: v6w7x8y9z0a1
+Create Date: 2026-10-16 13:00:00
+
+The TradingView exchange a stock's logo URL was found under, so re-crawls
+probe it first instead of walking the NASDAQ/NYSE/AMEX/ARCA fallbacks again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'w7x8y9z0a1b2'
+down_revision = 'v6w7x8y9z0a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('world_stocks', sa.Column('tv_exchange', sa.String(10), nullable=True))
+
+
+def downgrade():
+    op.drop_column('world_stocks', 'tv_exchange')
@@ -0,0 +1,35 @@
+"""add partial indexes for the world stock logo crawl worklists
+
+Revision ID: x8y9z0a1b2c3
+Revises: w7x8y9z0a1b2
+Create Date: 2026-10-16 14:00:00
+
+The logo crawlers page through stocks still missing an SVG / a logo URL,
+keyset-ordered on (ticker, id). Index just those rows, in that order, so
+each page is a short index scan instead of a sequential scan of the table.
+"""
+from alembic import op
+from sqlalchemy.sql import text
+
+revision = 'x8y9z0a1b2c3'
+down_revision = 'w7x8y9z0a1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_world_stock_missing_logo_svg "
+        "ON world_stocks (ticker, id) WHERE logo_svg IS NULL OR logo_svg = ''"
+    ))
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_world_stock_missing_logo_url "
+        "ON world_stocks (ticker, id) WHERE logo_url IS NULL OR logo_url = ''"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(text("DROP INDEX IF EXISTS idx_world_stock_missing_logo_url"))
+    bind.execute(text("DROP INDEX IF EXISTS idx_world_stock_missing_logo_svg"))
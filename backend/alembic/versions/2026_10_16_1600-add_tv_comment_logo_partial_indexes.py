@@ -0,0 +1,37 @@
+"""add partial indexes on logos still carrying the TradingView comment
+
+Revision ID: z0a1b2c3d4e5
+Revises: x8y9z0a1b2c3
+Create Date: 2026-10-16 16:00:00
+
+scripts/clean_logos.py finds logos with "<!-- by TradingView -->" via
+LIKE '%...%', which no btree can serve: every run detoasts and scans every
+stored SVG. Index just the matching rows, by id, so the script's COUNT and
+chunked UPDATE read only those. The crawlers strip comments on ingest, so
+the indexes empty out once the legacy rows are cleaned and stay empty.
+"""
+from alembic import op
+from sqlalchemy.sql import text
+
+revision = 'z0a1b2c3d4e5'
+down_revision = 'x8y9z0a1b2c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_israeli_stock_tv_comment_logo "
+        "ON israeli_stocks (id) WHERE logo_svg LIKE '%<!-- by TradingView -->%'"
+    ))
+    bind.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_world_stock_tv_comment_logo "
+        "ON world_stocks (id) WHERE logo_svg LIKE '%<!-- by TradingView -->%'"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(text("DROP INDEX IF EXISTS idx_world_stock_tv_comment_logo"))
+    bind.execute(text("DROP INDEX IF EXISTS idx_israeli_stock_tv_comment_logo"))
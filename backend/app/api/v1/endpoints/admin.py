@@ -603,8 +603,8 @@ def refresh_active_stock_prices(
             logger.info(f"Israeli stocks: {israeli_updated} updated, {israeli_failed} failed")
         
         # Recalculate holdings for both markets
-        world_holdings_updated = service.update_holdings_values(market='world')
-        israeli_holdings_updated = service.update_holdings_values(market='israeli')
+        world_holdings_updated = service.update_holdings_values(market='world', tickers=world_tickers)
+        israeli_holdings_updated = service.update_holdings_values(market='israeli', tickers=israeli_tickers)
         logger.info(f"Holdings recalculated: {world_holdings_updated} world, {israeli_holdings_updated} israeli")
         
         return {
@@ -780,11 +780,11 @@ def refresh_market_prices(
             "failed": 0
         }
     
-    updated, failed = service.update_world_stock_prices(tickers, market=market)
+    updated, failed = service.update_world_stock_prices(tickers, market=market, use_cache=not force)
     
     # Update holdings values
     if updated > 0:
-        holdings_updated = service.update_holdings_values(market=market)
+        holdings_updated = service.update_holdings_values(market=market, tickers=tickers)
     else:
         holdings_updated = 0
     
@@ -811,10 +811,10 @@ def refresh_single_stock_price(
     from app.services.stock_price_service import StockPriceService
     
     service = StockPriceService(db)
-    updated, failed = service.update_world_stock_prices([ticker], market=market)
+    updated, failed = service.update_world_stock_prices([ticker], market=market, use_cache=False)
     
     if updated > 0:
-        service.update_holdings_values(market=market)
+        service.update_holdings_values(market=market, tickers=[ticker])
         return {
             "message": f"Successfully updated {ticker}",
             "ticker": ticker,
@@ -1018,6 +1018,8 @@ async def import_stocks_from_csv(
                         errors.append(f"Error importing {symbol}: {str(e)}")
                         
                 conn.commit()
+                from app.services.stock_price_service import invalidate_israeli_ticker_map_cache
+                invalidate_israeli_ticker_map_cache()
         
         # Count total stocks in database
         with engine.connect() as conn:
@@ -1131,6 +1133,8 @@ async def import_etfs_from_csv(
                     errors.append(f"Error importing {row.get('Full Name', '?')}: {str(e)}")
 
             conn.commit()
+            from app.services.stock_price_service import invalidate_israeli_ticker_map_cache
+            invalidate_israeli_ticker_map_cache()
 
         with engine.connect() as conn:
             total_count = conn.execute(text('SELECT COUNT(*) FROM "israeli_stocks"')).scalar()
@@ -86,7 +86,7 @@ def trigger_portfolio_refresh(
 
     from app.tasks.fetch_stock_prices import run_active_price_update
     try:
-        run_active_price_update()
+        run_active_price_update(use_cache=False)
     except Exception as e:
         return {"success": False, "message": str(e), "last_updated": None}
 
@@ -6,11 +6,12 @@ Handles PDF upload, processing, and analysis for world/US broker stock reports
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
 from typing import List, Dict, Optional
+import asyncio
 import tempfile
 import os
 import shutil
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 
 # WorldStockService and logo crawler service imported within functions to avoid circular imports
@@ -30,6 +31,20 @@ from app.schemas.world_stock_schemas import (
 
 router = APIRouter()
 
+# PDF uploads processed at once. Each holds a pooled DB connection while it
+# saves (the engine pool allows 15) and shares the PDF parsing workers, so
+# extra uploads wait here instead of exhausting either. The semaphore is
+# created on first use, inside the running event loop, not at import.
+_MAX_CONCURRENT_PDF_UPLOADS = 4
+_pdf_upload_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_pdf_upload_slots() -> asyncio.Semaphore:
+    global _pdf_upload_slots
+    if _pdf_upload_slots is None:
+        _pdf_upload_slots = asyncio.Semaphore(_MAX_CONCURRENT_PDF_UPLOADS)
+    return _pdf_upload_slots
+
 # ── Asset-class classification (mirrors frontend utils/assetClass.ts) ─────────
 # A world position is crypto when its ticker is a known crypto ETF/ETP or its
 # name mentions bitcoin/ethereum/crypto/digital assets. Used to slice the
@@ -203,9 +218,13 @@ async def upload_and_analyze_world_stock_pdf(
         # Initialize service with broker parameter
         service = WorldStockService(broker=broker)
         
-        # Process PDF
+        # Process PDF in a worker thread: parsing and the DB saves are blocking,
+        # and concurrent uploads should not queue behind each other on the event loop
         target_user_id = user_id or current_user.id
-        result = service.process_pdf_report(temp_path, target_user_id, broker=broker)
+        async with _get_pdf_upload_slots():
+            result = await asyncio.to_thread(
+                service.process_pdf_report, temp_path, target_user_id, broker=broker
+            )
         
         return WorldStockUploadResponse(**result)
         
@@ -1331,13 +1350,15 @@ async def sync_all_world_logos(
     """
     Single-click logo sync for world stocks (Admin only).
     Runs Phase 1 (crawl TradingView → logo_url) then Phase 2 (download SVG) in sequence.
+    Phase 1 already downloads the SVG of every URL it finds, so Phase 2 only picks up
+    stocks whose URL was known before or whose download failed.
     Only processes stocks that are still missing data, so safe to re-run.
     """
     from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService
     try:
         async with WorldStockLogoCrawlerService() as crawler:
             phase1 = await crawler.crawl_tradingview_logo_urls_for_all(
-                batch_size=batch_size, missing_only=True
+                batch_size=batch_size, missing_only=True, with_svg=True
             )
             phase2 = await crawler.populate_logo_svg_from_logo_urls_for_all(
                 batch_size=batch_size, only_missing=True
@@ -1583,7 +1604,6 @@ async def sync_exchange_data_from_yfinance(
     Fixes stocks incorrectly stored as NYSE that are actually on NASDAQ/AMEX/ARCA.
     This is a synchronous, potentially slow operation — runs in a background thread.
     """
-    import asyncio
     from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService
     try:
         crawler = WorldStockLogoCrawlerService()
@@ -1895,6 +1915,29 @@ def _process_approved_transaction(conn, t, user_id: str, now):
             })
 
 
+_PENDING_WORLD_REVIEW_COLUMNS = (
+    PendingWorldTransaction.id,
+    PendingWorldTransaction.upload_batch_id,
+    PendingWorldTransaction.pdf_filename,
+    PendingWorldTransaction.transaction_date,
+    PendingWorldTransaction.transaction_time,
+    PendingWorldTransaction.ticker,
+    PendingWorldTransaction.stock_name,
+    PendingWorldTransaction.world_stock_id,
+    PendingWorldTransaction.transaction_type,
+    PendingWorldTransaction.quantity,
+    PendingWorldTransaction.price,
+    PendingWorldTransaction.amount,
+    PendingWorldTransaction.commission,
+    PendingWorldTransaction.tax,
+    PendingWorldTransaction.currency,
+    PendingWorldTransaction.exchange_rate,
+    PendingWorldTransaction.status,
+    PendingWorldTransaction.review_notes,
+    PendingWorldTransaction.created_at,
+)
+
+
 @router.get("/pending-transactions")
 async def get_pending_world_transactions(
     batch_id: Optional[str] = None,
@@ -1904,16 +1947,18 @@ async def get_pending_world_transactions(
 ):
     """Get pending world stock transactions for review"""
     
-    query = db.query(PendingWorldTransaction).filter(
+    # Plain rows of just the returned columns; nothing here is modified, so
+    # skip building (and identity-mapping) an ORM object per transaction
+    query = select(*_PENDING_WORLD_REVIEW_COLUMNS).where(
         PendingWorldTransaction.user_id == str(current_user.id)
     )
     
     if batch_id:
-        query = query.filter(PendingWorldTransaction.upload_batch_id == batch_id)
+        query = query.where(PendingWorldTransaction.upload_batch_id == batch_id)
     if status:
-        query = query.filter(PendingWorldTransaction.status == status)
+        query = query.where(PendingWorldTransaction.status == status)
     
-    transactions = query.order_by(PendingWorldTransaction.transaction_date.asc()).all()
+    transactions = db.execute(query.order_by(PendingWorldTransaction.transaction_date.asc())).all()
     
     return {
         "transactions": [
@@ -17,7 +17,15 @@ else:
         settings.DATABASE_URL,
         pool_pre_ping=True,
         pool_recycle=300,
-        echo=settings.DEBUG
+        echo=settings.DEBUG,
+        # Send executemany() batches as psycopg2 execute_batch pages rather
+        # than one round trip per row; today that's the world-stock logo
+        # crawler's bulk UPDATEs (bulk_update_stock_logos / _logo_urls).
+        # Engine-wide side effect: rowcount is unreliable after any
+        # executemany UPDATE/DELETE anywhere in the app, so don't count
+        # affected rows from one.
+        executemany_mode='values_plus_batch',
+        executemany_batch_page_size=1000
     )
 
 # Create a sessionmaker
@@ -78,6 +78,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     if scheduler and scheduler.running:
         scheduler.shutdown(wait=False)
+    try:
+        from app.services.world_stock_logo_crawler_service import close_shared_session
+        await close_shared_session()
+    except Exception as e:
+        print(f"⚠️  Failed to close logo crawler HTTP session: {e}")
     print("👋 Shutting down Investracker API...")
 
 app = FastAPI(
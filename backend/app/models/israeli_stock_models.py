@@ -2,7 +2,7 @@
 SQLAlchemy models for Israeli Stock Analysis System
 Includes models for stocks, holdings, transactions, and dividends
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Date, Time, Text, UniqueConstraint, Index, DECIMAL
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Date, Time, Text, UniqueConstraint, Index, DECIMAL, text
 from app.core.database import Base
 from datetime import datetime
 from decimal import Decimal
@@ -92,6 +92,8 @@ class IsraeliStockHolding(Base):
         Index('idx_israeli_stock_holding_user_id', 'user_id'),
         Index('idx_israeli_stock_holding_security_no', 'security_no'),
         Index('idx_israeli_stock_holding_symbol', 'symbol'),
+        # Active-symbol lookup for the price cron (quantity > 0 only)
+        Index('idx_israeli_stock_holding_active_symbol', 'symbol', postgresql_where=text('quantity > 0')),
     )
     
     def __repr__(self):
@@ -2,7 +2,7 @@
 Stock Price Models
 Separate table for frequently updated price data
 """
-from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Date, BigInteger, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Date, BigInteger, ForeignKey, UniqueConstraint, Index, Computed
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -19,8 +19,15 @@ class StockPrice(Base):
     # Price data
     current_price = Column(DECIMAL(18, 4), nullable=True)
     previous_close = Column(DECIMAL(18, 4), nullable=True)
-    price_change = Column(DECIMAL(18, 4), nullable=True)
-    price_change_pct = Column(DECIMAL(8, 4), nullable=True)
+    # Generated by Postgres from the two prices (0 = missing) — never written
+    price_change = Column(
+        DECIMAL(18, 4),
+        Computed("NULLIF(current_price, 0) - NULLIF(previous_close, 0)", persisted=True),
+    )
+    price_change_pct = Column(
+        DECIMAL(8, 4),
+        Computed("(NULLIF(current_price, 0) - previous_close) / NULLIF(previous_close, 0) * 100", persisted=True),
+    )
     
     # Daily range
     day_high = Column(DECIMAL(18, 4), nullable=True)
@@ -34,6 +41,11 @@ class StockPrice(Base):
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Stale-catalog scan: oldest prices per market, ticker served from the index
+        Index('idx_stock_prices_market_updated', 'market', 'updated_at', postgresql_include=['ticker']),
+    )
+    
     def __repr__(self):
         return f"<StockPrice {self.ticker} ({self.market}): ${self.current_price}>"
 
@@ -2,7 +2,7 @@
 SQLAlchemy models for World Stock Analysis System
 Includes models for world stocks, holdings, transactions, and dividends
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Date, Text, UniqueConstraint, Index, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Date, Text, UniqueConstraint, Index, DECIMAL, ForeignKey, text
 from sqlalchemy.dialects.postgresql import ARRAY
 from app.core.database import Base
 from datetime import datetime
@@ -35,6 +35,7 @@ class WorldStock(Base):
     indices = Column(ARRAY(String), nullable=True, default=[])  # e.g. ['sp500', 'nasdaq100']
     logo_url = Column(Text, nullable=True)
     logo_svg = Column(Text, nullable=True)
+    tv_exchange = Column(String(10), nullable=True)  # TradingView exchange logo_url was found under
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -94,6 +95,8 @@ class WorldStockHolding(Base):
         Index('idx_world_holding_user', 'user_id'),
         Index('idx_world_holding_ticker', 'ticker'),
         Index('idx_world_holding_date', 'holding_date'),
+        # Active-ticker lookup for the price cron (quantity > 0 only)
+        Index('idx_world_holding_active_ticker', 'ticker', postgresql_where=text('quantity > 0')),
     )
     
     def __repr__(self):
@@ -5,12 +5,13 @@ Fetches SVG logos from TradingView and stores them in the database
 
 import asyncio
 import aiohttp
+from aiolimiter import AsyncLimiter
 import logging
 from typing import Optional, List, Dict
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
 from app.models.israeli_stock_models import IsraeliStock
-from app.core.database import engine
+from app.core.database import SessionLocal
+from app.services.logo_utils import clean_svg, scan_tradingview_page
 import json
 
 logger = logging.getLogger(__name__)
@@ -18,10 +19,14 @@ logger = logging.getLogger(__name__)
 class LogoCrawlerService:
     """Service for crawling and storing stock logos"""
     
+    # Token bucket for outgoing requests: a steady rate instead of bursts of
+    # batch_size requests separated by idle sleeps
+    REQUESTS_PER_SECOND = 4
+
     def __init__(self):
         self.base_url = "https://s3-symbol-logo.tradingview.com"
         self.session = None
-        self.tv_base_symbol_url = "https://www.tradingview.com/symbols/TASE-{symbol}/"
+        self._limiter = AsyncLimiter(self.REQUESTS_PER_SECOND, 1)
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -68,25 +73,16 @@ class LogoCrawlerService:
         url = self.get_logo_url(stock_name)
         
         try:
+            await self._limiter.acquire()
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    content = await response.text()
-                    # Validate it's actually SVG content - handle TradingView comments
-                    content_stripped = content.strip()
-                    if (('<svg' in content_stripped and 
-                         '</svg>' in content_stripped and
-                         'xmlns="http://www.w3.org/2000/svg"' in content) or
-                        # Also check for SVG with TradingView comment
-                        ('<!-- by TradingView -->' in content and 
-                         '<svg' in content and '</svg>' in content)):
-                        
-                        # Remove TradingView comment for clean storage
-                        clean_content = content.replace('<!-- by TradingView -->', '').strip()
-                        
+                    raw = await response.read()
+                    clean_content = clean_svg(raw, require_namespace=True)
+                    if clean_content:
                         logger.info(f"Successfully fetched logo for {stock_name}")
                         return clean_content
                     else:
-                        logger.warning(f"Invalid SVG content for {stock_name}: {content[:100]}...")
+                        logger.warning(f"Invalid SVG content for {stock_name}: {raw[:100]}...")
                         return None
                 else:
                     logger.warning(f"Failed to fetch logo for {stock_name}: HTTP {response.status}")
@@ -114,15 +110,13 @@ class LogoCrawlerService:
             return None
 
         try:
+            await self._limiter.acquire()
             async with self.session.get(logo_url) as response:
                 if response.status != 200:
                     logger.warning(f"Failed to fetch SVG from URL {logo_url}: HTTP {response.status}")
                     return None
-                content = await response.text()
-                content_stripped = content.strip()
-                if (('<svg' in content_stripped and '</svg>' in content_stripped) or
-                    ('<!-- by TradingView -->' in content and '<svg' in content and '</svg>' in content)):
-                    clean_content = content.replace('<!-- by TradingView -->', '').strip()
+                clean_content = clean_svg(await response.read())
+                if clean_content:
                     return clean_content
                 logger.warning(f"Content from {logo_url} does not appear to be valid SVG")
                 return None
@@ -143,20 +137,13 @@ class LogoCrawlerService:
         """
         try:
             # Get database connection
-            Session = sessionmaker(bind=engine)
-            
-            with Session() as session:
+            with SessionLocal() as session:
                 # Update the stock record
-                if logo_url:
-                    result = session.execute(
-                        text("UPDATE \"israeli_stocks\" SET logo_url = :logo_url, logo_svg = :svg_content WHERE id = :stock_id"),
-                        {"logo_url": logo_url, "svg_content": svg_content, "stock_id": stock_id}
-                    )
-                else:
-                    result = session.execute(
-                        text("UPDATE \"israeli_stocks\" SET logo_svg = :svg_content WHERE id = :stock_id"),
-                        {"svg_content": svg_content, "stock_id": stock_id}
-                    )
+                # A NULL logo_url keeps the stored one
+                result = session.execute(
+                    text("UPDATE \"israeli_stocks\" SET logo_svg = :svg_content, logo_url = COALESCE(:logo_url, logo_url) WHERE id = :stock_id"),
+                    {"logo_url": logo_url or None, "svg_content": svg_content, "stock_id": stock_id}
+                )
                 
                 if result.rowcount > 0:
                     session.commit()
@@ -182,8 +169,7 @@ class LogoCrawlerService:
             True if update was successful, False otherwise
         """
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text('UPDATE "israeli_stocks" SET logo_url = :url WHERE id = :id'),
                     {"url": logo_url, "id": stock_id}
@@ -206,9 +192,7 @@ class LogoCrawlerService:
             List of stock dictionaries with id, name, symbol
         """
         try:
-            Session = sessionmaker(bind=engine)
-            
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text("""
                         SELECT id, name, symbol, security_no 
@@ -241,8 +225,7 @@ class LogoCrawlerService:
             List of dicts: id, name, symbol, logo_url
         """
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text(
                         """
@@ -306,10 +289,6 @@ class LogoCrawlerService:
                     success_count += 1
                 else:
                     failed_count += 1
-            
-            # Small delay between batches to be polite
-            if i + batch_size < len(stocks):
-                await asyncio.sleep(2)
         
         logger.info(f"Logo crawling completed: {success_count} success, {failed_count} failed")
         
@@ -329,10 +308,9 @@ class LogoCrawlerService:
         if not self.session:
             raise RuntimeError("LogoCrawlerService must be used as async context manager")
 
-        import re
-
-        url = self.tv_base_symbol_url.format(symbol=str(symbol).upper().strip())
+        url = f"https://www.tradingview.com/symbols/TASE-{str(symbol).upper().strip()}/"
         try:
+            await self._limiter.acquire()
             async with self.session.get(url, headers={
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.9',
@@ -341,22 +319,15 @@ class LogoCrawlerService:
                 if response.status != 200:
                     logger.warning(f"TV page fetch failed for {symbol}: HTTP {response.status}")
                     return None
-                html = await response.text()
-
-            # Regex for S3 logo URL ending with --big.svg, exclude '/source/'
-            pattern = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+--big\.svg", re.IGNORECASE)
-            match = pattern.search(html)
-            if match:
-                logo_url = match.group(0)
-                logger.info(f"Found TradingView logo URL for {symbol}: {logo_url}")
-                return logo_url
+                # S3 logo URL ending with --big.svg (falling back to any
+                # s3-symbol-logo svg), excluding '/source/'
+                logo_url, is_fallback = await scan_tradingview_page(response)
 
-            # Fallback: any s3-symbol-logo URL not containing '/source/'
-            alt_pattern = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+\.svg", re.IGNORECASE)
-            match2 = alt_pattern.search(html)
-            if match2:
-                logo_url = match2.group(0)
-                logger.info(f"Found TradingView logo URL (fallback) for {symbol}: {logo_url}")
+            if logo_url:
+                if is_fallback:
+                    logger.info(f"Found TradingView logo URL (fallback) for {symbol}: {logo_url}")
+                else:
+                    logger.info(f"Found TradingView logo URL for {symbol}: {logo_url}")
                 return logo_url
 
             logger.info(f"No TradingView logo URL found for {symbol}")
@@ -368,8 +339,7 @@ class LogoCrawlerService:
     def get_all_stocks(self) -> List[Dict]:
         """Return all Israeli stocks (id, name, symbol, security_no)."""
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text('SELECT id, name, symbol, security_no FROM "israeli_stocks" ORDER BY name')
                 )
@@ -384,8 +354,7 @@ class LogoCrawlerService:
     def get_stocks_missing_logo_url(self) -> List[Dict]:
         """Return stocks where logo_url is NULL or empty string."""
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text('SELECT id, name, symbol, security_no FROM "israeli_stocks" WHERE logo_url IS NULL OR logo_url = :empty ORDER BY name'),
                     {"empty": ""}
@@ -421,8 +390,6 @@ class LogoCrawlerService:
                     failed += 1
                 else:
                     success += 1
-            if i + batch_size < len(stocks):
-                await asyncio.sleep(1.5)
         return {"success": success, "failed": failed, "total": len(stocks)}
 
     async def populate_logo_svg_from_logo_urls_for_all(self, batch_size: int = 5, only_missing: bool = True) -> Dict[str, int]:
@@ -445,8 +412,7 @@ class LogoCrawlerService:
             targets = self.get_stocks_with_logo_url_missing_svg()
         else:
             try:
-                Session = sessionmaker(bind=engine)
-                with Session() as session_db:
+                with SessionLocal() as session_db:
                     res = session_db.execute(
                         text(
                             """
@@ -478,8 +444,6 @@ class LogoCrawlerService:
                     failed += 1
                 else:
                     success += 1
-            if i + batch_size < len(targets):
-                await asyncio.sleep(1.0)
         return {"success": success, "failed": failed, "total": len(targets)}
 
     async def _process_logo_svg_from_url(self, stock: Dict) -> bool:
@@ -504,8 +468,7 @@ class LogoCrawlerService:
         if not self.session:
             raise RuntimeError("LogoCrawlerService must be used as async context manager")
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session_db:
+            with SessionLocal() as session_db:
                 row = session_db.execute(
                     text('SELECT logo_url FROM "israeli_stocks" WHERE id = :id'),
                     {"id": stock_id}
@@ -550,8 +513,7 @@ class LogoCrawlerService:
 
         try:
             # Lookup stock by symbol
-            Session = sessionmaker(bind=engine)
-            with Session() as session_db:
+            with SessionLocal() as session_db:
                 res = session_db.execute(
                     text('SELECT id, name, symbol FROM "israeli_stocks" WHERE symbol ILIKE :sym LIMIT 1'),
                     {"sym": f"%{symbol}%"}
@@ -619,9 +581,7 @@ class LogoCrawlerService:
         try:
             # If stock_id not provided, look it up
             if stock_id is None:
-                Session = sessionmaker(bind=engine)
-                
-                with Session() as session:
+                with SessionLocal() as session:
                     result = session.execute(
                         text("SELECT id FROM \"israeli_stocks\" WHERE name ILIKE :name LIMIT 1"),
                         {"name": f"%{stock_name}%"}
@@ -0,0 +1,79 @@
+"""
+Logo helpers shared by the Israeli and world stock logo crawlers:
+SVG validation/minification and TradingView symbol page scanning
+"""
+
+import codecs
+import re
+from typing import Optional, Tuple
+
+import aiohttp
+
+# S3 logo URLs on a TradingView symbol page, excluding '/source/' provider icons:
+# the --big.svg variant first, then any svg as a fallback
+_TV_LOGO_RE = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+--big\.svg", re.IGNORECASE)
+_TV_LOGO_FALLBACK_RE = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+\.svg", re.IGNORECASE)
+
+# SVG validation on the raw bytes: one search for a complete <svg ...>...</svg>
+# element, so non-SVG responses are rejected without decoding them
+_SVG_RE = re.compile(rb'<svg\b([^>]*)>.*</svg>', re.DOTALL)
+_SVG_NAMESPACE = b'xmlns="http://www.w3.org/2000/svg"'
+_TV_COMMENT = b'<!-- by TradingView -->'
+
+# Minification before storing: drop comments (incl. the TradingView one),
+# whitespace-only text between tags and an xlink namespace nothing references.
+# <text> elements (and the <tspan>s inside them) are matched whole and kept
+# as-is, since whitespace there is rendered.
+_SVG_COMMENT_RE = re.compile(rb'<!--.*?-->', re.DOTALL)
+_SVG_INTERTAG_WS_RE = re.compile(rb'(<text\b.*?</text>)|(?<=>)\s+(?=<)', re.DOTALL)
+_SVG_XLINK_NS_RE = re.compile(rb'\s+xmlns:xlink="[^"]*"')
+
+
+def _keep_text_element(match: re.Match) -> bytes:
+    return match.group(1) or b''
+
+
+def minify_svg(raw: bytes) -> bytes:
+    """Strip comments, inter-tag whitespace and an unused xmlns:xlink from an SVG"""
+    svg = _SVG_INTERTAG_WS_RE.sub(_keep_text_element, _SVG_COMMENT_RE.sub(b'', raw))
+    without_xlink = _SVG_XLINK_NS_RE.sub(b'', svg, count=1)
+    if b'xlink:' not in without_xlink:
+        svg = without_xlink
+    return svg.strip()
+
+
+def clean_svg(raw: bytes, require_namespace: bool = False) -> Optional[str]:
+    """Return the minified SVG text, or None if raw isn't an SVG"""
+    match = _SVG_RE.search(raw)
+    if not match:
+        return None
+    # Logos from the S3 bucket either declare the SVG namespace or carry the TradingView comment
+    if require_namespace and _SVG_NAMESPACE not in match.group(1) and _TV_COMMENT not in raw:
+        return None
+    return minify_svg(raw).decode('utf-8', 'replace')
+
+
+# The logo URL sits near the top of a ~1-2MB symbol page. Scan the page as it
+# streams in and stop at the first --big.svg match; keep a short overlap between
+# chunks so a URL split across two chunks is still found.
+_TV_PAGE_CHUNK_SIZE = 16384
+_TV_MATCH_OVERLAP = 512
+
+
+async def scan_tradingview_page(response: aiohttp.ClientResponse) -> Tuple[Optional[str], bool]:
+    """Return (logo_url, is_fallback) from a streamed TradingView symbol page"""
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    tail = ''
+    fallback = None
+    async for chunk in response.content.iter_chunked(_TV_PAGE_CHUNK_SIZE):
+        window = tail + decoder.decode(chunk)
+        match = _TV_LOGO_RE.search(window)
+        if match:
+            return match.group(0), False
+        # The first fallback on the page is only used if no --big.svg turns up
+        if fallback is None:
+            match2 = _TV_LOGO_FALLBACK_RE.search(window)
+            if match2:
+                fallback = match2.group(0)
+        tail = window[-_TV_MATCH_OVERLAP:]
+    return fallback, fallback is not None
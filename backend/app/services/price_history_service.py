@@ -113,22 +113,29 @@ def _download(
         if close is None:
             return {}
 
+        # Every field frame shares hist's index, so pull each ticker's columns
+        # out once as plain float lists and walk them by position — no
+        # per-cell Series/.get() lookups. NaN is the only value != itself.
+        dates = [idx.date() for idx in hist.index]
         result: dict[str, dict[date, dict]] = {}
         for ticker in tickers:
             if ticker not in close.columns:
                 continue
-            for idx, val in close[ticker].items():
-                if not pd.notna(val):
+            cols = {
+                key: f[ticker].to_numpy(dtype=float).tolist()
+                for key, f in frames.items()
+                if f is not None and ticker in f.columns
+            }
+            closes = cols.pop("c")
+            for i, val in enumerate(closes):
+                if val != val:
                     continue
-                d = idx.date()
-                bar = {"c": float(val)}
-                for key in ("o", "h", "l", "v"):
-                    f = frames[key]
-                    if f is not None and ticker in f.columns:
-                        fv = f[ticker].get(idx)
-                        if pd.notna(fv):
-                            bar[key] = float(fv)
-                result.setdefault(ticker, {})[d] = bar
+                bar = {"c": val}
+                for key, values in cols.items():
+                    fv = values[i]
+                    if fv == fv:
+                        bar[key] = fv
+                result.setdefault(ticker, {})[dates[i]] = bar
         # Remember tickers that produced no data so we don't retry each request
         if mark_failures:
             for t in tickers:
@@ -7,19 +7,228 @@ Implements tiered update strategy for cost efficiency
 # these run in the background price task, not on the web request path, so
 # there's no reason to hold ~150MB resident in the web process for them.
 from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import event, text
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import math
+import orjson
+import threading
 import time
 
+from app.core.database import engine
 from app.models.world_stock_models import WorldStock, WorldStockHolding
 from app.models.israeli_stock_models import IsraeliStock
 from app.models.stock_price_models import StockPrice
 
 logger = logging.getLogger(__name__)
 
+# Parsed once at import. update_world_stock_prices binds one array per column
+# and Postgres expands them server-side with unnest(), so the whole batch is a
+# single statement and a single round trip. price_change / price_change_pct are
+# generated columns, so Postgres derives them from the two prices on write.
+_PRICE_ROWS_SQL = """
+    unnest(
+        CAST(:tickers AS TEXT[]),
+        CAST(:current_prices AS NUMERIC[]),
+        CAST(:previous_closes AS NUMERIC[]),
+        CAST(:day_highs AS NUMERIC[]),
+        CAST(:day_lows AS NUMERIC[]),
+        CAST(:volumes AS BIGINT[]),
+        CAST(:market_caps AS NUMERIC[])
+    ) AS u(ticker, current_price, previous_close, day_high, day_low, volume, market_cap)
+"""
+# Every fetched row is rewritten, even when the quote hasn't moved (off-hours,
+# weekends): updated_at is the "last checked" time that /portfolio/status,
+# /portfolio/refresh and the freshness stats report on.
+_UPSERT_PRICE_SQL = """
+    INSERT INTO "stock_prices" 
+    (ticker, market, current_price, previous_close,
+     day_high, day_low, volume, market_cap, updated_at, created_at)
+    SELECT u.ticker, :market, u.current_price, u.previous_close,
+           u.day_high, u.day_low, u.volume, u.market_cap, :now, :now
+    FROM {rows}
+    ON CONFLICT (ticker, market) DO UPDATE SET
+        current_price = EXCLUDED.current_price,
+        previous_close = EXCLUDED.previous_close,
+        day_high = EXCLUDED.day_high,
+        day_low = EXCLUDED.day_low,
+        volume = EXCLUDED.volume,
+        market_cap = EXCLUDED.market_cap,
+        updated_at = EXCLUDED.updated_at
+"""
+_UPSERT_PRICE_STMT = text(_UPSERT_PRICE_SQL.format(rows=_PRICE_ROWS_SQL))
+
+# Same upsert fused with the holdings revaluation, in one statement and one
+# commit instead of an upsert, a commit, and a second UPDATE-from-join. The
+# holdings UPDATE reads the batch itself and skips holdings already at that
+# value. Returns (price rows written, holdings revalued).
+_UPSERT_AND_REVALUE_SQL = """
+    WITH u AS (
+        SELECT * FROM {rows}
+    ),
+    upserted AS (
+        {upsert}
+        RETURNING 1
+    ),
+    revalued AS (
+        UPDATE {table} h
+        SET current_value = h.quantity * u.current_price,
+            last_price = u.current_price
+        FROM u
+        WHERE {ticker_field} = u.ticker
+        AND u.current_price IS NOT NULL
+        AND (h.last_price IS DISTINCT FROM u.current_price
+             OR h.current_value IS DISTINCT FROM h.quantity * u.current_price)
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM revalued)
+"""
+_UPSERT_AND_REVALUE_STMTS = {
+    market: text(_UPSERT_AND_REVALUE_SQL.format(
+        rows=_PRICE_ROWS_SQL, upsert=_UPSERT_PRICE_SQL.format(rows='u'),
+        table=table, ticker_field=ticker_field))
+    for market, (table, ticker_field) in {
+        'world': ('"world_stock_holdings"', 'h.ticker'),
+        'israeli': ('"israeli_stock_holdings"', 'h.symbol'),
+    }.items()
+}
+
+# Fixed per-market lookups, built once at import instead of a fresh text()
+# (and f-string) on every call. Israeli holdings/catalog are keyed by symbol,
+# the display ticker.
+# GROUP BY over the partial (quantity > 0) index lets Postgres answer the
+# active-ticker lookup with an index-only scan instead of sort-uniquing all holdings
+_ACTIVE_TICKERS_STMTS = {
+    'world': text("""
+        SELECT ticker 
+        FROM "world_stock_holdings" 
+        WHERE quantity > 0
+        GROUP BY ticker
+    """),
+    'israeli': text("""
+        SELECT symbol 
+        FROM "israeli_stock_holdings" 
+        WHERE quantity > 0
+        GROUP BY symbol
+    """),
+}
+_CATALOG_TABLES = {
+    'world': ('"world_stocks"', 's.ticker'),
+    'israeli': ('"israeli_stocks"', 's.symbol'),
+}
+_UNPRICED_CATALOG_STMTS = {
+    market: text(f"""
+        SELECT {ticker_field}
+        FROM {table} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "stock_prices" sp
+            WHERE sp.ticker = {ticker_field} AND sp.market = :market
+        )
+        LIMIT :limit
+    """)
+    for market, (table, ticker_field) in _CATALOG_TABLES.items()
+}
+_STALE_CATALOG_STMTS = {
+    market: text(f"""
+        SELECT sp.ticker
+        FROM "stock_prices" sp
+        WHERE sp.market = :market
+        AND (sp.updated_at < :cutoff OR sp.updated_at IS NULL)
+        AND EXISTS (SELECT 1 FROM {table} s WHERE {ticker_field} = sp.ticker)
+        ORDER BY sp.updated_at ASC NULLS FIRST
+        LIMIT :limit
+    """)
+    for market, (table, ticker_field) in _CATALOG_TABLES.items()
+}
+# One pass over stock_prices; FILTER keeps the freshness buckets in the same scan
+_PRICE_STATS_STMT = text("""
+    SELECT 
+        (SELECT COUNT(*) FROM "world_stocks") as total,
+        COUNT(sp.current_price) as with_price,
+        COUNT(*) FILTER (WHERE sp.updated_at > NOW() - INTERVAL '15 minutes') as fresh_15m,
+        COUNT(*) FILTER (WHERE sp.updated_at > NOW() - INTERVAL '24 hours') as fresh_24h,
+        MIN(sp.updated_at) as oldest_update,
+        MAX(sp.updated_at) as newest_update
+    FROM "stock_prices" sp
+""")
+_ISRAELI_TICKER_MAP_STMT = text("""
+    SELECT symbol, yfinance_ticker 
+    FROM "israeli_stocks" 
+    WHERE symbol = ANY(:tickers)
+""")
+
+# symbol -> yfinance_ticker rarely changes (only on CSV imports), so the cron
+# doesn't need to re-read it every 15 minutes. Cached per symbol so overlapping
+# ticker sets (active vs catalog batches) share entries; None = not in israeli_stocks.
+# { symbol: (ts, yfinance_ticker | None) }
+_ISRAELI_TICKER_MAP_TTL_SEC = 3600
+_israeli_ticker_map_cache: dict[str, tuple[float, Optional[str]]] = {}
+
+# Recently fetched quotes, keyed by yfinance ticker: { ticker: (ts, price data) }.
+# The TTL stays well under the 15-minute active cycle so every cron tick still
+# goes to Yahoo; it only absorbs overlapping fetches (cron + on-demand refresh).
+# Expired entries are pruned whenever a batch is stored, so catalog runs don't
+# leave every ticker they ever fetched behind.
+_QUOTE_CACHE_TTL_SEC = 300
+_quote_cache: dict[str, tuple[float, dict]] = {}
+
+
+def _store_quotes(quotes: Dict[str, Dict]) -> None:
+    """Cache a batch of fetched quotes and drop entries past the TTL."""
+    now = time.time()
+    expired = [t for t, (ts, _) in _quote_cache.items() if now - ts >= _QUOTE_CACHE_TTL_SEC]
+    for t in expired:
+        _quote_cache.pop(t, None)
+    for t, data in quotes.items():
+        _quote_cache[t] = (now, data)
+
+
+def invalidate_israeli_ticker_map_cache(*_args) -> None:
+    """Drop cached symbol -> yfinance ticker maps after israeli_stocks changes."""
+    _israeli_ticker_map_cache.clear()
+
+
+# ORM writes to IsraeliStock invalidate automatically; the raw-SQL CSV imports
+# call invalidate_israeli_ticker_map_cache() themselves
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(IsraeliStock, _event_name, invalidate_israeli_ticker_map_cache)
+
+
+# Keep-alive HTTP sessions shared by every fetch worker and every cron run, so
+# a quote reuses a pooled connection instead of paying a new TLS handshake.
+# Created on first use (the fetch threads race for it, hence the lock).
+_http_sessions: dict[str, object] = {}
+_http_sessions_lock = threading.Lock()
+
+_YAHOO_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+}
+
+
+def _get_http_session(kind: str):
+    """'yahoo' -> requests.Session for the chart API, 'yfinance' -> curl_cffi session for yf.Ticker"""
+    session = _http_sessions.get(kind)
+    if session is not None:
+        return session
+    with _http_sessions_lock:
+        session = _http_sessions.get(kind)
+        if session is None:
+            if kind == 'yfinance':
+                from curl_cffi import requests as curl_requests
+                session = curl_requests.Session(impersonate="chrome")
+            else:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.headers.update(_YAHOO_HEADERS)
+                adapter = HTTPAdapter(pool_maxsize=StockPriceService.FETCH_WORKERS)
+                session.mount('https://', adapter)
+            _http_sessions[kind] = session
+    return session
+
+
 
 class StockPriceService:
     """
@@ -33,6 +242,7 @@ class StockPriceService:
     # Rate limiting: yfinance recommends max 2000 requests/hour
     BATCH_SIZE = 50  # Fetch up to 50 tickers at once
     BATCH_DELAY = 1.0  # Seconds between batches
+    FETCH_WORKERS = 16  # Concurrent quote requests within a batch
     
     # Cache duration
     ACTIVE_CACHE_MINUTES = 15  # Re-fetch active stocks after 15 mins
@@ -43,74 +253,63 @@ class StockPriceService:
     
     def get_active_tickers(self, market: str = 'world') -> List[str]:
         """Get tickers that are in user holdings (Tier 1)"""
-        if market == 'world':
-            result = self.db.execute(
-                text("""
-                    SELECT DISTINCT ticker 
-                    FROM "world_stock_holdings" 
-                    WHERE quantity > 0
-                """)
-            )
-        else:
-            result = self.db.execute(
-                text("""
-                    SELECT DISTINCT symbol 
-                    FROM "israeli_stock_holdings" 
-                    WHERE quantity > 0
-                """)
-            )
+        result = self.db.execute(_ACTIVE_TICKERS_STMTS['world' if market == 'world' else 'israeli'])
         return [row[0] for row in result.fetchall()]
     
     def get_stale_catalog_tickers(self, hours: int = 24, limit: int = 500, market: str = 'world') -> List[str]:
         """Get tickers not updated in the last N hours (Tier 2)"""
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        if market == 'world':
-            table = '"world_stocks"'
-            ticker_field = 's.ticker'
-        else:
-            table = '"israeli_stocks"'
-            ticker_field = 's.symbol'  # Use symbol (display ticker) for Israeli stocks
+        market_key = 'world' if market == 'world' else 'israeli'
         
-        result = self.db.execute(
-            text(f"""
-                SELECT {ticker_field}
-                FROM {table} s
-                LEFT JOIN "stock_prices" sp ON {ticker_field} = sp.ticker AND sp.market = :market
-                WHERE sp.updated_at IS NULL OR sp.updated_at < :cutoff
-                ORDER BY sp.updated_at ASC NULLS FIRST
-                LIMIT :limit
-            """),
-            {"cutoff": cutoff, "limit": limit, "market": market}
-        )
-        return [row[0] for row in result.fetchall()]
+        # Never-priced catalog rows come first (the old NULLS FIRST ordering),
+        # then the stalest priced rows read in order off the
+        # (market, updated_at) index so LIMIT stops the scan early instead of
+        # sorting the whole catalog join
+        result = self.db.execute(_UNPRICED_CATALOG_STMTS[market_key], {"limit": limit, "market": market})
+        tickers = [row[0] for row in result.fetchall()]
+        
+        remaining = limit - len(tickers)
+        if remaining > 0:
+            result = self.db.execute(
+                _STALE_CATALOG_STMTS[market_key],
+                {"cutoff": cutoff, "limit": remaining, "market": market}
+            )
+            tickers.extend(row[0] for row in result.fetchall())
+        return tickers
     
     def _get_israeli_ticker_map(self, display_tickers: List[str]) -> dict:
         """Get mapping of display ticker (symbol) -> yfinance ticker for Israeli stocks"""
-        result = self.db.execute(
-            text("""
-                SELECT symbol, yfinance_ticker 
-                FROM "israeli_stocks" 
-                WHERE symbol = ANY(:tickers)
-            """),
-            {"tickers": display_tickers}
-        )
-        return {row[0]: row[1] for row in result.fetchall()}
+        now = time.time()
+        ticker_map = {}
+        missing = []
+        for symbol in display_tickers:
+            cached = _israeli_ticker_map_cache.get(symbol)
+            if cached and (now - cached[0]) < _ISRAELI_TICKER_MAP_TTL_SEC:
+                if cached[1] is not None:
+                    ticker_map[symbol] = cached[1]
+            else:
+                missing.append(symbol)
+        
+        # Only symbols not seen within the TTL go to the database
+        if missing:
+            result = self.db.execute(_ISRAELI_TICKER_MAP_STMT, {"tickers": missing})
+            found = {row[0]: row[1] for row in result.fetchall()}
+            for symbol in missing:
+                _israeli_ticker_map_cache[symbol] = (now, found.get(symbol))
+            ticker_map.update(found)
+        return ticker_map
     
     def _fetch_price_direct_http(self, yf_ticker: str) -> Optional[Dict]:
         """
         Fetch current price and metadata directly from the Yahoo chart API using requests.
         Bypasses yfinance's quoteSummary endpoints (which get blocked with 429).
         """
-        import requests
         url = f"https://query1.finance.yahoo.com/v8/finance/chart/{yf_ticker}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
         try:
-            r = requests.get(url, headers=headers, timeout=10)
+            r = _get_http_session('yahoo').get(url, timeout=10)
             if r.status_code == 200:
-                data = r.json()
+                data = orjson.loads(r.content)
                 if 'chart' in data and data['chart']['result']:
                     meta = data['chart']['result'][0]['meta']
                     
@@ -129,12 +328,6 @@ class StockPriceService:
                         if low is not None: low = low / 100.0
                         currency = 'ILS'
                         
-                    change = None
-                    change_pct = None
-                    if price is not None and prev_close is not None:
-                        change = price - prev_close
-                        change_pct = (change / prev_close) * 100 if prev_close > 0 else 0
-                        
                     return {
                         'current_price': price,
                         'previous_close': prev_close,
@@ -142,153 +335,141 @@ class StockPriceService:
                         'day_low': low,
                         'volume': volume,
                         'market_cap': None,
-                        'price_change': change,
-                        'price_change_pct': change_pct,
                         'currency': currency
                     }
         except Exception as e:
             logger.warning(f"Direct HTTP fetch failed for {yf_ticker}: {e}")
         return None
     
-    def fetch_prices_batch(self, tickers: List[str]) -> Dict[str, Dict]:
+    def _fetch_one_quote(self, ticker: str) -> Optional[Dict]:
+        """Fetch price data for a single yfinance ticker (runs on a worker thread)."""
+        import yfinance as yf
+        try:
+            logger.debug("Processing ticker: %s", ticker)
+            
+            # Direct HTTP fetch check for Israeli stock tickers or Exchange rate tickers
+            direct_data = None
+            if ticker.endswith('.TA') or ticker.endswith('=X'):
+                logger.debug("Using direct HTTP fetch for %s", ticker)
+                direct_data = self._fetch_price_direct_http(ticker)
+                
+            if direct_data:
+                logger.debug("Direct HTTP fetch successful for %s: %s", ticker, direct_data['current_price'])
+                return direct_data
+            
+            # Standard yfinance logic — fast_info reads the lightweight chart
+            # endpoint instead of the heavily rate-limited quoteSummary behind
+            # .info, and only pulls the handful of quote fields we store
+            fi = yf.Ticker(ticker, session=_get_http_session('yfinance')).fast_info
+            current_price = fi.last_price or 0.0
+            previous_close = fi.previous_close or 0.0
+            high = fi.day_high
+            low = fi.day_low
+            volume = fi.last_volume
+            try:
+                market_cap = fi.market_cap
+            except Exception:
+                market_cap = None  # needs share count, which Yahoo doesn't have for every ticker
+            logger.debug("Ticker %s last_price: %s, previous_close: %s", ticker, current_price, previous_close)
+            
+            # Handle potential agorot returned in standard yfinance call
+            if fi.currency == 'ILA':
+                current_price /= 100.0
+                previous_close /= 100.0
+                if high: high /= 100.0
+                if low: low /= 100.0
+            
+            logger.debug("Final values for %s: current_price=%s, previous_close=%s", ticker, current_price, previous_close)
+            
+            # fast_info values come off a pandas frame as numpy scalars, which
+            # psycopg2 can't bind — convert once here
+            data = {
+                'current_price': float(current_price),
+                'previous_close': float(previous_close),
+                'day_high': float(high) if high else None,
+                'day_low': float(low) if low else None,
+                'volume': int(volume) if volume else None,
+                'market_cap': int(market_cap) if market_cap else None,
+            }
+            return data
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch {ticker} via yfinance: {e}", exc_info=True)
+            logger.debug("Attempting fallback direct HTTP fetch for %s", ticker)
+            direct_data = self._fetch_price_direct_http(ticker)
+            if direct_data:
+                logger.debug("Fallback direct HTTP fetch successful for %s: %s", ticker, direct_data['current_price'])
+            return direct_data
+    
+    def fetch_prices_batch(self, tickers: List[str], use_cache: bool = True) -> Dict[str, Dict]:
         """
         Fetch prices for multiple tickers using yfinance.
         Returns dict of ticker -> price data
         """
-        import yfinance as yf
-        import pandas as pd
+        results = {}
+        for batch_data in self.iter_price_batches(tickers, use_cache=use_cache):
+            results.update(batch_data)
+        return results
+    
+    def iter_price_batches(self, tickers: List[str], use_cache: bool = True) -> Iterator[Dict[str, Dict]]:
+        """
+        Same fetch as fetch_prices_batch, but yields ticker -> price data one
+        batch at a time so callers can write a batch while the next is fetched.
+        use_cache=False always goes to Yahoo (forced / on-demand refreshes);
+        the fresh quotes still refill the cache.
+        """
         if not tickers:
-            return {}
+            return
         
-        results = {}
+        # Serve anything fetched in the last few minutes (another cron path or
+        # an on-demand refresh) from the in-process cache
+        if use_cache:
+            cached_results = {}
+            now = time.time()
+            for t in tickers:
+                cached = _quote_cache.get(t)
+                if cached and (now - cached[0]) < _QUOTE_CACHE_TTL_SEC:
+                    cached_results[t] = cached[1]
+            if cached_results:
+                yield cached_results
+            tickers = [t for t in tickers if t not in cached_results]
+            if not tickers:
+                return
         
-        # Process in batches
-        for i in range(0, len(tickers), self.BATCH_SIZE):
-            batch = tickers[i:i + self.BATCH_SIZE]
-            logger.info(f"Fetching prices for batch {i//self.BATCH_SIZE + 1}: {len(batch)} tickers")
-            
-            try:
-                # yfinance can fetch multiple tickers at once
-                non_ta_tickers = [t for t in batch if not t.endswith('.TA')]
+        # Each quote is its own HTTPS round trip — overlap them on threads
+        # (sockets release the GIL) instead of paying them back to back.
+        # One pool serves every batch so worker threads aren't respawned per batch.
+        with ThreadPoolExecutor(max_workers=min(len(tickers), self.FETCH_WORKERS)) as pool:
+            # Process in batches
+            for i in range(0, len(tickers), self.BATCH_SIZE):
+                batch = tickers[i:i + self.BATCH_SIZE]
+                logger.info(f"Fetching prices for batch {i//self.BATCH_SIZE + 1}: {len(batch)} tickers")
                 
-                data = pd.DataFrame()
-                if non_ta_tickers:
-                    tickers_str_non_ta = " ".join(non_ta_tickers)
-                    logger.info(f"Calling yf.download for non-TA tickers: {tickers_str_non_ta}")
-                    data = yf.download(
-                        tickers_str_non_ta,
-                        period="1d",
-                        interval="1d",
-                        progress=False,
-                        threads=True
-                    )
+                batch_results = {}
+                futures = {pool.submit(self._fetch_one_quote, t): t for t in batch}
+                for future in as_completed(futures):
+                    data = future.result()
+                    if data:
+                        batch_results[futures[future]] = data
+                if batch_results:
+                    _store_quotes(batch_results)
+                    yield batch_results
                 
-                # Also get info for each ticker
-                for ticker in batch:
-                    try:
-                        logger.info(f"Processing ticker: {ticker}")
-                        
-                        # Direct HTTP fetch check for Israeli stock tickers or Exchange rate tickers
-                        direct_data = None
-                        if ticker.endswith('.TA') or ticker.endswith('=X'):
-                            logger.info(f"Using direct HTTP fetch for {ticker}")
-                            direct_data = self._fetch_price_direct_http(ticker)
-                            
-                        if direct_data:
-                            results[ticker] = direct_data
-                            logger.info(f"Direct HTTP fetch successful for {ticker}: {direct_data['current_price']}")
-                            continue
-                        
-                        # Standard yfinance logic
-                        stock = yf.Ticker(ticker)
-                        info = stock.info
-                        logger.info(f"Ticker {ticker} info keys: {list(info.keys())[:20]}")
-                        logger.info(f"Ticker {ticker} currentPrice: {info.get('currentPrice')}, regularMarketPrice: {info.get('regularMarketPrice')}")
-                        
-                        # Handle both single and multi-ticker response format
-                        if len(non_ta_tickers) == 1:
-                            logger.info(f"Single ticker mode, data columns: {list(data.columns) if hasattr(data, 'columns') else 'N/A'}")
-                            if not data.empty and len(data) > 0:
-                                if isinstance(data.columns, pd.MultiIndex) or (len(data.columns) > 0 and isinstance(data.columns[0], tuple)):
-                                    close = data[('Close', ticker)].iloc[-1] if ('Close', ticker) in data.columns else None
-                                    volume = data[('Volume', ticker)].iloc[-1] if ('Volume', ticker) in data.columns else None
-                                    high = data[('High', ticker)].iloc[-1] if ('High', ticker) in data.columns else None
-                                    low = data[('Low', ticker)].iloc[-1] if ('Low', ticker) in data.columns else None
-                                else:
-                                    close = data['Close'].iloc[-1] if 'Close' in data.columns else None
-                                    volume = data['Volume'].iloc[-1] if 'Volume' in data.columns else None
-                                    high = data['High'].iloc[-1] if 'High' in data.columns else None
-                                    low = data['Low'].iloc[-1] if 'Low' in data.columns else None
-                                logger.info(f"Extracted from data: close={close}, volume={volume}, high={high}, low={low}")
-                            else:
-                                close = volume = high = low = None
-                                logger.info("Data is empty, setting all values to None")
-                        else:
-                            close = data['Close'][ticker].iloc[-1] if not data.empty and 'Close' in data.columns and ticker in data['Close'].columns and len(data['Close'][ticker]) > 0 else None
-                            volume = data['Volume'][ticker].iloc[-1] if not data.empty and 'Volume' in data.columns and ticker in data['Volume'].columns and len(data['Volume'][ticker]) > 0 else None
-                            high = data['High'][ticker].iloc[-1] if not data.empty and 'High' in data.columns and ticker in data['High'].columns and len(data['High'][ticker]) > 0 else None
-                            low = data['Low'][ticker].iloc[-1] if not data.empty and 'Low' in data.columns and ticker in data['Low'].columns and len(data['Low'][ticker]) > 0 else None
-                        
-                        current_price = float(info.get('currentPrice') or info.get('regularMarketPrice') or close or 0)
-                        previous_close = float(info.get('previousClose') or info.get('regularMarketPreviousClose') or 0)
-                        
-                        # Handle potential agorot returned in standard yfinance call
-                        currency = info.get('currency', 'USD')
-                        is_agorot = (currency == 'ILA')
-                        if is_agorot:
-                            current_price /= 100.0
-                            previous_close /= 100.0
-                            if close: close /= 100.0
-                            if high: high /= 100.0
-                            if low: low /= 100.0
-                        
-                        logger.info(f"Final values for {ticker}: current_price={current_price}, previous_close={previous_close}")
-                        
-                        results[ticker] = {
-                            'current_price': current_price,
-                            'previous_close': previous_close,
-                            'day_high': float(high) if high else info.get('dayHigh'),
-                            'day_low': float(low) if low else info.get('dayLow'),
-                            'volume': int(volume) if volume else info.get('volume'),
-                            'market_cap': info.get('marketCap'),
-                        }
-                        
-                        if is_agorot:
-                            if results[ticker]['day_high']: results[ticker]['day_high'] /= 100.0
-                            if results[ticker]['day_low']: results[ticker]['day_low'] /= 100.0
-                        
-                        # Calculate price change
-                        if results[ticker]['current_price'] and results[ticker]['previous_close']:
-                            change = results[ticker]['current_price'] - results[ticker]['previous_close']
-                            change_pct = (change / results[ticker]['previous_close']) * 100
-                            results[ticker]['price_change'] = change
-                            results[ticker]['price_change_pct'] = change_pct
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to fetch {ticker} via yfinance: {e}", exc_info=True)
-                        logger.info(f"Attempting fallback direct HTTP fetch for {ticker}")
-                        direct_data = self._fetch_price_direct_http(ticker)
-                        if direct_data:
-                            results[ticker] = direct_data
-                            logger.info(f"Fallback direct HTTP fetch successful for {ticker}: {direct_data['current_price']}")
-                        else:
-                            continue
-                
-            except Exception as e:
-                logger.error(f"Batch fetch failed: {e}")
-            
-            # Rate limiting delay between batches
-            if i + self.BATCH_SIZE < len(tickers):
-                time.sleep(self.BATCH_DELAY)
-        
-        return results
+                # Rate limiting delay between batches
+                if i + self.BATCH_SIZE < len(tickers):
+                    time.sleep(self.BATCH_DELAY)
     
-    def update_world_stock_prices(self, tickers: Optional[List[str]] = None, market: str = 'world') -> Tuple[int, int]:
+    def update_world_stock_prices(self, tickers: Optional[List[str]] = None, market: str = 'world',
+                                  revalue_holdings: bool = False, use_cache: bool = True) -> Tuple[int, int]:
         """
         Update prices for stocks in the StockPrices table.
         Args:
             tickers: List of display tickers to update
             market: 'world' or 'israeli'
+            revalue_holdings: Also refresh current_value/last_price of holdings in
+                those tickers, in the same statement as the upsert
+            use_cache: Serve quotes fetched in the last few minutes from the
+                in-process cache; False forces a fresh fetch
         Returns (updated_count, failed_count)
         """
         if tickers is None:
@@ -299,84 +480,94 @@ class StockPriceService:
             return 0, 0
         
         logger.info(f"Updating prices for {len(tickers)} {market} stocks")
-        logger.info(f"Display tickers: {tickers}")
+        logger.debug("Display tickers: %s", tickers)
         
         # For Israeli stocks, map display tickers to yfinance tickers
         if market == 'israeli':
             ticker_map = self._get_israeli_ticker_map(tickers)  # display -> yfinance
             yfinance_tickers = list(ticker_map.values())
             reverse_map = {v: k for k, v in ticker_map.items()}  # yfinance -> display
-            logger.info(f"Israeli ticker mapping: {ticker_map}")
-            logger.info(f"yfinance tickers to fetch: {yfinance_tickers}")
+            logger.debug("Israeli ticker mapping: %s", ticker_map)
+            logger.debug("yfinance tickers to fetch: %s", yfinance_tickers)
         else:
             ticker_map = {t: t for t in tickers}
             yfinance_tickers = tickers
             reverse_map = ticker_map
         
-        # Fetch prices using yfinance tickers
-        price_data = self.fetch_prices_batch(yfinance_tickers)
-        logger.info(f"Fetched price data for {len(price_data)} tickers: {list(price_data.keys())}")
+        # Write each batch on a single writer thread while the next one is
+        # fetched, so the upsert hides inside the following network round trips.
+        # The writer uses its own pooled connection, never the caller's session.
+        updated, revalued = 0, 0
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            writes = [
+                writer.submit(self._upsert_prices, batch_data, reverse_map, market, revalue_holdings)
+                for batch_data in self.iter_price_batches(yfinance_tickers, use_cache=use_cache)
+            ]
+            for write in writes:
+                batch_stored, batch_revalued = write.result()
+                updated += batch_stored
+                revalued += batch_revalued
         
-        updated = 0
-        failed = 0
+        # Anything requested that isn't stored now failed somewhere: no Israeli
+        # mapping, no quote from Yahoo, or a batch whose upsert rolled back
+        failed = len(tickers) - updated
+        if not writes:
+            logger.info("No prices fetched, nothing to update")
+            return 0, failed
+        
+        logger.info(f"Updated {updated} stocks ({revalued} holdings revalued), {failed} failed")
+        return updated, failed
+    
+    def _upsert_prices(self, price_data: Dict[str, Dict], reverse_map: Dict[str, str],
+                       market: str, revalue_holdings: bool) -> Tuple[int, int]:
+        """
+        Upsert one batch of fetched prices.
+        Returns (stored_count, revalued_count): prices now current in
+        stock_prices and holdings revalued alongside them (0 unless
+        revalue_holdings). (0, 0) if the batch rolled back.
+        """
+        logger.info(f"Fetched price data for {len(price_data)} tickers")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetched tickers: %s", list(price_data))
+        
+        # Column-wise arrays for the unnest() upsert (dict order keeps them aligned)
+        prices = list(price_data.values())
         now = datetime.utcnow()
+        params = {
+            "market": market,
+            "now": now,
+            "tickers": [reverse_map.get(yf_ticker, yf_ticker) for yf_ticker in price_data],  # Store with display ticker
+            "current_prices": [d.get('current_price') for d in prices],
+            "previous_closes": [d.get('previous_close') for d in prices],
+            "day_highs": [d.get('day_high') for d in prices],
+            "day_lows": [d.get('day_low') for d in prices],
+            "volumes": [d.get('volume') for d in prices],
+            "market_caps": [d.get('market_cap') for d in prices],
+        }
         
-        for yf_ticker, data in price_data.items():
-            try:
-                # Get display ticker for storage
-                display_ticker = reverse_map.get(yf_ticker, yf_ticker)
-                logger.info(f"Processing {market} stock: yf_ticker={yf_ticker}, display_ticker={display_ticker}, price={data.get('current_price')}")
-                
-                # Use INSERT ... ON CONFLICT to upsert
-                self.db.execute(
-                    text("""
-                        INSERT INTO "stock_prices" 
-                        (ticker, market, current_price, previous_close, price_change, price_change_pct,
-                         day_high, day_low, volume, market_cap, updated_at, created_at)
-                        VALUES (:ticker, :market, :current_price, :previous_close, :price_change, :price_change_pct,
-                                :day_high, :day_low, :volume, :market_cap, :updated_at, :created_at)
-                        ON CONFLICT (ticker, market) DO UPDATE SET
-                            current_price = EXCLUDED.current_price,
-                            previous_close = EXCLUDED.previous_close,
-                            price_change = EXCLUDED.price_change,
-                            price_change_pct = EXCLUDED.price_change_pct,
-                            day_high = EXCLUDED.day_high,
-                            day_low = EXCLUDED.day_low,
-                            volume = EXCLUDED.volume,
-                            market_cap = EXCLUDED.market_cap,
-                            updated_at = EXCLUDED.updated_at
-                    """),
-                    {
-                        "ticker": display_ticker,  # Store with display ticker
-                        "market": market,
-                        "current_price": data.get('current_price'),
-                        "previous_close": data.get('previous_close'),
-                        "price_change": data.get('price_change'),
-                        "price_change_pct": data.get('price_change_pct'),
-                        "day_high": data.get('day_high'),
-                        "day_low": data.get('day_low'),
-                        "volume": data.get('volume'),
-                        "market_cap": data.get('market_cap'),
-                        "updated_at": now,
-                        "created_at": now
-                    }
-                )
-                updated += 1
-                logger.info(f"Successfully updated {display_ticker} in StockPrices table")
-            except Exception as e:
-                logger.error(f"Failed to update {yf_ticker} (display: {display_ticker}): {e}", exc_info=True)
-                failed += 1
+        # One statement for the whole batch on a Core connection of its own:
+        # this runs on the writer thread, and the request-scoped session
+        # isn't thread-safe. engine.begin() commits, or rolls back on error.
+        stmt = _UPSERT_AND_REVALUE_STMTS[market] if revalue_holdings else _UPSERT_PRICE_STMT
+        try:
+            with engine.begin() as conn:
+                result = conn.execute(stmt, params)
+                revalued = result.one()[1] if revalue_holdings else 0
+        except Exception as e:
+            logger.error(f"Failed to upsert {len(prices)} {market} prices: {e}", exc_info=True)
+            return 0, 0
         
-        self.db.commit()
-        logger.info(f"Updated {updated} stocks, {failed} failed")
-        return updated, failed
+        return len(prices), revalued
     
-    def update_holdings_values(self, user_id: Optional[str] = None, market: str = 'world') -> int:
+    def update_holdings_values(self, user_id: Optional[str] = None, market: str = 'world',
+                               tickers: Optional[List[str]] = None) -> int:
         """
         Recalculate current_value for holdings based on latest stock prices from StockPrices table.
         Args:
             user_id: Optional user ID to filter by
             market: 'world' or 'israeli'
+            tickers: Optional display tickers to limit to (e.g. the ones just
+                re-priced), so only those holdings are touched
         Returns number of holdings updated.
         """
         table = '"world_stock_holdings"' if market == 'world' else '"israeli_stock_holdings"'
@@ -392,29 +583,23 @@ class StockPriceService:
             AND sp.current_price IS NOT NULL
         """
         
+        params = {"market": market}
+        if tickers is not None:
+            if not tickers:
+                return 0
+            query += " AND sp.ticker = ANY(:tickers)"
+            params["tickers"] = list(tickers)
         if user_id:
             query += " AND h.user_id = :user_id"
-            result = self.db.execute(text(query), {"market": market, "user_id": user_id})
-        else:
-            result = self.db.execute(text(query), {"market": market})
+            params["user_id"] = user_id
+        result = self.db.execute(text(query), params)
         
         self.db.commit()
         return result.rowcount
     
     def get_price_stats(self) -> Dict:
         """Get statistics about price data freshness"""
-        result = self.db.execute(
-            text("""
-                SELECT 
-                    (SELECT COUNT(*) FROM "world_stocks") as total,
-                    COUNT(sp.current_price) as with_price,
-                    COUNT(CASE WHEN sp.updated_at > NOW() - INTERVAL '15 minutes' THEN 1 END) as fresh_15m,
-                    COUNT(CASE WHEN sp.updated_at > NOW() - INTERVAL '24 hours' THEN 1 END) as fresh_24h,
-                    MIN(sp.updated_at) as oldest_update,
-                    MAX(sp.updated_at) as newest_update
-                FROM "stock_prices" sp
-            """)
-        )
+        result = self.db.execute(_PRICE_STATS_STMT)
         row = result.fetchone()
         return {
             "total_stocks": row[0],
@@ -427,11 +612,13 @@ class StockPriceService:
 
 
 # Standalone functions for cron jobs
-def update_active_stocks_prices(db: Session) -> Tuple[int, int]:
-    """Update prices for stocks in user holdings"""
+def update_active_stocks_prices(db: Session, use_cache: bool = True) -> Tuple[int, int]:
+    """Update prices for stocks in user holdings and revalue those holdings"""
     service = StockPriceService(db)
-    world_updated, world_failed = service.update_world_stock_prices(market='world')
-    israeli_updated, israeli_failed = service.update_world_stock_prices(market='israeli')
+    world_updated, world_failed = service.update_world_stock_prices(
+        market='world', revalue_holdings=True, use_cache=use_cache)
+    israeli_updated, israeli_failed = service.update_world_stock_prices(
+        market='israeli', revalue_holdings=True, use_cache=use_cache)
     return (world_updated + israeli_updated, world_failed + israeli_failed)
 
 
@@ -504,7 +691,7 @@ def _fetch_detail_direct(ticker: str, is_israeli: bool = False) -> Optional[dict
     try:
         r = requests.get(url, headers=headers, timeout=10)
         if r.status_code == 200:
-            data = r.json()
+            data = orjson.loads(r.content)
             if 'chart' in data and data['chart']['result']:
                 meta = data['chart']['result'][0]['meta']
                 currency = meta.get('currency', 'USD')
@@ -605,7 +792,7 @@ def _fetch_history_direct(ticker: str, period: str) -> Optional[dict]:
     try:
         r = requests.get(url, headers=headers, timeout=10)
         if r.status_code == 200:
-            data = r.json()
+            data = orjson.loads(r.content)
             if 'chart' in data and data['chart']['result']:
                 chart = data['chart']['result'][0]
                 meta = chart.get('meta', {})
@@ -922,7 +1109,6 @@ def get_stock_history(ticker: str, period: str = "1M") -> dict:
     Returns { ticker, period, data: [{date, open, high, low, close, volume}] }
     """
     import yfinance as yf
-    import pandas as pd
     if ticker.endswith('.TA'):
         direct_hist = _fetch_history_direct(ticker, period)
         if direct_hist:
@@ -940,28 +1126,25 @@ def get_stock_history(ticker: str, period: str = "1M") -> dict:
         except Exception:
             pass
             
+        if hist.empty:
+            return {"ticker": ticker, "period": period, "data": []}
+        
+        # Pull the OHLCV block out as one numpy array (scaled in one shot for
+        # agorot) instead of building a pandas Series per row with iterrows()
+        ohlcv = hist[["Open", "High", "Low", "Close", "Volume"]].to_numpy(dtype=float)
+        if is_agorot:
+            ohlcv[:, :4] /= 100.0
+        date_fmt = "%Y-%m-%d" if yf_interval not in ("5m", "15m") else "%Y-%m-%dT%H:%M:%S"
+        
         data = []
-        for ts, row in hist.iterrows():
-            close_val = float(row["Close"])
-            open_val = float(row["Open"])
-            high_val = float(row["High"])
-            low_val = float(row["Low"])
-            vol_val = int(row["Volume"]) if not pd.isna(row["Volume"]) else 0
-            
-            if is_agorot:
-                close_val /= 100.0
-                open_val /= 100.0
-                high_val /= 100.0
-                low_val /= 100.0
-                
+        for ts, (open_val, high_val, low_val, close_val, vol_val) in zip(hist.index, ohlcv.tolist()):
             data.append({
-                "date": ts.strftime("%Y-%m-%d") if yf_interval != "5m" and yf_interval != "15m"
-                        else ts.strftime("%Y-%m-%dT%H:%M:%S"),
+                "date":   ts.strftime(date_fmt),
                 "open":   round(open_val,   4),
                 "high":   round(high_val,   4),
                 "low":    round(low_val,    4),
                 "close":  round(close_val,  4),
-                "volume": vol_val,
+                "volume": int(vol_val) if not math.isnan(vol_val) else 0,
             })
         return {"ticker": ticker, "period": period, "data": data}
     except Exception as e:
@@ -4,15 +4,29 @@ Validates transactions before saving to pending transactions table
 """
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import re
 
+# Compiled once — validate_batch runs these for every transaction
+_SECURITY_NO_RE = re.compile(r'^\d{5,7}$')           # Israeli securities: 5-7 digits
+_TIME_RE = re.compile(r'^\d{1,2}:\d{2}(?::\d{2})?$')  # HH:MM or HH:MM:SS
+
+# Accepted date formats keyed by shape: (separator, year position, year digits)
+_DATE_FORMATS = {
+    ('-', 'first', 4): '%Y-%m-%d',
+    ('/', 'last', 4): '%d/%m/%Y',
+    ('/', 'last', 2): '%d/%m/%y',
+    ('-', 'last', 4): '%d-%m-%Y',
+    ('-', 'last', 2): '%d-%m-%y',
+    ('/', 'first', 4): '%Y/%m/%d',
+}
+
 
 class TransactionValidator:
     """Validates transaction data for integrity and completeness"""
     
     # Valid transaction types
-    VALID_TYPES = {'BUY', 'SELL', 'DIVIDEND', 'DEPOSIT', 'WITHDRAWAL'}
+    VALID_TYPES = frozenset({'BUY', 'SELL', 'DIVIDEND', 'DEPOSIT', 'WITHDRAWAL'})
     
     def __init__(self):
         self.errors = []
@@ -27,20 +41,23 @@ class TransactionValidator:
         self.errors = []
         self.warnings = []
         
+        # Normalized once and shared by the type-dependent helpers
+        trans_type = (transaction.get('transaction_type') or '').upper()
+        
         # Required field validation
-        self._validate_required_fields(transaction)
+        self._validate_required_fields(transaction, trans_type)
         
         # Type-specific validation
-        self._validate_transaction_type(transaction)
+        self._validate_transaction_type(trans_type)
         
         # Date validation
         self._validate_dates(transaction)
         
         # Numeric validation
-        self._validate_numeric_fields(transaction)
+        self._validate_numeric_fields(transaction, trans_type)
         
         # Logical validation
-        self._validate_business_rules(transaction)
+        self._validate_business_rules(transaction, trans_type)
         
         return (len(self.errors) == 0, self.errors.copy(), self.warnings.copy())
     
@@ -75,9 +92,8 @@ class TransactionValidator:
         
         return results
     
-    def _validate_required_fields(self, transaction: Dict):
+    def _validate_required_fields(self, transaction: Dict, trans_type: str):
         """Check for required fields based on transaction type"""
-        trans_type = transaction.get('transaction_type', '').upper()
         
         # Common required fields for all transactions
         required = ['transaction_type']
@@ -96,10 +112,8 @@ class TransactionValidator:
             if value is None or (isinstance(value, str) and not value.strip()):
                 self.errors.append(f"Missing required field: {field}")
     
-    def _validate_transaction_type(self, transaction: Dict):
+    def _validate_transaction_type(self, trans_type: str):
         """Validate transaction type"""
-        trans_type = transaction.get('transaction_type', '').upper()
-        
         if not trans_type:
             self.errors.append("Transaction type is required")
             return
@@ -138,16 +152,14 @@ class TransactionValidator:
         if transaction_time and not self._is_valid_time(transaction_time):
             self.warnings.append(f"Invalid time format: {transaction_time}")
     
-    def _validate_numeric_fields(self, transaction: Dict):
-        """Validate numeric fields"""
-        trans_type = transaction.get('transaction_type', '').upper()
-        
+    def _validate_numeric_fields(self, transaction: Dict, trans_type: str):
+        """Validate numeric fields (float is enough for sign/magnitude checks)"""
         # Quantity validation (for BUY/SELL)
         if trans_type in ('BUY', 'SELL'):
             quantity = transaction.get('quantity')
             if quantity is not None:
                 try:
-                    qty = Decimal(str(quantity))
+                    qty = float(quantity)
                     if qty <= 0:
                         self.errors.append("Quantity must be greater than 0")
                     if qty > 1_000_000:
@@ -160,7 +172,7 @@ class TransactionValidator:
             price = transaction.get('price')
             if price is not None:
                 try:
-                    prc = Decimal(str(price))
+                    prc = float(price)
                     if prc <= 0:
                         self.errors.append("Price must be greater than 0")
                     if prc > 100_000:
@@ -172,7 +184,7 @@ class TransactionValidator:
         total_value = transaction.get('total_value')
         if total_value is not None:
             try:
-                total = Decimal(str(total_value))
+                total = float(total_value)
                 if abs(total) > 10_000_000:
                     self.warnings.append(f"Unusually large amount: {total_value}")
             except (ValueError, TypeError):
@@ -182,7 +194,7 @@ class TransactionValidator:
         commission = transaction.get('commission')
         if commission is not None:
             try:
-                comm = Decimal(str(commission))
+                comm = float(commission)
                 if comm < 0:
                     self.errors.append("Commission cannot be negative")
                 if comm > 10000:
@@ -194,16 +206,14 @@ class TransactionValidator:
         tax = transaction.get('tax')
         if tax is not None:
             try:
-                tax_val = Decimal(str(tax))
+                tax_val = float(tax)
                 if tax_val < 0:
                     self.warnings.append("Tax is negative (unusual)")
             except (ValueError, TypeError):
                 self.warnings.append(f"Invalid tax value: {tax}")
     
-    def _validate_business_rules(self, transaction: Dict):
+    def _validate_business_rules(self, transaction: Dict, trans_type: str):
         """Validate business logic rules"""
-        trans_type = transaction.get('transaction_type', '').upper()
-        
         # For BUY/SELL: check if quantity * price ≈ total_value
         if trans_type in ('BUY', 'SELL'):
             quantity = transaction.get('quantity')
@@ -228,56 +238,54 @@ class TransactionValidator:
                                 f"Total value mismatch: {quantity} × {price} = {calculated_total:.2f}, "
                                 f"but total_value is {total}. Difference: {difference_pct:.1f}%"
                             )
-                except (ValueError, TypeError, ZeroDivisionError):
+                except (ValueError, TypeError, ZeroDivisionError, InvalidOperation):
                     pass  # Already caught by numeric validation
         
         # Security number format validation
         security_no = transaction.get('security_no')
         if security_no and trans_type in ('BUY', 'SELL', 'DIVIDEND'):
             # Israeli securities are typically 5-7 digits
-            if not re.match(r'^\d{5,7}$', str(security_no)):
+            if not _SECURITY_NO_RE.match(str(security_no)):
                 self.warnings.append(f"Unusual security number format: {security_no}")
     
     def _parse_date(self, date_value) -> Optional[date]:
         """Parse various date formats"""
-        if isinstance(date_value, date):
-            return date_value
-        
+        # datetime is a date subclass, so it has to be checked first
         if isinstance(date_value, datetime):
             return date_value.date()
         
+        if isinstance(date_value, date):
+            return date_value
+        
         if not isinstance(date_value, str):
             return None
         
-        # Try various date formats
-        formats = [
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%d/%m/%y',
-            '%d-%m-%Y',
-            '%d-%m-%y',
-            '%Y/%m/%d',
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_value.strip(), fmt).date()
-            except ValueError:
-                continue
+        # Pick the one format the string can match from its shape, so each
+        # date costs a single strptime call
+        date_str = date_value.strip()
+        sep = '-' if '-' in date_str else '/'
+        parts = date_str.split(sep)
+        if len(parts) != 3:
+            return None
+        if len(parts[0]) == 4:
+            shape = (sep, 'first', 4)
+        else:
+            shape = (sep, 'last', len(parts[2]))
+        fmt = _DATE_FORMATS.get(shape)
+        if fmt is None:
+            return None
         
-        return None
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            return None
     
     def _is_valid_time(self, time_str: str) -> bool:
         """Validate time format (HH:MM or HH:MM:SS)"""
         if not isinstance(time_str, str):
             return False
         
-        patterns = [
-            r'^\d{1,2}:\d{2}$',          # HH:MM
-            r'^\d{1,2}:\d{2}:\d{2}$',    # HH:MM:SS
-        ]
-        
-        return any(re.match(pattern, time_str.strip()) for pattern in patterns)
+        return bool(_TIME_RE.match(time_str.strip()))
 
 
 def validate_transaction(transaction: Dict) -> Tuple[bool, List[str], List[str]]:
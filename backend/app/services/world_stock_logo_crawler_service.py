@@ -5,39 +5,144 @@ Fetches SVG logos from TradingView and stores them in the database
 
 import asyncio
 import aiohttp
+import functools
 import logging
-from typing import Optional, List, Dict
+import socket
+from typing import Awaitable, Callable, Iterator, Optional, List, Dict, Tuple
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
 from app.models.world_stock_models import WorldStock
-from app.core.database import engine
-import re
+from app.core.database import SessionLocal, engine
+from app.services.logo_utils import clean_svg, scan_tradingview_page
 
 logger = logging.getLogger(__name__)
 
+# A miss on the S3 bucket comes back as a small XML error document. Reading it
+# lets the keep-alive connection go back to the pool: releasing a response with
+# an unread body makes aiohttp close the connection instead.
+_MAX_DRAINED_ERROR_BODY = 4096
+
+
+async def _drain_error_body(response: aiohttp.ClientResponse) -> None:
+    """Read a small error response body so its connection can be reused"""
+    length = response.content_length
+    if length is not None and length <= _MAX_DRAINED_ERROR_BODY:
+        await response.read()
+
+
+# One ClientSession (and its keep-alive connection pool + DNS cache) shared by
+# every crawler instance, so repeated crawls don't redo TCP/TLS handshakes to
+# tradingview.com. A session is tied to the loop it was created on, so a new
+# one is made if the loop changes (e.g. successive asyncio.run() in scripts).
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Resolve through c-ares when aiodns is installed instead of getaddrinfo on the
+# default thread pool; IPv4 only, so hosts with a broken IPv6 route don't stall
+# on AAAA connection attempts before falling back.
+try:
+    import aiodns  # noqa: F401
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+
+
+def _get_shared_session() -> aiohttp.ClientSession:
+    """Return the shared ClientSession for the running loop, creating it on first use"""
+    global _shared_session, _shared_session_loop
+    loop = asyncio.get_running_loop()
+    # No await between the check and the assignment, so no lock is needed
+    if _shared_session is None or _shared_session.closed or _shared_session_loop is not loop:
+        _shared_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                resolver=aiohttp.AsyncResolver() if AIODNS_AVAILABLE else None,
+                family=socket.AF_INET,
+                limit=100,
+                limit_per_host=20,
+                ttl_dns_cache=600,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+            ),
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            }
+        )
+        _shared_session_loop = loop
+    return _shared_session
+
+
+async def close_shared_session() -> None:
+    """Close the shared ClientSession (app shutdown / end of a script)"""
+    global _shared_session, _shared_session_loop
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+    _shared_session_loop = None
+
+
+_S3_LOGO_BASE_URL = "https://s3-symbol-logo.tradingview.com"
+
+
+@functools.lru_cache(maxsize=4096)
+def _s3_logo_url(ticker: str) -> str:
+    """S3 logo URL for a ticker (memoised: the same tickers recur across crawls/retries)"""
+    # Convert to lowercase and clean
+    clean_ticker = ticker.lower().replace(' ', '-').replace('.', '')
+    return f"{_S3_LOGO_BASE_URL}/{clean_ticker}--big.svg"
+
+
+# TradingView exchange name, ordered from most-likely to least-likely for US stocks
+_TV_EXCHANGE_FALLBACK_ORDER = ('NASDAQ', 'NYSE', 'AMEX', 'ARCA')
+
+# Map stored exchange codes → preferred TradingView exchange name (head of fallback list)
+_EXCHANGE_TO_TV = {
+    'NASDAQ': 'NASDAQ',
+    'NMS': 'NASDAQ',
+    'NGM': 'NASDAQ',
+    'NCM': 'NASDAQ',
+    'NYSE': 'NYSE',
+    'NYQ': 'NYSE',
+    'AMEX': 'AMEX',
+    'ASE': 'AMEX',
+    'NYSE ARCA': 'ARCA',
+    'ARCA': 'ARCA',
+    'PCX': 'ARCA',
+    'BATS': 'BATS',
+    'BTS': 'BATS',
+    # 'US' and unknown → start with NASDAQ (most common US listing)
+}
+
+# Full probe order per preferred exchange (preferred first, then the fallbacks),
+# built once instead of per stock
+_TV_EXCHANGE_ORDER = {
+    preferred: (preferred,) + tuple(e for e in _TV_EXCHANGE_FALLBACK_ORDER if e != preferred)
+    for preferred in set(_EXCHANGE_TO_TV.values())
+}
+
+
+def _tv_symbol_url(exchange: str, ticker: str) -> str:
+    """TradingView symbol page URL; ticker must already be upper-cased and stripped"""
+    return f"https://www.tradingview.com/symbols/{exchange}-{ticker}/"
+
+
 class WorldStockLogoCrawlerService:
     """Service for crawling and storing world stock logos"""
     
     def __init__(self):
-        self.base_url = "https://s3-symbol-logo.tradingview.com"
+        self.base_url = _S3_LOGO_BASE_URL
         self.session = None
-        # Default to NASDAQ, but can be overridden for other exchanges
-        self.tv_base_symbol_url = "https://www.tradingview.com/symbols/NASDAQ-{symbol}/"
+        # (ticker, TradingView exchange) → logo URL or None, for this crawler's lifetime,
+        # so a ticker listed under several exchange codes is only probed once per exchange
+        self._tv_probe_cache: Dict[Tuple[str, str], Optional[str]] = {}
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-        )
+        self.session = _get_shared_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit (the shared session stays open for the next crawl)"""
+        self.session = None
     
     def get_logo_url(self, ticker: str) -> str:
         """
@@ -49,11 +154,9 @@ class WorldStockLogoCrawlerService:
         Returns:
             The complete URL to fetch the SVG logo
         """
-        # Convert to lowercase and clean
-        clean_ticker = ticker.lower().replace(' ', '-').replace('.', '')
-        return f"{self.base_url}/{clean_ticker}--big.svg"
+        return _s3_logo_url(ticker)
     
-    async def fetch_logo_svg(self, ticker: str) -> Optional[str]:
+    async def fetch_logo_svg(self, ticker: str) -> Tuple[str, Optional[str]]:
         """
         Fetch SVG logo for a specific stock ticker
         
@@ -61,7 +164,7 @@ class WorldStockLogoCrawlerService:
             ticker: The stock ticker to fetch logo for
             
         Returns:
-            SVG content as string if successful, None if failed
+            (logo URL, SVG content) — content is None if the fetch failed
         """
         if not self.session:
             raise RuntimeError("WorldStockLogoCrawlerService must be used as async context manager")
@@ -71,30 +174,22 @@ class WorldStockLogoCrawlerService:
         try:
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    content = await response.text()
-                    # Validate it's actually SVG content
-                    content_stripped = content.strip()
-                    if (('<svg' in content_stripped and 
-                         '</svg>' in content_stripped and
-                         'xmlns="http://www.w3.org/2000/svg"' in content) or
-                        ('<!-- by TradingView -->' in content and 
-                         '<svg' in content and '</svg>' in content)):
-                        
-                        # Remove TradingView comment for clean storage
-                        clean_content = content.replace('<!-- by TradingView -->', '').strip()
-                        
+                    raw = await response.read()
+                    clean_content = clean_svg(raw, require_namespace=True)
+                    if clean_content:
                         logger.info(f"Successfully fetched logo for {ticker}")
-                        return clean_content
+                        return url, clean_content
                     else:
-                        logger.warning(f"Invalid SVG content for {ticker}: {content[:100]}...")
-                        return None
+                        logger.warning(f"Invalid SVG content for {ticker}: {raw[:100]}...")
+                        return url, None
                 else:
                     logger.warning(f"Failed to fetch logo for {ticker}: HTTP {response.status}")
-                    return None
+                    await _drain_error_body(response)
+                    return url, None
                     
         except Exception as e:
             logger.error(f"Error fetching logo for {ticker}: {str(e)}")
-            return None
+            return url, None
 
     async def fetch_svg_from_url(self, logo_url: str) -> Optional[str]:
         """
@@ -117,12 +212,10 @@ class WorldStockLogoCrawlerService:
             async with self.session.get(logo_url) as response:
                 if response.status != 200:
                     logger.warning(f"Failed to fetch SVG from URL {logo_url}: HTTP {response.status}")
+                    await _drain_error_body(response)
                     return None
-                content = await response.text()
-                content_stripped = content.strip()
-                if (('<svg' in content_stripped and '</svg>' in content_stripped) or
-                    ('<!-- by TradingView -->' in content and '<svg' in content and '</svg>' in content)):
-                    clean_content = content.replace('<!-- by TradingView -->', '').strip()
+                clean_content = clean_svg(await response.read())
+                if clean_content:
                     return clean_content
                 logger.warning(f"Content from {logo_url} does not appear to be valid SVG")
                 return None
@@ -130,6 +223,11 @@ class WorldStockLogoCrawlerService:
             logger.error(f"Error fetching SVG from URL {logo_url}: {str(e)}")
             return None
     
+    # One statement for single and bulk logo writes; a NULL url keeps the stored logo_url
+    _UPDATE_LOGO_SQL = text(
+        'UPDATE "world_stocks" SET logo_svg = :svg, logo_url = COALESCE(:url, logo_url) WHERE id = :id'
+    )
+
     def update_stock_logo(self, stock_id: int, svg_content: str, logo_url: Optional[str] = None) -> bool:
         """
         Update stock record with logo SVG content
@@ -143,19 +241,11 @@ class WorldStockLogoCrawlerService:
             True if update was successful, False otherwise
         """
         try:
-            Session = sessionmaker(bind=engine)
-            
-            with Session() as session:
-                if logo_url:
-                    result = session.execute(
-                        text('UPDATE "world_stocks" SET logo_url = :logo_url, logo_svg = :svg_content WHERE id = :stock_id'),
-                        {"logo_url": logo_url, "svg_content": svg_content, "stock_id": stock_id}
-                    )
-                else:
-                    result = session.execute(
-                        text('UPDATE "world_stocks" SET logo_svg = :svg_content WHERE id = :stock_id'),
-                        {"svg_content": svg_content, "stock_id": stock_id}
-                    )
+            with SessionLocal() as session:
+                result = session.execute(
+                    self._UPDATE_LOGO_SQL,
+                    {"svg": svg_content, "url": logo_url or None, "id": stock_id}
+                )
                 
                 if result.rowcount > 0:
                     session.commit()
@@ -181,8 +271,7 @@ class WorldStockLogoCrawlerService:
             True if update was successful, False otherwise
         """
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text('UPDATE "world_stocks" SET logo_url = :url WHERE id = :id'),
                     {"url": logo_url, "id": stock_id}
@@ -197,6 +286,107 @@ class WorldStockLogoCrawlerService:
             logger.error(f"Error updating logo_url for world stock ID {stock_id}: {str(e)}")
             return False
     
+    # Bulk writes run on a bare Core connection (no ORM Session/identity map to
+    # set up per flush) with statements built once; the engine's
+    # values_plus_batch executemany sends each batch in one round trip
+    _BULK_UPDATE_LOGO_URLS_SQL = text(
+        'UPDATE "world_stocks" SET logo_url = :url, tv_exchange = :tv_exchange, '
+        'logo_svg = COALESCE(:svg, logo_svg) WHERE id = :id'
+    )
+
+    def bulk_update_stock_logos(self, rows: List[Dict]) -> int:
+        """
+        Store fetched logos for a whole batch in one executemany and one commit.
+
+        Args:
+            rows: dicts with id, svg and url (url None keeps the stored logo_url)
+
+        Returns:
+            Number of rows written (0 if the batch failed)
+        """
+        if not rows:
+            return 0
+        try:
+            with engine.begin() as conn:
+                conn.execute(self._UPDATE_LOGO_SQL, rows)
+            logger.info(f"Updated logos for {len(rows)} world stocks")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error bulk updating logos for {len(rows)} world stocks: {str(e)}")
+            return 0
+
+    def bulk_update_stock_logo_urls(self, rows: List[Dict]) -> int:
+        """
+        Store discovered logo URLs for a whole batch in one executemany and one commit.
+
+        Args:
+            rows: dicts with id, url, tv_exchange (the TradingView exchange the
+                  logo was found under, probed first on the next crawl) and svg
+                  (None keeps the stored logo_svg)
+
+        Returns:
+            Number of rows written (0 if the batch failed)
+        """
+        if not rows:
+            return 0
+        try:
+            with engine.begin() as conn:
+                conn.execute(self._BULK_UPDATE_LOGO_URLS_SQL, rows)
+            logger.info(f"Updated logo_url for {len(rows)} world stocks")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error bulk updating logo_url for {len(rows)} world stocks: {str(e)}")
+            return 0
+    
+    # Worklist filters shared by the list getters' iterating counterparts; the
+    # missing-SVG / missing-URL predicates match the partial (ticker, id) indexes
+    _WHERE_MISSING_SVG = "logo_svg IS NULL OR logo_svg = ''"
+    _WHERE_MISSING_URL = "logo_url IS NULL OR logo_url = ''"
+    _WHERE_HAS_URL = "logo_url IS NOT NULL AND logo_url <> ''"
+    _WHERE_URL_MISSING_SVG = f"({_WHERE_HAS_URL}) AND ({_WHERE_MISSING_SVG})"
+
+    def iter_world_stock_pages(self, columns: Tuple[str, ...], where: str = "TRUE",
+                               chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """
+        Yield world stocks matching `where` as lists of at most chunk_size dicts,
+        keyset-paginated on (ticker, id). Crawling starts after the first page
+        instead of after the whole table is loaded, and rows updated while
+        crawling never shift the pages still to come. Rows without a ticker
+        (which have no logo to look up) are filtered out explicitly, since a
+        row comparison against NULL would drop them anyway.
+
+        Args:
+            columns: columns to select (id and ticker are always included)
+            where: SQL filter over "world_stocks"
+            chunk_size: rows per page
+        """
+        columns = tuple(dict.fromkeys(('id', 'ticker') + tuple(columns)))
+        stmt = text(f"""
+            SELECT {', '.join(columns)}
+            FROM "world_stocks"
+            WHERE ({where})
+            AND ticker IS NOT NULL
+            AND (ticker, id) > (:last_ticker, :last_id)
+            ORDER BY ticker, id
+            LIMIT :limit
+        """)
+        last_ticker, last_id = '', 0
+        while True:
+            try:
+                with engine.connect() as conn:
+                    rows = conn.execute(
+                        stmt, {"last_ticker": last_ticker, "last_id": last_id, "limit": chunk_size}
+                    ).fetchall()
+            except Exception as e:
+                logger.error(f"Error fetching world stocks page after {last_ticker!r}: {str(e)}")
+                return
+            if not rows:
+                return
+            yield [dict(zip(columns, row)) for row in rows]
+            if len(rows) < chunk_size:
+                return
+            last_id, last_ticker = rows[-1][0], rows[-1][1]
+
     def get_stocks_without_logos(self) -> List[Dict]:
         """
         Get all world stocks that don't have logos yet
@@ -205,15 +395,13 @@ class WorldStockLogoCrawlerService:
             List of stock dictionaries with id, ticker, company_name, exchange
         """
         try:
-            Session = sessionmaker(bind=engine)
-            
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text("""
                         SELECT id, ticker, company_name, exchange 
                         FROM "world_stocks" 
                         WHERE logo_svg IS NULL OR logo_svg = ''
-                        ORDER BY ticker
+                        ORDER BY ticker, id
                     """)
                 )
                 
@@ -240,15 +428,14 @@ class WorldStockLogoCrawlerService:
             List of dicts: id, ticker, company_name, logo_url
         """
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text("""
                         SELECT id, ticker, company_name, logo_url 
                         FROM "world_stocks"
                         WHERE logo_url IS NOT NULL AND logo_url <> '' 
                         AND (logo_svg IS NULL OR logo_svg = '')
-                        ORDER BY ticker
+                        ORDER BY ticker, id
                     """)
                 )
                 stocks: List[Dict] = []
@@ -264,14 +451,13 @@ class WorldStockLogoCrawlerService:
     def get_stocks_missing_logo_url(self) -> List[Dict]:
         """Return stocks where logo_url is NULL or empty string."""
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text("""
                         SELECT id, ticker, company_name, exchange 
                         FROM "world_stocks" 
                         WHERE logo_url IS NULL OR logo_url = ''
-                        ORDER BY ticker
+                        ORDER BY ticker, id
                     """),
                 )
                 return [
@@ -285,8 +471,7 @@ class WorldStockLogoCrawlerService:
     def get_all_stocks(self) -> List[Dict]:
         """Return all world stocks (id, ticker, company_name, exchange)."""
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 result = session.execute(
                     text('SELECT id, ticker, company_name, exchange FROM "world_stocks" ORDER BY ticker')
                 )
@@ -309,11 +494,15 @@ class WorldStockLogoCrawlerService:
         Returns:
             Logo URL if found, None otherwise
         """
+        return await self._fetch_tradingview_page_logo(ticker.upper().strip(), exchange)
+
+    async def _fetch_tradingview_page_logo(self, ticker: str, exchange: str) -> Optional[str]:
+        """fetch_tradingview_logo_url for a ticker that is already stripped and upper-cased"""
         if not self.session:
             raise RuntimeError("WorldStockLogoCrawlerService must be used as async context manager")
 
         # Format URL based on exchange
-        url = f"https://www.tradingview.com/symbols/{exchange}-{ticker.upper().strip()}/"
+        url = _tv_symbol_url(exchange, ticker)
         
         try:
             async with self.session.get(url, headers={
@@ -324,22 +513,15 @@ class WorldStockLogoCrawlerService:
                 if response.status != 200:
                     logger.warning(f"TV page fetch failed for {ticker}: HTTP {response.status}")
                     return None
-                html = await response.text()
-
-            # Regex for S3 logo URL ending with --big.svg, exclude '/source/'
-            pattern = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+--big\.svg", re.IGNORECASE)
-            match = pattern.search(html)
-            if match:
-                logo_url = match.group(0)
-                logger.info(f"Found TradingView logo URL for {ticker}: {logo_url}")
-                return logo_url
+                # S3 logo URL ending with --big.svg (falling back to any
+                # s3-symbol-logo svg), excluding '/source/'
+                logo_url, is_fallback = await scan_tradingview_page(response)
 
-            # Fallback: any s3-symbol-logo URL not containing '/source/'
-            alt_pattern = re.compile(r"https://s3-symbol-logo\.tradingview\.com/(?!source/)[^\"']+\.svg", re.IGNORECASE)
-            match2 = alt_pattern.search(html)
-            if match2:
-                logo_url = match2.group(0)
-                logger.info(f"Found TradingView logo URL (fallback) for {ticker}: {logo_url}")
+            if logo_url:
+                if is_fallback:
+                    logger.info(f"Found TradingView logo URL (fallback) for {ticker}: {logo_url}")
+                else:
+                    logger.info(f"Found TradingView logo URL for {ticker}: {logo_url}")
                 return logo_url
 
             logger.info(f"No TradingView logo URL found for {ticker}")
@@ -348,34 +530,29 @@ class WorldStockLogoCrawlerService:
             logger.error(f"Error fetching TradingView page for {ticker}: {str(e)}")
             return None
 
-    async def crawl_tradingview_logo_urls_for_all(self, batch_size: int = 5, missing_only: bool = True) -> Dict[str, int]:
+    async def crawl_tradingview_logo_urls_for_all(self, batch_size: int = 5, missing_only: bool = True,
+                                                  with_svg: bool = False) -> Dict[str, int]:
         """
         Crawl TradingView pages to extract logo URLs for world stocks.
         If missing_only=True, only process stocks without a logo_url currently.
+        If with_svg=True, each found URL's SVG is downloaded in the same task and
+        stored in the same UPDATE (fusing Phase 1 and Phase 2 for those stocks).
         """
         if not self.session:
             raise RuntimeError("WorldStockLogoCrawlerService must be used as async context manager")
 
-        stocks = self.get_stocks_missing_logo_url() if missing_only else self.get_all_stocks()
-        if not stocks:
+        pages = self.iter_world_stock_pages(
+            ('company_name', 'exchange', 'tv_exchange'), self._WHERE_MISSING_URL if missing_only else "TRUE"
+        )
+        success, failed, total = await self._crawl_pages(
+            pages, functools.partial(self._process_tradingview_logo_url, with_svg=with_svg),
+            self.bulk_update_stock_logo_urls, batch_size
+        )
+        if not total:
             return {"success": 0, "failed": 0, "total": 0}
-
-        success = 0
-        failed = 0
-        for i in range(0, len(stocks), batch_size):
-            batch = stocks[i:i+batch_size]
-            tasks = [asyncio.create_task(self._process_tradingview_logo_url(stock)) for stock in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for r in results:
-                if isinstance(r, Exception) or r is False:
-                    failed += 1
-                else:
-                    success += 1
-            if i + batch_size < len(stocks):
-                await asyncio.sleep(1.5)
         
         logger.info(f"Logo URL crawling completed: {success} success, {failed} failed")
-        return {"success": success, "failed": failed, "total": len(stocks)}
+        return {"success": success, "failed": failed, "total": total}
 
     async def populate_logo_svg_from_logo_urls_for_all(self, batch_size: int = 5, only_missing: bool = True) -> Dict[str, int]:
         """
@@ -391,112 +568,84 @@ class WorldStockLogoCrawlerService:
         if not self.session:
             raise RuntimeError("WorldStockLogoCrawlerService must be used as async context manager")
 
-        targets: List[Dict]
-        if only_missing:
-            targets = self.get_stocks_with_logo_url_missing_svg()
-        else:
-            try:
-                Session = sessionmaker(bind=engine)
-                with Session() as session_db:
-                    res = session_db.execute(
-                        text("""
-                            SELECT id, ticker, company_name, logo_url 
-                            FROM "world_stocks"
-                            WHERE logo_url IS NOT NULL AND logo_url <> ''
-                            ORDER BY ticker
-                        """)
-                    )
-                    targets = [
-                        {'id': r[0], 'ticker': r[1], 'company_name': r[2], 'logo_url': r[3]}
-                        for r in res
-                    ]
-            except Exception as e:
-                logger.error(f"Error fetching world stocks with logo_url: {str(e)}")
-                targets = []
-
-        if not targets:
+        pages = self.iter_world_stock_pages(
+            ('company_name', 'logo_url'),
+            self._WHERE_URL_MISSING_SVG if only_missing else self._WHERE_HAS_URL
+        )
+        success, failed, total = await self._crawl_pages(
+            pages, self._process_logo_svg_from_url, self.bulk_update_stock_logos, batch_size
+        )
+        if not total:
             return {"success": 0, "failed": 0, "total": 0}
-
-        success = 0
-        failed = 0
-        for i in range(0, len(targets), batch_size):
-            batch = targets[i:i+batch_size]
-            tasks = [asyncio.create_task(self._process_logo_svg_from_url(stock)) for stock in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for r in results:
-                if isinstance(r, Exception) or r is False:
-                    failed += 1
-                else:
-                    success += 1
-            if i + batch_size < len(targets):
-                await asyncio.sleep(1.0)
         
         logger.info(f"Logo SVG population completed: {success} success, {failed} failed")
-        return {"success": success, "failed": failed, "total": len(targets)}
+        return {"success": success, "failed": failed, "total": total}
 
-    async def _process_logo_svg_from_url(self, stock: Dict) -> bool:
-        """Fetch and save logo_svg from a given stock's logo_url."""
+    async def _process_logo_svg_from_url(self, stock: Dict) -> Optional[Dict]:
+        """Fetch logo_svg from a given stock's logo_url; returns the row to store."""
         try:
             stock_id = stock.get('id')
             logo_url = (stock.get('logo_url') or '').strip()
             if not stock_id or not logo_url:
-                return False
+                return None
             svg = await self.fetch_svg_from_url(logo_url)
             if not svg:
-                return False
-            return self.update_stock_logo(stock_id, svg)
+                return None
+            return {"id": stock_id, "svg": svg, "url": None}
         except Exception as e:
             logger.error(f"Error processing SVG from URL for stock {stock}: {str(e)}")
-            return False
+            return None
 
-    # TradingView exchange name, ordered from most-likely to least-likely for US stocks
-    _TV_EXCHANGE_FALLBACK_ORDER = ['NASDAQ', 'NYSE', 'AMEX', 'ARCA']
-
-    # Map stored exchange codes → preferred TradingView exchange name (head of fallback list)
-    _EXCHANGE_TO_TV = {
-        'NASDAQ': 'NASDAQ',
-        'NMS': 'NASDAQ',
-        'NGM': 'NASDAQ',
-        'NCM': 'NASDAQ',
-        'NYSE': 'NYSE',
-        'NYQ': 'NYSE',
-        'AMEX': 'AMEX',
-        'ASE': 'AMEX',
-        'NYSE ARCA': 'ARCA',
-        'ARCA': 'ARCA',
-        'PCX': 'ARCA',
-        'BATS': 'BATS',
-        'BTS': 'BATS',
-        # 'US' and unknown → start with NASDAQ (most common US listing)
-    }
-
-    async def _process_tradingview_logo_url(self, stock: Dict) -> bool:
-        """Fetch and update logo_url for a single stock, trying all exchanges."""
+    async def _process_tradingview_logo_url(self, stock: Dict, with_svg: bool = False) -> Optional[Dict]:
+        """Find the logo_url (and optionally its SVG) for a single stock, trying all exchanges; returns the row to store."""
         try:
-            ticker = (stock.get('ticker') or '').strip()
+            # Normalised once here rather than per probed exchange
+            ticker = (stock.get('ticker') or '').strip().upper()
             exchange = (stock.get('exchange') or 'US').strip().upper()
 
             if not ticker:
                 logger.warning(f"Stock has no ticker, id={stock.get('id')}")
-                return False
+                return None
 
-            # Build ordered exchange list: preferred first, then all fallbacks
-            preferred = self._EXCHANGE_TO_TV.get(exchange, 'NASDAQ')
-            ordered = [preferred] + [e for e in self._TV_EXCHANGE_FALLBACK_ORDER if e != preferred]
+            # Ordered exchange list: preferred first, then all fallbacks; the
+            # exchange a previous crawl resolved goes ahead of all of them
+            ordered = _TV_EXCHANGE_ORDER[_EXCHANGE_TO_TV.get(exchange, 'NASDAQ')]
+            resolved = stock.get('tv_exchange')
+            if resolved:
+                ordered = (resolved,) + tuple(e for e in ordered if e != resolved)
 
             url = None
             for tv_exchange in ordered:
-                url = await self.fetch_tradingview_logo_url(ticker, tv_exchange)
+                url = await self._probe_tradingview(ticker, tv_exchange)
                 if url:
                     break
                 logger.info(f"No logo found for {ticker} on {tv_exchange}, trying next exchange")
 
             if not url:
-                return False
-            return self.update_stock_logo_url(stock['id'], url)
+                return None
+            svg = await self.fetch_svg_from_url(url) if with_svg else None
+            return {"id": stock['id'], "url": url, "tv_exchange": tv_exchange, "svg": svg}
         except Exception as e:
             logger.error(f"Error processing TradingView logo URL for {stock}: {str(e)}")
-            return False
+            return None
+
+    async def _probe_tradingview(self, tv_ticker: str, tv_exchange: str) -> Optional[str]:
+        """
+        fetch_tradingview_logo_url, memoised per (ticker, exchange) for this crawler.
+        tv_ticker must already be stripped and upper-cased.
+        """
+        key = (tv_ticker, tv_exchange)
+        if key not in self._tv_probe_cache:
+            self._tv_probe_cache[key] = await self._fetch_tradingview_page_logo(tv_ticker, tv_exchange)
+        return self._tv_probe_cache[key]
+
+    def _find_stock_by_ticker(self, ticker: str):
+        """(id, ticker, company_name) of the first stock matching ticker case-insensitively, or None"""
+        with SessionLocal() as session_db:
+            return session_db.execute(
+                text('SELECT id, ticker, company_name FROM "world_stocks" WHERE ticker ILIKE :ticker LIMIT 1'),
+                {"ticker": ticker}
+            ).fetchone()
 
     async def crawl_tradingview_logo_url_for_ticker(self, ticker: str, exchange: str = "NASDAQ") -> Optional[Dict[str, str]]:
         """
@@ -514,21 +663,16 @@ class WorldStockLogoCrawlerService:
 
         try:
             # Lookup stock by ticker
-            Session = sessionmaker(bind=engine)
-            with Session() as session_db:
-                res = session_db.execute(
-                    text('SELECT id, ticker, company_name FROM "world_stocks" WHERE ticker ILIKE :ticker LIMIT 1'),
-                    {"ticker": ticker}
-                ).fetchone()
-                if not res:
-                    logger.warning(f"Stock not found for ticker: {ticker}")
-                    return None
-                stock_id, tick, company_name = res
+            res = await asyncio.to_thread(self._find_stock_by_ticker, ticker)
+            if not res:
+                logger.warning(f"Stock not found for ticker: {ticker}")
+                return None
+            stock_id, tick, company_name = res
 
             url = await self.fetch_tradingview_logo_url(tick, exchange)
             if not url:
                 return None
-            updated = self.update_stock_logo_url(stock_id, url)
+            updated = await asyncio.to_thread(self.update_stock_logo_url, stock_id, url)
             if not updated:
                 return None
             return {"stock_id": stock_id, "ticker": tick, "logo_url": url}
@@ -549,70 +693,98 @@ class WorldStockLogoCrawlerService:
         if not self.session:
             raise RuntimeError("WorldStockLogoCrawlerService must be used as async context manager")
             
-        stocks = self.get_stocks_without_logos()
+        pages = self.iter_world_stock_pages(('company_name', 'exchange'), self._WHERE_MISSING_SVG)
+        success_count, failed_count, total = await self._crawl_pages(
+            pages, self._process_single_stock, self.bulk_update_stock_logos, batch_size
+        )
         
-        if not stocks:
+        if not total:
             logger.info("No world stocks need logo updates")
             return {"success": 0, "failed": 0, "total": 0}
         
-        logger.info(f"Found {len(stocks)} world stocks that need logos")
-        
-        success_count = 0
-        failed_count = 0
-        
-        # Process stocks in batches
-        for i in range(0, len(stocks), batch_size):
-            batch = stocks[i:i + batch_size]
-            batch_tasks = []
-            
-            for stock in batch:
-                task = asyncio.create_task(self._process_single_stock(stock))
-                batch_tasks.append(task)
-            
-            results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"Batch task failed: {result}")
-                    failed_count += 1
-                elif result:
-                    success_count += 1
-                else:
-                    failed_count += 1
-            
-            # Small delay between batches
-            if i + batch_size < len(stocks):
-                await asyncio.sleep(2)
-        
         logger.info(f"World stock logo crawling completed: {success_count} success, {failed_count} failed")
         
         return {
             "success": success_count,
             "failed": failed_count,
-            "total": len(stocks)
+            "total": total
         }
 
-    async def _process_single_stock(self, stock: Dict) -> bool:
-        """Process a single stock for logo fetching"""
+    # Rows buffered before a crawl flushes them to the database
+    WRITE_BATCH_SIZE = 50
+
+    async def _run_crawl(
+        self,
+        stocks: List[Dict],
+        process: Callable[[Dict], Awaitable[Optional[Dict]]],
+        flush: Callable[[List[Dict]], int],
+        concurrency: int,
+    ) -> Tuple[int, int]:
+        """
+        Run process() over every stock with at most `concurrency` requests in
+        flight, writing results through flush() every WRITE_BATCH_SIZE rows.
+        A new request starts as soon as one finishes, instead of waiting for
+        a whole batch plus a sleep; the shared connector caps per-host load.
+        Flushes run in a worker thread so in-flight requests keep going
+        while a batch is written.
+
+        Returns:
+            (success_count, failed_count)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(stock: Dict) -> Optional[Dict]:
+            async with semaphore:
+                return await process(stock)
+
+        success = 0
+        pending: List[Dict] = []
+        for next_done in asyncio.as_completed([run(stock) for stock in stocks]):
+            try:
+                row = await next_done
+            except Exception as e:
+                logger.error(f"Crawl task failed: {e}")
+                continue
+            if row:
+                pending.append(row)
+            if len(pending) >= self.WRITE_BATCH_SIZE:
+                success += await asyncio.to_thread(flush, pending)
+                pending = []
+        success += await asyncio.to_thread(flush, pending)
+        return success, len(stocks) - success
+
+    async def _crawl_pages(
+        self,
+        pages: Iterator[List[Dict]],
+        process: Callable[[Dict], Awaitable[Optional[Dict]]],
+        flush: Callable[[List[Dict]], int],
+        concurrency: int,
+    ) -> Tuple[int, int, int]:
+        """_run_crawl over each worklist page in turn. Returns (success, failed, total)"""
+        success = failed = total = 0
+        # Pages are read in a worker thread, off the event loop
+        while (stocks := await asyncio.to_thread(next, pages, None)) is not None:
+            total += len(stocks)
+            logger.info(f"Crawling {len(stocks)} world stocks ({total} so far)")
+            page_success, page_failed = await self._run_crawl(stocks, process, flush, concurrency)
+            success += page_success
+            failed += page_failed
+        return success, failed, total
+
+    async def _process_single_stock(self, stock: Dict) -> Optional[Dict]:
+        """Fetch the logo for a single stock; returns the row to store, None if not found"""
         try:
-            url = self.get_logo_url(stock['ticker'])
-            svg_content = await self.fetch_logo_svg(stock['ticker'])
+            url, svg_content = await self.fetch_logo_svg(stock['ticker'])
             
             if svg_content:
-                success = self.update_stock_logo(stock['id'], svg_content, url)
-                if success:
-                    logger.info(f"Successfully updated logo for {stock['ticker']} ({stock['company_name']})")
-                    return True
-                else:
-                    logger.error(f"Failed to update database for {stock['ticker']}")
-                    return False
+                return {"id": stock['id'], "svg": svg_content, "url": url}
             else:
                 logger.warning(f"No logo found for {stock['ticker']} ({stock['company_name']})")
-                return False
+                return None
                 
         except Exception as e:
             logger.error(f"Error processing {stock['ticker']}: {str(e)}")
-            return False
+            return None
 
 
     def sync_exchange_from_yfinance(self, batch_size: int = 50) -> Dict[str, int]:
@@ -634,8 +806,7 @@ class WorldStockLogoCrawlerService:
         }
 
         try:
-            Session = sessionmaker(bind=engine)
-            with Session() as session:
+            with SessionLocal() as session:
                 rows = session.execute(
                     text('SELECT id, ticker FROM "world_stocks" ORDER BY ticker')
                 ).fetchall()
@@ -664,8 +835,7 @@ class WorldStockLogoCrawlerService:
                             skipped += 1
                             continue
                         canonical = yf_to_exchange.get(yf_exchange.upper(), yf_exchange.upper())
-                        Session2 = sessionmaker(bind=engine)
-                        with Session2() as session2:
+                        with SessionLocal() as session2:
                             session2.execute(
                                 text('UPDATE "world_stocks" SET exchange = :ex WHERE id = :id'),
                                 {"ex": canonical, "id": stock_id}
@@ -6,14 +6,26 @@ Handles PDF processing and world stock analysis for US broker reports
 import os
 import sys
 import re
+import copy
+import functools
+import hashlib
 import json
+import logging
+import multiprocessing
+import threading
 import uuid
 import pdfplumber
+from dataclasses import dataclass
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Iterator, List, Dict, Tuple, Optional
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -21,6 +33,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 # Import broker parsers
 from app.brokers import get_broker_parser
 from app.brokers.base_broker import BaseBrokerParser
+from app.core.database import engine
 
 # Import SQLAlchemy models
 try:
@@ -36,6 +49,380 @@ try:
 except ImportError:
     MODELS_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+# Patterns for the US broker report text, compiled once at import
+_ACCOUNT_RE = re.compile(r'Account:\s*([A-Z0-9]+)')
+_ALIAS_RE = re.compile(r'Alias:\s*([A-Z0-9]+)')
+_BROKER_RE = re.compile(r'(Excellence.*?Ltd\.)', re.IGNORECASE)
+_REPORT_DATE_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})')
+_OPEN_POSITIONS_RE = re.compile(r'Open Positions.*?(?=\n\n|\Z)', re.DOTALL)
+# Ticker-like tokens in an Excellence security name: "AAPL" or "(AAPL)"
+_NAME_TICKERS_RE = re.compile(r'\b([A-Z]{2,5})\b|\(([A-Z]+)\)')
+# Open Positions text row: Symbol [Company ...] Qty Price Value P/L
+_HOLDING_ROW_RE = re.compile(r'^\s*(\S+)\s+(?:(.*?)\s+)?(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*$')
+# Fields extract_account_info reads from the report text; once all are found
+# the remaining pages need not be extracted
+_ACCOUNT_INFO_KEYS = ('account_number', 'account_alias', 'broker_name', 'report_start_date', 'report_end_date')
+
+
+# Prioritize DD/MM formats (European/Israeli) over MM/DD (US) formats
+_DATE_FORMATS = (
+    '%d/%m/%y', '%d/%m/%Y',  # DD/MM formats first (Israeli standard)
+    '%d-%m-%y', '%d-%m-%Y',
+    '%Y-%m-%d', '%Y/%m/%d',  # ISO formats
+    '%m/%d/%Y', '%m/%d/%y',  # US formats last
+    '%m-%d-%Y', '%m-%d-%y'
+)
+
+
+# The same dates and amounts recur across a report's trade, dividend and
+# withholding rows; both parsers are pure, and dates/Decimals are immutable,
+# so results are memoised
+@functools.lru_cache(maxsize=4096)
+def _parse_date_string(date_str: str) -> Optional[datetime]:
+    """Parse a date string into a date object.
+    
+    Israeli broker reports use DD/MM/YY format, so we prioritize European date formats.
+    """
+    if not date_str:
+        return None
+    
+    date_str = date_str.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    
+    return None
+
+
+# Strip thousands separators and '$', turn accounting "(123)" into "-123"
+_DECIMAL_TRANS = str.maketrans({',': None, '$': None, '(': '-', ')': None})
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_decimal(value_str: str) -> Optional[Decimal]:
+    """Parse a string to Decimal, handling various formats"""
+    if not value_str or value_str == '-' or value_str.isspace():
+        return None
+    
+    try:
+        # Remove commas and other formatting in one pass
+        return Decimal(value_str.translate(_DECIMAL_TRANS).strip())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+# Header → column key rules for the US broker tables. A header is lower-cased
+# once, then takes the key of the first rule whose substrings all occur in it
+_HOLDINGS_HEADER_RULES = (
+    ('symbol', ('symbol',)),
+    ('company', ('company',)),
+    ('company', ('name',)),
+    ('company', ('description',)),
+    ('quantity', ('quantity',)),
+    ('quantity', ('qty',)),
+    ('avg_price', ('avg', 'price')),
+    ('price', ('price',)),
+    ('value', ('value',)),
+    ('value', ('market',)),
+    ('pl', ('p/l',)),
+    ('pl', ('p&l',)),
+    ('pl', ('gain',)),
+    ('cost', ('cost',)),
+    ('cost', ('basis',)),
+)
+_TRADES_HEADER_RULES = (
+    ('symbol', ('symbol',)),
+    ('date_time', ('date', 'time')),      # "Date/Time"
+    ('quantity', ('quantity',)),
+    ('trade_price', ('t. price',)),
+    ('trade_price', ('t.price',)),
+    ('close_price', ('c. price',)),
+    ('close_price', ('c.price',)),
+    ('proceeds', ('proceeds',)),
+    ('commission', ('comm/fee',)),
+    ('commission', ('commission',)),
+    ('basis', ('basis',)),
+    ('realized_pl', ('realized',)),       # "Realized P/L"
+    ('mtm_pl', ('mtm',)),                 # "MTM P/L"
+    ('code', ('code',)),
+)
+
+
+def _map_columns(header_row: List, rules: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Dict[str, int]:
+    """Map column keys to indexes in header_row using the given header rules"""
+    col_map = {}
+    for idx, header in enumerate(header_row):
+        if not header:
+            continue
+        header_lower = str(header).lower().strip()
+        for key, needles in rules:
+            for needle in needles:
+                if needle not in header_lower:
+                    break
+            else:
+                col_map[key] = idx
+                break
+    return col_map
+
+
+# Broker report tables are ruled grids: find cells from the drawn lines only,
+# never from the slower text-alignment heuristics
+_TABLE_SETTINGS = {
+    'vertical_strategy': 'lines',
+    'horizontal_strategy': 'lines',
+    'snap_tolerance': 3,
+}
+
+
+# Rows per multi-row INSERT statement in save_to_pending_transactions
+_INSERT_PAGE_SIZE = 500
+
+
+# Dividend withholding defaults: when no Withholding Tax row matches, 25% US tax is assumed
+_DEC_ZERO = Decimal('0')
+_TAX_RATE_25 = Decimal('0.25')
+_NET_RATE_75 = Decimal('0.75')
+
+
+# First-column values of header/total rows in the Dividends / Withholding Tax tables
+_SKIP_DATE_CELLS = frozenset({'Date', 'USD', 'None', '', 'Total'})
+
+
+def _iter_dividend_rows(table: List[List]) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    (date_str, description, amount_str, symbol) for each data row of a
+    Dividends / Withholding Tax table (Date USD | Description | Amount [| Code])
+    """
+    for row in table[1:]:  # Skip header
+        if not row or len(row) < 3:
+            continue
+        date_cell, description_cell, amount_cell = row[0], row[1], row[2]
+        if not (date_cell and description_cell and amount_cell):
+            continue
+        
+        date_str = str(date_cell).strip()
+        if date_str in _SKIP_DATE_CELLS:
+            continue
+        description = str(description_cell).strip()
+        amount_str = str(amount_cell).strip()
+        if not description or not amount_str:
+            continue
+        
+        # Extract symbol from description (e.g., "LOW(US5486611073)" -> "LOW")
+        head, paren, _ = description.partition('(')
+        symbol = head.strip() if paren else None
+        if symbol:
+            yield date_str, description, amount_str, symbol
+
+
+class _ReportRecord:
+    """
+    Base for the slotted row records the US-format extractors produce. get()
+    keeps them usable wherever a row dict is expected (the save methods also
+    handle Excellence CSV rows, which stay dicts).
+    """
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+@dataclass(slots=True)
+class Holding(_ReportRecord):
+    """One Open Positions row from a US broker report"""
+    symbol: str
+    source_pdf: str
+    company_name: Optional[str] = None
+    quantity: Optional[Decimal] = None
+    current_price: Optional[Decimal] = None
+    avg_entry_price: Optional[Decimal] = None
+    current_value: Optional[Decimal] = None
+    purchase_cost: Optional[Decimal] = None
+    unrealized_pl: Optional[Decimal] = None
+    unrealized_pl_percent: Optional[Decimal] = None
+    currency: str = 'USD'
+
+
+@dataclass(slots=True)
+class Transaction(_ReportRecord):
+    """One Trades row from a US broker report"""
+    symbol: str
+    source_pdf: str
+    transaction_date: Optional[datetime] = None
+    transaction_time: Optional[str] = None
+    transaction_type: Optional[str] = None
+    quantity: Optional[Decimal] = None
+    trade_price: Optional[Decimal] = None
+    close_price: Optional[Decimal] = None
+    proceeds: Optional[Decimal] = None
+    commission: Optional[Decimal] = None
+    basis: Optional[Decimal] = None
+    realized_pl: Optional[Decimal] = None
+    mtm_pl: Optional[Decimal] = None
+    trade_code: Optional[str] = None
+    currency: str = 'USD'
+
+
+@dataclass(slots=True)
+class Dividend(_ReportRecord):
+    """One Dividends row (with its matched withholding tax) from a US broker report"""
+    symbol: str
+    source_pdf: str
+    payment_date: Optional[datetime] = None
+    amount: Optional[Decimal] = None
+    gross_amount: Optional[Decimal] = None
+    withholding_tax: Optional[Decimal] = None
+    net_amount: Optional[Decimal] = None
+    description: Optional[str] = None
+    dividend_type: str = 'Cash Dividend'
+    isin: Optional[str] = None
+    amount_per_share: Optional[Decimal] = None
+    currency: str = 'USD'
+
+
+class _PdfPageCache:
+    """
+    One pdfplumber page whose text and tables are each extracted at most once.
+    The holdings, transactions and dividends extractors all walk the same open
+    PDF through these, instead of each re-opening and re-parsing every page.
+    """
+    __slots__ = ('_page', '_text', '_tables')
+
+    def __init__(self, page):
+        self._page = page
+        self._text = None
+        self._tables = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._page.extract_text() or ""
+        return self._text
+
+    @property
+    def tables(self) -> List[List[List[str]]]:
+        if self._tables is None:
+            self._tables = self._page.extract_tables(_TABLE_SETTINGS)
+        return self._tables
+
+
+# Page text that makes one of the US-format extractors read a page's tables
+# (the union of their page filters); only such pages get tables prefetched
+_TABLE_PAGE_KEYWORDS = (
+    'Open Positions', 'Mark-to-Market',                           # holdings
+    'Trades', 'Symbol', 'Quantity', 'Date/Time', 'T. Price',      # transactions
+    'Withholding Tax', 'Dividend',                                # dividends
+)
+# Below this many pages, handing pages to the workers costs more than parsing in-process
+_PARALLEL_PDF_MIN_PAGES = 4
+
+# One worker pool for every upload, created on first use. Workers are spawned,
+# not forked: forking the multi-threaded web process can copy a held lock into
+# the child. Bounded so concurrent uploads share the workers instead of each
+# starting a pool the size of the machine.
+_PDF_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+_pdf_page_pool: Optional[ProcessPoolExecutor] = None
+_pdf_page_pool_lock = threading.Lock()
+
+
+def _get_pdf_page_pool() -> ProcessPoolExecutor:
+    """The shared page-extraction pool, started on first use"""
+    global _pdf_page_pool
+    with _pdf_page_pool_lock:
+        if _pdf_page_pool is None:
+            _pdf_page_pool = ProcessPoolExecutor(
+                max_workers=_PDF_POOL_MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pdf_page_pool
+
+
+def _discard_pdf_page_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next upload starts a fresh one"""
+    global _pdf_page_pool
+    with _pdf_page_pool_lock:
+        if _pdf_page_pool is pool:
+            _pdf_page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pdf_page(args: Tuple[str, int]) -> Tuple[str, Optional[List[List[List[str]]]]]:
+    """Worker: (text, tables) of one page; tables only if an extractor will want them"""
+    pdf_path, page_index = args
+    with pdfplumber.open(pdf_path) as pdf:
+        page = pdf.pages[page_index]
+        text = page.extract_text() or ""
+        tables = page.extract_tables(_TABLE_SETTINGS) if any(k in text for k in _TABLE_PAGE_KEYWORDS) else None
+        return text, tables
+
+
+def _prefetch_pdf_pages(pdf_path: str, pages: List[_PdfPageCache]) -> None:
+    """
+    Fill the page caches in parallel: pdfminer parsing is CPU-bound, so pages
+    are spread across the shared worker processes. Anything not prefetched
+    (small PDFs, a single CPU, a failed pool) is still extracted lazily in-process.
+    """
+    if len(pages) < _PARALLEL_PDF_MIN_PAGES or _PDF_POOL_MAX_WORKERS < 2:
+        return
+    pool = _get_pdf_page_pool()
+    try:
+        results = pool.map(_extract_pdf_page, [(pdf_path, i) for i in range(len(pages))])
+        for page, (text, tables) in zip(pages, results):
+            page._text = text
+            page._tables = tables
+    except BrokenProcessPool as e:
+        logger.warning("PDF worker pool broke, continuing sequentially: %s", e)
+        _discard_pdf_page_pool(pool)
+    except Exception as e:
+        logger.warning("Parallel PDF page extraction failed, continuing sequentially: %s", e)
+
+
+# Extracted (holdings, transactions, dividends) of recently processed US-format
+# reports, most recent last, so re-processing the same file skips pdfminer.
+# Uploads are processed on executor threads, so every access holds the lock.
+# Records are mutable, so the cache keeps its own deep copy and hands out a
+# fresh one on every hit; a caller editing its records can't alter the cache.
+_US_REPORT_CACHE: 'OrderedDict[Tuple[str, int, str], Tuple[tuple, tuple, tuple]]' = OrderedDict()
+_US_REPORT_CACHE_SIZE = 16
+_US_REPORT_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_report(key: Tuple[str, int, str]) -> Optional[Tuple[list, list, list]]:
+    """Copies of the cached (holdings, transactions, dividends) for key, marked most recent"""
+    with _US_REPORT_CACHE_LOCK:
+        cached = _US_REPORT_CACHE.get(key)
+        if cached is None:
+            return None
+        _US_REPORT_CACHE.move_to_end(key)
+    return tuple(copy.deepcopy(list(records)) for records in cached)
+
+
+def _cache_report(key: Tuple[str, int, str], holdings: List, transactions: List, dividends: List) -> None:
+    """Store a copy of an extracted report, evicting the least recently used past the size cap"""
+    report = (tuple(copy.deepcopy(holdings)), tuple(copy.deepcopy(transactions)), tuple(copy.deepcopy(dividends)))
+    with _US_REPORT_CACHE_LOCK:
+        _US_REPORT_CACHE[key] = report
+        _US_REPORT_CACHE.move_to_end(key)
+        if len(_US_REPORT_CACHE) > _US_REPORT_CACHE_SIZE:
+            _US_REPORT_CACHE.popitem(last=False)
+
+
+def _pdf_cache_key(pdf_path: str) -> Tuple[str, int, str]:
+    """
+    (file name, size, sha256) of a PDF. Uploads land in a fresh temp file each
+    time, so path and mtime can't identify a repeat; the name is part of the key
+    because it is stamped on every record as source_pdf.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(functools.partial(f.read, 1 << 20), b''):
+            digest.update(chunk)
+    return os.path.basename(pdf_path), os.path.getsize(pdf_path), digest.hexdigest()
+
 
 class WorldStockService:
     """Service for processing world stock data from PDF reports"""
@@ -67,18 +454,31 @@ class WorldStockService:
                 return psycopg2.connect(dsn)
             raise e
     
+    @contextmanager
+    def pooled_connection(self):
+        """
+        Borrow a raw psycopg2 connection from the app engine's pool, so saves
+        get its pre-ping, recycling and overflow instead of connecting each
+        time. Closing it hands it back; anything left uncommitted is rolled
+        back on return.
+        """
+        conn = engine.raw_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
     def load_world_stocks(self) -> Dict[str, Dict]:
         """Load world stocks reference data from database"""
         try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM "world_stocks"')
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self.pooled_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('SELECT * FROM "world_stocks"')
+                columns = [desc[0] for desc in cursor.description]
+                rows = cursor.fetchall()
+                
+                cursor.close()
             
             # Create a dictionary keyed by ticker (uppercase for matching)
             world_stocks = {}
@@ -87,52 +487,68 @@ class WorldStockService:
                 ticker = row_dict['ticker']
                 world_stocks[ticker.upper()] = row_dict
             
-            print(f"Loaded {len(world_stocks)} world stocks from database")
+            logger.debug("Loaded %d world stocks from database", len(world_stocks))
             return world_stocks
             
         except Exception as e:
-            print(f"Error loading world stocks: {e}")
+            logger.error("Error loading world stocks: %s", e)
             return {}
     
-    def extract_text_from_pdf(self, pdf_path: str, max_pages: int = 3) -> str:
-        """Extract text from first few pages of PDF for account info"""
+    def iter_pdf_page_texts(self, pdf_path: str, max_pages: int = 3) -> Iterator[str]:
+        """Yield the text of the first few pages of a PDF, one page at a time"""
         try:
             with pdfplumber.open(pdf_path) as pdf:
-                text = ""
-                for i, page in enumerate(pdf.pages):
-                    if i >= max_pages:
-                        break
-                    text += page.extract_text() or ""
-                    text += "\n\n"
-                return text
+                for page in pdf.pages[:max_pages]:
+                    yield page.extract_text() or ""
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {e}")
     
+    def extract_text_from_pdf(self, pdf_path: str, max_pages: int = 3) -> str:
+        """Extract text from first few pages of PDF for account info"""
+        return "".join(text + "\n\n" for text in self.iter_pdf_page_texts(pdf_path, max_pages))
+    
+    def extract_account_info_from_pdf(self, pdf_path: str, max_pages: int = 3) -> Dict:
+        """
+        Extract account information from the first few pages of a PDF, stopping
+        at the first page by which every account field has been found (usually
+        page 1) instead of extracting all max_pages up front
+        """
+        text = ""
+        account_info = {}
+        for page_text in self.iter_pdf_page_texts(pdf_path, max_pages):
+            text += page_text + "\n\n"
+            account_info = self.extract_account_info(text)
+            if all(key in account_info for key in _ACCOUNT_INFO_KEYS):
+                break
+        return account_info or self.extract_account_info(text)
+    
     def extract_account_info(self, text: str) -> Dict:
         """Extract account information from PDF text"""
         account_info = {}
         
         # Extract account number (e.g., "Account: U12858314")
-        account_match = re.search(r'Account:\s*([A-Z0-9]+)', text)
+        account_match = _ACCOUNT_RE.search(text)
         if account_match:
             account_info['account_number'] = account_match.group(1)
         
         # Extract alias (e.g., "Alias: XNES627410")
-        alias_match = re.search(r'Alias:\s*([A-Z0-9]+)', text)
+        alias_match = _ALIAS_RE.search(text)
         if alias_match:
             account_info['account_alias'] = alias_match.group(1)
         
         # Extract broker name
-        broker_match = re.search(r'(Excellence.*?Ltd\.)', text, re.IGNORECASE)
+        broker_match = _BROKER_RE.search(text)
         if broker_match:
             account_info['broker_name'] = broker_match.group(1)
         
         # Extract report date range
-        date_pattern = r'(\d{1,2}/\d{1,2}/\d{4})'
-        dates = re.findall(date_pattern, text[:2000])  # Look in first part of document
-        if len(dates) >= 2:
-            account_info['report_start_date'] = self.parse_date_string(dates[0])
-            account_info['report_end_date'] = self.parse_date_string(dates[1])
+        # Look in first part of document; only the first two matches are used
+        dates = _REPORT_DATE_RE.finditer(text, 0, 2000)
+        start_match = next(dates, None)
+        end_match = next(dates, None)
+        if end_match:
+            account_info['report_start_date'] = _parse_date_string(start_match.group(1))
+            account_info['report_end_date'] = _parse_date_string(end_match.group(1))
         
         account_info['base_currency'] = 'USD'
         account_info['account_type'] = 'Individual'
@@ -140,49 +556,19 @@ class WorldStockService:
         return account_info
     
     def parse_date_string(self, date_str: str) -> Optional[datetime]:
-        """Parse a date string into a date object.
-        
-        Israeli broker reports use DD/MM/YY format, so we prioritize European date formats.
-        """
-        if not date_str:
-            return None
-        
-        date_str = date_str.strip()
-        # Prioritize DD/MM formats (European/Israeli) over MM/DD (US) formats
-        date_formats = [
-            '%d/%m/%y', '%d/%m/%Y',  # DD/MM formats first (Israeli standard)
-            '%d-%m-%y', '%d-%m-%Y',
-            '%Y-%m-%d', '%Y/%m/%d',  # ISO formats
-            '%m/%d/%Y', '%m/%d/%y',  # US formats last
-            '%m-%d-%Y', '%m-%d-%y'
-        ]
-        
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-        
-        return None
+        """Parse a date string into a date object (see _parse_date_string)"""
+        return _parse_date_string(date_str)
     
     def parse_decimal(self, value_str: str) -> Optional[Decimal]:
-        """Parse a string to Decimal, handling various formats"""
-        if not value_str or value_str == '-' or value_str.strip() == '':
-            return None
-        
-        try:
-            # Remove commas and other formatting
-            cleaned = value_str.replace(',', '').replace('$', '').replace('(', '-').replace(')', '').strip()
-            return Decimal(cleaned)
-        except (InvalidOperation, ValueError):
-            return None
+        """Parse a string to Decimal, handling various formats (see _parse_decimal)"""
+        return _parse_decimal(value_str)
     
-    def extract_holdings_from_text(self, text: str, pdf_name: str) -> List[Dict]:
+    def extract_holdings_from_text(self, text: str, pdf_name: str) -> List[Holding]:
         """Extract holdings/positions from PDF text"""
         holdings = []
         
         # Look for "Open Positions" section
-        open_pos_match = re.search(r'Open Positions.*?(?=\n\n|\Z)', text, re.DOTALL)
+        open_pos_match = _OPEN_POSITIONS_RE.search(text)
         if not open_pos_match:
             return holdings
         
@@ -201,534 +587,424 @@ class WorldStockService:
             
             # Match line with stock data: Symbol Company Qty Price Value
             # Example: "AAPL Apple Inc. 100 150.00 15,000.00"
-            parts = line.split()
-            if len(parts) >= 5:
+            row_match = _HOLDING_ROW_RE.match(line)
+            if row_match:
+                symbol, company, qty, price, value, pl = row_match.groups()
                 try:
-                    holding = {
-                        'symbol': parts[0],
-                        'company_name': ' '.join(parts[1:-4]),  # Company name
-                        'quantity': self.parse_decimal(parts[-4]),
-                        'current_price': self.parse_decimal(parts[-3]),
-                        'current_value': self.parse_decimal(parts[-2]),
-                        'unrealized_pl': self.parse_decimal(parts[-1]),
-                        'source_pdf': pdf_name
-                    }
+                    holding = Holding(
+                        symbol=symbol,
+                        source_pdf=pdf_name,
+                        company_name=company or '',
+                        quantity=_parse_decimal(qty),
+                        current_price=_parse_decimal(price),
+                        current_value=_parse_decimal(value),
+                        unrealized_pl=_parse_decimal(pl),
+                    )
                     
-                    if holding['symbol'] and holding['quantity']:
+                    if holding.symbol and holding.quantity:
                         holdings.append(holding)
                 except Exception as e:
                     continue
         
         return holdings
     
-    def extract_holdings_from_tables(self, pdf_path: str, pdf_name: str) -> List[Dict]:
+    def extract_holdings_from_tables(self, pages: List['_PdfPageCache'], pdf_name: str) -> List[Holding]:
         """Extract holdings from PDF tables"""
         holdings = []
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
+            for page_num, page in enumerate(pages):
+                text = page.text
+                
+                # Look for "Open Positions" or "Mark-to-Market" section
+                if 'Open Positions' not in text and 'Mark-to-Market' not in text:
+                    continue
+                
+                tables = page.tables
+                for table in tables:
+                    if not table or len(table) < 2:
+                        continue
+                    
+                    # Find header row
+                    header_row = None
+                    data_start_idx = 0
+                    for idx, row in enumerate(table):
+                        row_str = ' '.join([str(cell) for cell in row if cell])
+                        if 'Symbol' in row_str or 'Quantity' in row_str:
+                            header_row = row
+                            data_start_idx = idx + 1
+                            break
                     
-                    # Look for "Open Positions" or "Mark-to-Market" section
-                    if 'Open Positions' not in text and 'Mark-to-Market' not in text:
+                    if header_row is None:
                         continue
                     
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if not table or len(table) < 2:
+                    # Map columns
+                    col_map = _map_columns(header_row, _HOLDINGS_HEADER_RULES)
+                    
+                    # Data rows are keyed by symbol
+                    if 'symbol' not in col_map:
+                        continue
+                    
+                    # Column indices once per table (-1 = column not present)
+                    symbol_i = col_map['symbol']
+                    company_i = col_map.get('company', -1)
+                    quantity_i = col_map.get('quantity', -1)
+                    price_i = col_map.get('price', -1)
+                    avg_price_i = col_map.get('avg_price', -1)
+                    value_i = col_map.get('value', -1)
+                    cost_i = col_map.get('cost', -1)
+                    pl_i = col_map.get('pl', -1)
+                    
+                    # Extract data rows
+                    for row in table[data_start_idx:]:
+                        if not row or len(row) == 0:
                             continue
                         
-                        # Find header row
-                        header_row = None
-                        data_start_idx = 0
-                        for idx, row in enumerate(table):
-                            row_str = ' '.join([str(cell) for cell in row if cell])
-                            if 'Symbol' in row_str or 'Quantity' in row_str:
-                                header_row = row
-                                data_start_idx = idx + 1
-                                break
-                        
-                        if header_row is None:
+                        # Cell strings once per row (None → '')
+                        cells = ['' if cell is None else str(cell) for cell in row]
+                        symbol_str = cells[symbol_i].strip()
+                        if not symbol_str:
                             continue
                         
-                        # Map columns
-                        col_map = {}
-                        for idx, header in enumerate(header_row):
-                            if header:
-                                header_lower = str(header).lower().strip()
-                                if 'symbol' in header_lower:
-                                    col_map['symbol'] = idx
-                                elif 'company' in header_lower or 'name' in header_lower or 'description' in header_lower:
-                                    col_map['company'] = idx
-                                elif 'quantity' in header_lower or 'qty' in header_lower:
-                                    col_map['quantity'] = idx
-                                elif 'price' in header_lower and 'avg' not in header_lower:
-                                    col_map['price'] = idx
-                                elif 'avg' in header_lower and 'price' in header_lower:
-                                    col_map['avg_price'] = idx
-                                elif 'value' in header_lower or 'market' in header_lower:
-                                    col_map['value'] = idx
-                                elif 'p/l' in header_lower or 'p&l' in header_lower or 'gain' in header_lower:
-                                    col_map['pl'] = idx
-                                elif 'cost' in header_lower or 'basis' in header_lower:
-                                    col_map['cost'] = idx
+                        holding = Holding(
+                            symbol=symbol_str,
+                            source_pdf=pdf_name,
+                            company_name=row[company_i] if company_i >= 0 else None,
+                            quantity=_parse_decimal(cells[quantity_i]) if quantity_i >= 0 else None,
+                            current_price=_parse_decimal(cells[price_i]) if price_i >= 0 else None,
+                            avg_entry_price=_parse_decimal(cells[avg_price_i]) if avg_price_i >= 0 else None,
+                            current_value=_parse_decimal(cells[value_i]) if value_i >= 0 else None,
+                            purchase_cost=_parse_decimal(cells[cost_i]) if cost_i >= 0 else None,
+                            unrealized_pl=_parse_decimal(cells[pl_i]) if pl_i >= 0 else None,
+                        )
                         
-                        # Extract data rows
-                        for row in table[data_start_idx:]:
-                            if not row or len(row) == 0:
-                                continue
-                            
-                            # Check if it's a data row (has symbol)
-                            if 'symbol' not in col_map:
-                                continue
-                            
-                            symbol = row[col_map['symbol']]
-                            if not symbol or len(str(symbol).strip()) == 0:
-                                continue
-                            
-                            holding = {
-                                'symbol': str(symbol).strip(),
-                                'company_name': row[col_map.get('company')] if 'company' in col_map else None,
-                                'quantity': self.parse_decimal(str(row[col_map['quantity']])) if 'quantity' in col_map else None,
-                                'current_price': self.parse_decimal(str(row[col_map.get('price')])) if 'price' in col_map else None,
-                                'avg_entry_price': self.parse_decimal(str(row[col_map.get('avg_price')])) if 'avg_price' in col_map else None,
-                                'current_value': self.parse_decimal(str(row[col_map.get('value')])) if 'value' in col_map else None,
-                                'purchase_cost': self.parse_decimal(str(row[col_map.get('cost')])) if 'cost' in col_map else None,
-                                'unrealized_pl': self.parse_decimal(str(row[col_map.get('pl')])) if 'pl' in col_map else None,
-                                'source_pdf': pdf_name
-                            }
-                            
-                            # Calculate missing values
-                            if holding['unrealized_pl'] and holding['current_value'] and holding['purchase_cost'] is None:
-                                holding['purchase_cost'] = holding['current_value'] - holding['unrealized_pl']
-                            
-                            if holding['unrealized_pl'] and holding['purchase_cost'] and holding['purchase_cost'] != 0:
-                                holding['unrealized_pl_percent'] = (holding['unrealized_pl'] / holding['purchase_cost']) * 100
-                            
-                            holdings.append(holding)
-        
+                        # Calculate missing values
+                        if holding.unrealized_pl and holding.current_value and holding.purchase_cost is None:
+                            holding.purchase_cost = holding.current_value - holding.unrealized_pl
+                        
+                        if holding.unrealized_pl and holding.purchase_cost and holding.purchase_cost != 0:
+                            holding.unrealized_pl_percent = (holding.unrealized_pl / holding.purchase_cost) * 100
+                        
+                        holdings.append(holding)
+
         except Exception as e:
-            print(f"Error extracting holdings from tables: {e}")
+            logger.error("Error extracting holdings from tables: %s", e)
         
         return holdings
     
-    def extract_transactions_from_tables(self, pdf_path: str, pdf_name: str) -> List[Dict]:
+    def extract_transactions_from_tables(self, pages: List['_PdfPageCache'], pdf_name: str) -> List[Transaction]:
         """Extract transactions from PDF tables - handles multi-page 'Trades' table"""
         transactions = []
         
-        print("\n" + "="*80)
-        print("STARTING TRANSACTION EXTRACTION FROM TRADES TABLE")
-        print("="*80)
-        
         # Store the column mapping from the first page to reuse on continuation pages
         saved_col_map = None
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                print(f"Total pages in PDF: {len(pdf.pages)}")
+            logger.debug("Total pages in PDF: %s", len(pages))
+            
+            for page_num, page in enumerate(pages, 1):
+                text = page.text
+                
+                # Look for "Trades" section - check if page has trade-related content
+                # On continuation pages, "Trades" header might not appear, so also check for stock symbols
+                has_trades_keyword = 'Trades' in text
+                has_stock_data = any(keyword in text for keyword in ['Symbol', 'Quantity', 'Date/Time', 'T. Price'])
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text() or ""
+                if not (has_trades_keyword or has_stock_data):
+                    logger.debug("Page %s: no trades content found, skipping", page_num)
+                    continue
+                
+                logger.debug("Page %s: processing for trades (has_trades=%s, has_stock_data=%s)", page_num, has_trades_keyword, has_stock_data)
+                
+                tables = page.tables
+                logger.debug("Found %s tables on this page", len(tables))
+                
+                for table_idx, table in enumerate(tables):
+                    if not table or len(table) < 2:
+                        logger.debug("Table %s: Skipped (too small: %s rows)", table_idx + 1, len(table) if table else 0)
+                        continue
+                    
+                    # Check if this is the Trades table
+                    first_row_text = ' '.join([str(cell) for cell in table[0] if cell]).strip()
                     
-                    # Look for "Trades" section - check if page has trade-related content
-                    # On continuation pages, "Trades" header might not appear, so also check for stock symbols
-                    has_trades_keyword = 'Trades' in text
-                    has_stock_data = any(keyword in text for keyword in ['Symbol', 'Quantity', 'Date/Time', 'T. Price'])
+                    # More flexible detection: look for Symbol column in first few rows
+                    has_trades_header = 'Trades' in first_row_text
+                    has_symbol_column = any('Symbol' in str(cell) for row in table[:5] for cell in row if cell)
                     
-                    if not (has_trades_keyword or has_stock_data):
-                        print(f"\n--- Page {page_num}: No trades content found, skipping ---")
+                    # Also check if we have stock ticker patterns (like "ADBE", "AFRM", etc.)
+                    has_ticker_data = any(
+                        str(cell).strip().isupper() and len(str(cell).strip()) <= 5 and str(cell).strip().isalpha()
+                        for row in table[1:6] for cell in row if cell
+                    )
+                    
+                    if not (has_trades_header or has_symbol_column or has_ticker_data):
+                        logger.debug("Table %s: Not a trades table (first row: %s)", table_idx + 1, first_row_text[:80])
+                        continue
+                    
+                    logger.debug("Table %s: Processing Trades table", table_idx + 1)
+                    logger.debug("First row: %s", first_row_text[:100])
+                    logger.debug("Has header: %s, Has Symbol col: %s, Has ticker data: %s", has_trades_header, has_symbol_column, has_ticker_data)
+                    
+                    # Find header row with column names
+                    header_row = None
+                    data_start_idx = 0
+                    
+                    for idx, row in enumerate(table):
+                        row_str = ' '.join([str(cell) for cell in row if cell]).strip()
+                        # Look for the actual column header row (Symbol, Date/Time, Quantity, etc.)
+                        if 'Symbol' in row_str and ('Date' in row_str or 'Quantity' in row_str):
+                            header_row = row
+                            data_start_idx = idx + 1
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("Found header at row %s: %s", idx, [str(cell)[:20] for cell in row if cell])
+                            break
+                    
+                    # If no header found but we have a saved column map from previous page, use it
+                    if header_row is None and saved_col_map is not None:
+                        logger.debug("No header found, using saved column mapping from previous page")
+                        col_map = saved_col_map
+                        data_start_idx = 0  # Start from first row since there's no header
+                    elif header_row is None:
+                        logger.warning("No valid header row found and no saved mapping")
                         continue
+                    else:
+                        # Map columns based on header
+                        col_map = _map_columns(header_row, _TRADES_HEADER_RULES)
+                        
+                        # Save this mapping for continuation pages
+                        saved_col_map = col_map
+                    
+                    logger.debug("Column mapping: %s", col_map)
                     
-                    print(f"\n--- Page {page_num}: Processing for trades (has_trades={has_trades_keyword}, has_stock_data={has_stock_data}) ---")
+                    # Data rows are keyed by symbol
+                    if 'symbol' not in col_map:
+                        continue
                     
-                    tables = page.extract_tables()
-                    print(f"  Found {len(tables)} tables on this page")
+                    # Column indices once per table (-1 = column not present)
+                    symbol_i = col_map['symbol']
+                    date_time_i = col_map.get('date_time', -1)
+                    quantity_i = col_map.get('quantity', -1)
+                    trade_price_i = col_map.get('trade_price', -1)
+                    close_price_i = col_map.get('close_price', -1)
+                    proceeds_i = col_map.get('proceeds', -1)
+                    commission_i = col_map.get('commission', -1)
+                    basis_i = col_map.get('basis', -1)
+                    realized_pl_i = col_map.get('realized_pl', -1)
+                    mtm_pl_i = col_map.get('mtm_pl', -1)
+                    code_i = col_map.get('code', -1)
                     
-                    for table_idx, table in enumerate(tables):
-                        if not table or len(table) < 2:
-                            print(f"    Table {table_idx + 1}: Skipped (too small: {len(table) if table else 0} rows)")
+                    # Extract data rows
+                    rows_extracted = 0
+                    for row_idx, row in enumerate(table[data_start_idx:], data_start_idx):
+                        if not row or len(row) == 0:
                             continue
                         
-                        # Check if this is the Trades table
-                        first_row_text = ' '.join([str(cell) for cell in table[0] if cell]).strip()
+                        # Cell strings once per row (None → '')
+                        cells = ['' if cell is None else str(cell) for cell in row]
+                        symbol_str = cells[symbol_i].strip()
                         
-                        # More flexible detection: look for Symbol column in first few rows
-                        has_trades_header = 'Trades' in first_row_text
-                        has_symbol_column = any('Symbol' in str(cell) for row in table[:5] for cell in row if cell)
+                        # Skip summary rows (like "Total ADBE", "Total AFRM", etc.)
+                        if 'total' in symbol_str.lower() or symbol_str.lower() == 'stocks' or symbol_str.lower() == 'usd':
+                            continue
                         
-                        # Also check if we have stock ticker patterns (like "ADBE", "AFRM", etc.)
-                        has_ticker_data = any(
-                            str(cell).strip().isupper() and len(str(cell).strip()) <= 5 and str(cell).strip().isalpha()
-                            for row in table[1:6] for cell in row if cell
-                        )
+                        # Skip empty symbols
+                        if not symbol_str or len(symbol_str) == 0:
+                            continue
+                        
+                        # Get date/time
+                        date_time_str = None
+                        if date_time_i >= 0 and cells[date_time_i]:
+                            date_time_str = cells[date_time_i].strip()
                         
-                        if not (has_trades_header or has_symbol_column or has_ticker_data):
-                            print(f"    Table {table_idx + 1}: Not a trades table (first row: {first_row_text[:80]})")
+                        # Skip rows without date/time
+                        if not date_time_str:
                             continue
                         
-                        print(f"  Table {table_idx + 1}: Processing Trades table")
-                        print(f"    First row: {first_row_text[:100]}")
-                        print(f"    Has header: {has_trades_header}, Has Symbol col: {has_symbol_column}, Has ticker data: {has_ticker_data}")
+                        # Parse date and time from combined field (format: "2025-07-22, 12:23:39")
+                        transaction_date = None
+                        transaction_time = None
+                        if date_time_str:
+                            parts = date_time_str.split(',')
+                            if len(parts) >= 1:
+                                transaction_date = _parse_date_string(parts[0].strip())
+                            if len(parts) >= 2:
+                                transaction_time = parts[1].strip()
                         
-                        # Find header row with column names
-                        header_row = None
-                        data_start_idx = 0
+                        # Parse numeric fields
+                        quantity = None
+                        if quantity_i >= 0 and cells[quantity_i]:
+                            quantity = _parse_decimal(cells[quantity_i])
                         
-                        for idx, row in enumerate(table):
-                            row_str = ' '.join([str(cell) for cell in row if cell]).strip()
-                            # Look for the actual column header row (Symbol, Date/Time, Quantity, etc.)
-                            if 'Symbol' in row_str and ('Date' in row_str or 'Quantity' in row_str):
-                                header_row = row
-                                data_start_idx = idx + 1
-                                print(f"    Found header at row {idx}: {[str(cell)[:20] for cell in row if cell]}")
-                                break
+                        trade_price = None
+                        if trade_price_i >= 0 and cells[trade_price_i]:
+                            trade_price = _parse_decimal(cells[trade_price_i])
                         
-                        # If no header found but we have a saved column map from previous page, use it
-                        if header_row is None and saved_col_map is not None:
-                            print(f"    No header found, using saved column mapping from previous page")
-                            col_map = saved_col_map
-                            data_start_idx = 0  # Start from first row since there's no header
-                        elif header_row is None:
-                            print(f"    WARNING: No valid header row found and no saved mapping")
-                            continue
-                        else:
-                            # Map columns based on header
-                            col_map = {}
-                            for idx, header in enumerate(header_row):
-                                if not header:
-                                    continue
-                                header_lower = str(header).lower().strip()
-                                
-                                if 'symbol' in header_lower:
-                                    col_map['symbol'] = idx
-                                elif 'date/time' in header_lower or (('date' in header_lower) and ('time' in header_lower)):
-                                    col_map['date_time'] = idx
-                                elif 'quantity' in header_lower:
-                                    col_map['quantity'] = idx
-                                elif 't. price' in header_lower or 't.price' in header_lower:
-                                    col_map['trade_price'] = idx
-                                elif 'c. price' in header_lower or 'c.price' in header_lower:
-                                    col_map['close_price'] = idx
-                                elif 'proceeds' in header_lower:
-                                    col_map['proceeds'] = idx
-                                elif 'comm/fee' in header_lower or 'commission' in header_lower:
-                                    col_map['commission'] = idx
-                                elif 'basis' in header_lower:
-                                    col_map['basis'] = idx
-                                elif 'realized p/l' in header_lower or 'realized' in header_lower:
-                                    col_map['realized_pl'] = idx
-                                elif 'mtm p/l' in header_lower or 'mtm' in header_lower:
-                                    col_map['mtm_pl'] = idx
-                                elif 'code' in header_lower:
-                                    col_map['code'] = idx
-                            
-                            # Save this mapping for continuation pages
-                            saved_col_map = col_map
+                        close_price = None
+                        if close_price_i >= 0 and cells[close_price_i]:
+                            close_price = _parse_decimal(cells[close_price_i])
                         
-                        print(f"    Column mapping: {col_map}")
+                        proceeds = None
+                        if proceeds_i >= 0 and cells[proceeds_i]:
+                            proceeds = _parse_decimal(cells[proceeds_i])
                         
-                        # Extract data rows
-                        rows_extracted = 0
-                        for row_idx, row in enumerate(table[data_start_idx:], data_start_idx):
-                            if not row or len(row) == 0:
-                                continue
-                            
-                            # Get symbol
-                            if 'symbol' not in col_map:
-                                continue
-                            
-                            symbol = row[col_map['symbol']]
-                            if not symbol:
-                                continue
-                            
-                            symbol_str = str(symbol).strip()
-                            
-                            # Skip summary rows (like "Total ADBE", "Total AFRM", etc.)
-                            if 'total' in symbol_str.lower() or symbol_str.lower() == 'stocks' or symbol_str.lower() == 'usd':
-                                continue
-                            
-                            # Skip empty symbols
-                            if not symbol_str or len(symbol_str) == 0:
-                                continue
-                            
-                            # Get date/time
-                            date_time_str = None
-                            if 'date_time' in col_map and row[col_map['date_time']]:
-                                date_time_str = str(row[col_map['date_time']]).strip()
-                            
-                            # Skip rows without date/time
-                            if not date_time_str:
-                                continue
-                            
-                            # Parse date and time from combined field (format: "2025-07-22, 12:23:39")
-                            transaction_date = None
-                            transaction_time = None
-                            if date_time_str:
-                                parts = date_time_str.split(',')
-                                if len(parts) >= 1:
-                                    transaction_date = self.parse_date_string(parts[0].strip())
-                                if len(parts) >= 2:
-                                    transaction_time = parts[1].strip()
-                            
-                            # Parse numeric fields
-                            quantity = None
-                            if 'quantity' in col_map and row[col_map['quantity']]:
-                                quantity = self.parse_decimal(str(row[col_map['quantity']]))
-                            
-                            trade_price = None
-                            if 'trade_price' in col_map and row[col_map['trade_price']]:
-                                trade_price = self.parse_decimal(str(row[col_map['trade_price']]))
-                            
-                            close_price = None
-                            if 'close_price' in col_map and row[col_map['close_price']]:
-                                close_price = self.parse_decimal(str(row[col_map['close_price']]))
-                            
-                            proceeds = None
-                            if 'proceeds' in col_map and row[col_map['proceeds']]:
-                                proceeds = self.parse_decimal(str(row[col_map['proceeds']]))
-                            
-                            commission = None
-                            if 'commission' in col_map and row[col_map['commission']]:
-                                commission = self.parse_decimal(str(row[col_map['commission']]))
-                            
-                            basis = None
-                            if 'basis' in col_map and row[col_map['basis']]:
-                                basis = self.parse_decimal(str(row[col_map['basis']]))
-                            
-                            realized_pl = None
-                            if 'realized_pl' in col_map and row[col_map['realized_pl']]:
-                                realized_pl = self.parse_decimal(str(row[col_map['realized_pl']]))
-                            
-                            mtm_pl = None
-                            if 'mtm_pl' in col_map and row[col_map['mtm_pl']]:
-                                mtm_pl = self.parse_decimal(str(row[col_map['mtm_pl']]))
-                            
-                            code = None
-                            if 'code' in col_map and row[col_map['code']]:
-                                code = str(row[col_map['code']]).strip()
-                            
-                            # Determine transaction type
-                            transaction_type = None
-                            if code:
-                                code_upper = code.upper()
-                                if 'O' in code_upper and 'C' not in code_upper:
-                                    transaction_type = 'BUY'
-                                elif 'C' in code_upper:
-                                    transaction_type = 'SELL'
-                                elif 'O;P' in code_upper or 'O,P' in code_upper:
-                                    transaction_type = 'BUY'  # Partial open is still a buy
-                            elif quantity:
-                                # Fallback: positive quantity = buy, negative = sell
-                                if quantity > 0:
-                                    transaction_type = 'BUY'
-                                elif quantity < 0:
-                                    transaction_type = 'SELL'
-                                    quantity = abs(quantity)  # Make quantity positive
-                            
-                            transaction = {
-                                'symbol': symbol_str,
-                                'transaction_date': transaction_date,
-                                'transaction_time': transaction_time,
-                                'transaction_type': transaction_type,
-                                'quantity': quantity,
-                                'trade_price': trade_price,
-                                'close_price': close_price,
-                                'proceeds': proceeds,
-                                'commission': commission,
-                                'basis': basis,
-                                'realized_pl': realized_pl,
-                                'mtm_pl': mtm_pl,
-                                'trade_code': code,
-                                'source_pdf': pdf_name
-                            }
-                            
-                            transactions.append(transaction)
-                            rows_extracted += 1
-                            
-                            print(f"      Row {row_idx}: {symbol_str} | {date_time_str} | Qty: {quantity} | Type: {transaction_type}")
+                        commission = None
+                        if commission_i >= 0 and cells[commission_i]:
+                            commission = _parse_decimal(cells[commission_i])
                         
-                        print(f"    Extracted {rows_extracted} transactions from this table")
-        
+                        basis = None
+                        if basis_i >= 0 and cells[basis_i]:
+                            basis = _parse_decimal(cells[basis_i])
+                        
+                        realized_pl = None
+                        if realized_pl_i >= 0 and cells[realized_pl_i]:
+                            realized_pl = _parse_decimal(cells[realized_pl_i])
+                        
+                        mtm_pl = None
+                        if mtm_pl_i >= 0 and cells[mtm_pl_i]:
+                            mtm_pl = _parse_decimal(cells[mtm_pl_i])
+                        
+                        code = None
+                        if code_i >= 0 and cells[code_i]:
+                            code = cells[code_i].strip()
+                        
+                        # Determine transaction type
+                        transaction_type = None
+                        if code:
+                            code_upper = code.upper()
+                            if 'O' in code_upper and 'C' not in code_upper:
+                                transaction_type = 'BUY'
+                            elif 'C' in code_upper:
+                                transaction_type = 'SELL'
+                            elif 'O;P' in code_upper or 'O,P' in code_upper:
+                                transaction_type = 'BUY'  # Partial open is still a buy
+                        elif quantity:
+                            # Fallback: positive quantity = buy, negative = sell
+                            if quantity > 0:
+                                transaction_type = 'BUY'
+                            elif quantity < 0:
+                                transaction_type = 'SELL'
+                                quantity = abs(quantity)  # Make quantity positive
+                        
+                        transaction = Transaction(
+                            symbol=symbol_str,
+                            source_pdf=pdf_name,
+                            transaction_date=transaction_date,
+                            transaction_time=transaction_time,
+                            transaction_type=transaction_type,
+                            quantity=quantity,
+                            trade_price=trade_price,
+                            close_price=close_price,
+                            proceeds=proceeds,
+                            commission=commission,
+                            basis=basis,
+                            realized_pl=realized_pl,
+                            mtm_pl=mtm_pl,
+                            trade_code=code,
+                        )
+                        
+                        transactions.append(transaction)
+                        rows_extracted += 1
+                        
+                        logger.debug("Row %s: %s | %s | Qty: %s | Type: %s", row_idx, symbol_str, date_time_str, quantity, transaction_type)
+                    
+                    logger.debug("Extracted %s transactions from this table", rows_extracted)
+
         except Exception as e:
-            print(f"ERROR extracting transactions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error extracting transactions: %s", e)
         
-        print(f"\n{'='*80}")
-        print(f"TRANSACTION EXTRACTION COMPLETE: Total {len(transactions)} transactions found")
-        print(f"{'='*80}\n")
+        logger.info("Transaction extraction complete: %s transactions found", len(transactions))
         
         return transactions
     
-    def extract_dividends_from_tables(self, pdf_path: str, pdf_name: str) -> List[Dict]:
+    def extract_dividends_from_tables(self, pages: List['_PdfPageCache'], pdf_name: str) -> List[Dividend]:
         """Extract dividends from PDF tables - handles both 'Dividends' and 'Withholding Tax' tables"""
         dividends = []
         withholding_tax_map = {}  # Map to store withholding tax by date+symbol
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                # First pass: collect all withholding tax data
-                print("\n" + "="*80)
-                print("FIRST PASS: Collecting withholding tax data...")
-                print("="*80)
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    
-                    # Skip pages without "Withholding Tax" heading
-                    if 'Withholding Tax' not in text:
+            # One walk over the pages and their tables: withholding rows go into
+            # the map, dividend rows are buffered until every withholding table
+            # (which may come later in the report) has been read
+            dividend_rows = []
+            for page_num, page in enumerate(pages):
+                text = page.text
+                has_withholding = 'Withholding Tax' in text
+                has_dividend = 'Dividend' in text
+                if not (has_withholding or has_dividend):
+                    continue
+                logger.debug("Page %s: Found dividend/withholding section (withholding=%s, dividend=%s)", page_num + 1, has_withholding, has_dividend)
+                
+                tables = page.tables
+                for table_idx, table in enumerate(tables):
+                    if not table or len(table) < 2:
                         continue
                     
-                    print(f"\nPage {page_num + 1}: Found 'Withholding Tax' in text")
+                    first_row_text = ' '.join([str(cell) for cell in table[0] if cell]).strip()
                     
-                    tables = page.extract_tables()
-                    for table_idx, table in enumerate(tables):
-                        if not table or len(table) < 2:
-                            continue
-                        
-                        # Check if this is specifically a Withholding Tax table (not Dividends)
-                        first_row_text = ' '.join([str(cell) for cell in table[0] if cell]).strip()
+                    # Withholding Tax table: header says "Withholding Tax", NOT "Dividends"
+                    if has_withholding and 'Withholding Tax' in first_row_text and 'Dividend' not in first_row_text:
+                        logger.debug("Table %s: Processing Withholding Tax table", table_idx + 1)
+                        logger.debug("Header: %s", first_row_text)
                         
-                        # Only process if header says "Withholding Tax", NOT "Dividends"
-                        if 'Withholding Tax' in first_row_text and 'Dividend' not in first_row_text:
-                            print(f"  Table {table_idx + 1}: Processing Withholding Tax table")
-                            print(f"    Header: {first_row_text}")
+                        for date_str, _description, amount_str, symbol in _iter_dividend_rows(table):
+                            # Parse date and amount
+                            payment_date = _parse_date_string(date_str)
+                            withholding_tax = _parse_decimal(amount_str)
                             
-                            # Expected columns: Date USD | Description | Amount | Code
-                            for row_idx, row in enumerate(table):
-                                if row_idx == 0:  # Skip header
-                                    continue
-                                
-                                if not row or len(row) < 3:
-                                    continue
-                                
-                                # Extract date, description, and amount
-                                date_str = str(row[0]).strip() if row[0] else None
-                                description = str(row[1]).strip() if len(row) > 1 and row[1] else None
-                                amount_str = str(row[2]).strip() if len(row) > 2 and row[2] else None
-                                
-                                if not date_str or date_str in ['Date', 'USD', 'None', '', 'Total']:
-                                    continue
-                                
-                                if not description or not amount_str:
-                                    continue
-                                
-                                # Extract symbol from description (e.g., "LOW(US5486611073)" -> "LOW")
-                                symbol = None
-                                if '(' in description:
-                                    symbol = description.split('(')[0].strip()
-                                
-                                if symbol:
-                                    # Parse date and amount
-                                    payment_date = self.parse_date_string(date_str)
-                                    withholding_tax = self.parse_decimal(amount_str)
-                                    
-                                    if payment_date and withholding_tax:
-                                        # Create key for mapping
-                                        key = f"{payment_date}_{symbol}"
-                                        tax_value = abs(withholding_tax)  # Store as positive value
-                                        withholding_tax_map[key] = tax_value
-                                        print(f"    ✓ {key}: ${tax_value}")
-                
-                print(f"\n{'='*80}")
-                print(f"Collected {len(withholding_tax_map)} withholding tax entries")
-                print(f"{'='*80}\n")
-                
-                # Second pass: collect all dividend data
-                print("="*80)
-                print("SECOND PASS: Collecting dividend data...")
-                print("="*80)
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    
-                    # Skip pages without dividend information
-                    if 'Dividend' not in text:
-                        continue
-                    
-                    print(f"\nPage {page_num + 1}: Found 'Dividend' in text")
+                            if payment_date and withholding_tax:
+                                # Create key for mapping
+                                key = f"{payment_date}_{symbol}"
+                                tax_value = abs(withholding_tax)  # Store as positive value
+                                withholding_tax_map[key] = tax_value
+                                logger.debug("✓ %s: $%s", key, tax_value)
                     
-                    tables = page.extract_tables()
-                    for table_idx, table in enumerate(tables):
-                        if not table or len(table) < 2:
-                            continue
-                        
-                        first_row_text = ' '.join([str(cell) for cell in table[0] if cell]).strip()
+                    # Dividends table: header says "Dividends", NOT "Withholding Tax"
+                    elif has_dividend and 'Dividends' in first_row_text and 'Withholding' not in first_row_text:
+                        logger.debug("Table %s: Processing Dividends table", table_idx + 1)
+                        logger.debug("Header: %s", first_row_text)
                         
-                        # Only process if header says "Dividends", NOT "Withholding Tax"
-                        if 'Dividends' in first_row_text and 'Withholding' not in first_row_text:
-                            print(f"  Table {table_idx + 1}: Processing Dividends table")
-                            print(f"    Header: {first_row_text}")
+                        for date_str, description, amount_str, symbol in _iter_dividend_rows(table):
+                            # Parse date and amount
+                            payment_date = _parse_date_string(date_str)
+                            gross_amount = _parse_decimal(amount_str)
                             
-                            # Expected columns: Date USD | Description | Amount
-                            for row_idx, row in enumerate(table):
-                                if row_idx == 0:  # Skip header
-                                    continue
-                                
-                                if not row or len(row) < 3:
-                                    continue
-                                
-                                # Extract date, description, and amount
-                                date_str = str(row[0]).strip() if row[0] else None
-                                description = str(row[1]).strip() if len(row) > 1 and row[1] else None
-                                amount_str = str(row[2]).strip() if len(row) > 2 and row[2] else None
-                                
-                                if not date_str or date_str in ['Date', 'USD', 'None', '', 'Total']:
-                                    continue
-                                
-                                if not description or not amount_str:
-                                    continue
-                                
-                                # Extract symbol from description (e.g., "LOW(US5486611073)" -> "LOW")
-                                symbol = None
-                                if '(' in description:
-                                    symbol = description.split('(')[0].strip()
-                                
-                                if not symbol:
-                                    continue
-                                
-                                # Parse date and amount
-                                payment_date = self.parse_date_string(date_str)
-                                gross_amount = self.parse_decimal(amount_str)
-                                
-                                if not payment_date or not gross_amount:
-                                    continue
-                                
-                                # Look up withholding tax
-                                key = f"{payment_date}_{symbol}"
-                                withholding_tax = withholding_tax_map.get(key, Decimal('0'))
-                                
-                                # Calculate net amount
-                                # Method 1: Subtract withholding tax from gross
-                                net_amount = gross_amount - withholding_tax
-                                
-                                # If no withholding tax found, assume 25% US tax (75% net)
-                                if withholding_tax == 0:
-                                    net_amount = gross_amount * Decimal('0.75')
-                                    withholding_tax = gross_amount * Decimal('0.25')
-                                
-                                dividend = {
-                                    'symbol': symbol,
-                                    'payment_date': payment_date,
-                                    'amount': gross_amount,
-                                    'gross_amount': gross_amount,
-                                    'withholding_tax': withholding_tax if withholding_tax > 0 else None,
-                                    'net_amount': net_amount,
-                                    'description': description,
-                                    'dividend_type': 'Cash Dividend',
-                                    'source_pdf': pdf_name
-                                }
-                                
-                                dividends.append(dividend)
-                                print(f"    ✓ {symbol} on {payment_date}: Gross=${gross_amount}, Tax=${withholding_tax}, Net=${net_amount}")
-        
+                            if payment_date and gross_amount:
+                                dividend_rows.append((symbol, payment_date, gross_amount, description))
+            
+            logger.info("Collected %s withholding tax entries", len(withholding_tax_map))
+            
+            for symbol, payment_date, gross_amount, description in dividend_rows:
+                # Look up withholding tax
+                key = f"{payment_date}_{symbol}"
+                withholding_tax = withholding_tax_map.get(key, _DEC_ZERO)
+                
+                # Calculate net amount
+                # Method 1: Subtract withholding tax from gross
+                net_amount = gross_amount - withholding_tax
+                
+                # If no withholding tax found, assume 25% US tax (75% net)
+                if withholding_tax == 0:
+                    net_amount = gross_amount * _NET_RATE_75
+                    withholding_tax = gross_amount * _TAX_RATE_25
+                
+                dividend = Dividend(
+                    symbol=symbol,
+                    source_pdf=pdf_name,
+                    payment_date=payment_date,
+                    amount=gross_amount,
+                    gross_amount=gross_amount,
+                    withholding_tax=withholding_tax if withholding_tax > 0 else None,
+                    net_amount=net_amount,
+                    description=description,
+                )
+                
+                dividends.append(dividend)
+                logger.debug("✓ %s on %s: Gross=$%s, Tax=$%s, Net=$%s", symbol, payment_date, gross_amount, withholding_tax, net_amount)
+
         except Exception as e:
-            print(f"Error extracting dividends from tables: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error extracting dividends from tables: %s", e)
         
-        print(f"\n{'='*80}")
-        print(f"Total dividends extracted: {len(dividends)}")
-        print(f"{'='*80}\n")
+        logger.info("Total dividends extracted: %s", len(dividends))
         return dividends
     
     def _serialize_for_json(self, data: Dict) -> Dict:
@@ -765,170 +1041,182 @@ class WorldStockService:
             'errors': List[str]
         }
         """
+        # Nothing extracted (e.g. a partial PDF): no need for a connection at all
+        if not (holdings or transactions or dividends):
+            logger.info("Nothing to save to pending transactions")
+            return {
+                'saved_count': 0,
+                'valid_count': 0,
+                'invalid_count': 0,
+                'warnings': [],
+                'errors': []
+            }
+        
         try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            pending_records = []
-            validation_warnings = []
-            validation_errors = []
-            
-            # Build a ticker to world_stock_id lookup cache
-            ticker_to_id_map = {}
-            unique_tickers = set()
-            
-            # Collect all unique tickers
-            for holding in holdings:
-                ticker = holding.get('symbol')
-                if ticker:
-                    unique_tickers.add(ticker)
-            
-            for transaction in transactions:
-                ticker = transaction.get('symbol')
-                if ticker:
-                    unique_tickers.add(ticker)
-            
-            for dividend in dividends:
-                ticker = dividend.get('symbol')
-                if ticker:
-                    unique_tickers.add(ticker)
-            
-            # Lookup world_stock_id for all tickers in batch
-            if unique_tickers:
-                placeholders = ','.join(['%s'] * len(unique_tickers))
-                cursor.execute(f'''
-                    SELECT ticker, id FROM "world_stocks"
-                    WHERE ticker IN ({placeholders})
-                ''', tuple(unique_tickers))
+            with self.pooled_connection() as conn:
+                cursor = conn.cursor()
                 
-                for row in cursor.fetchall():
-                    ticker_to_id_map[row[0]] = row[1]
-            
-            print(f"DEBUG: Saving to pending - Holdings: {len(holdings)}, Transactions: {len(transactions)}, Dividends: {len(dividends)}")
-            print(f"DEBUG: Found {len(ticker_to_id_map)} stocks in WorldStocks table")
-            
-            # Convert holdings to pending transactions (type: BUY)
-            for holding in holdings:
-                if holding.get('quantity') is None:
-                    continue
+                pending_records = []
+                validation_warnings = []
+                validation_errors = []
                 
-                transaction_date = holding.get('transaction_date') or holding.get('holding_date')
-                if isinstance(transaction_date, str):
-                    transaction_date = self.parse_date_string(transaction_date)
+                # Build a ticker to world_stock_id lookup cache
+                ticker_to_id_map = {}
+                unique_tickers = set()
                 
-                # Basic validation
-                if not holding.get('symbol'):
-                    validation_errors.append(f"Holding missing ticker symbol")
-                    continue
+                # Collect all unique tickers
+                for holding in holdings:
+                    ticker = holding.get('symbol')
+                    if ticker:
+                        unique_tickers.add(ticker)
                 
-                ticker = holding.get('symbol')
-                world_stock_id = ticker_to_id_map.get(ticker)
+                for transaction in transactions:
+                    ticker = transaction.get('symbol')
+                    if ticker:
+                        unique_tickers.add(ticker)
                 
-                pending_records.append((
-                    user_id,
-                    batch_id,
-                    pdf_filename,
-                    ticker,
-                    holding.get('name'),
-                    world_stock_id,
-                    'BUY',  # Holdings are treated as BUY transactions
-                    transaction_date.isoformat() if transaction_date else None,
-                    None,  # transaction_time - holdings don't have time
-                    holding.get('quantity'),
-                    holding.get('current_price') or holding.get('last_price'),
-                    holding.get('current_value'),
-                    None,  # commission - not available for holdings
-                    None,  # tax - not available for holdings
-                    holding.get('currency', 'USD'),
-                    'pending'
-                ))
-            
-            # Convert regular transactions to pending transactions
-            for transaction in transactions:
-                transaction_date = transaction.get('transaction_date')
-                if isinstance(transaction_date, str):
-                    transaction_date = self.parse_date_string(transaction_date)
+                for dividend in dividends:
+                    ticker = dividend.get('symbol')
+                    if ticker:
+                        unique_tickers.add(ticker)
                 
-                # Basic validation
-                if not transaction.get('symbol'):
-                    validation_errors.append(f"Transaction missing ticker symbol")
-                    continue
+                # Lookup world_stock_id for all tickers in batch
+                if unique_tickers:
+                    placeholders = ','.join(['%s'] * len(unique_tickers))
+                    cursor.execute(f'''
+                        SELECT ticker, id FROM "world_stocks"
+                        WHERE ticker IN ({placeholders})
+                    ''', tuple(unique_tickers))
+                    
+                    for row in cursor.fetchall():
+                        ticker_to_id_map[row[0]] = row[1]
                 
-                ticker = transaction.get('symbol')
-                world_stock_id = ticker_to_id_map.get(ticker)
+                logger.debug("Saving to pending - Holdings: %d, Transactions: %d, Dividends: %d",
+                             len(holdings), len(transactions), len(dividends))
+                logger.debug("Found %d stocks in WorldStocks table", len(ticker_to_id_map))
                 
-                pending_records.append((
-                    user_id,
-                    batch_id,
-                    pdf_filename,
-                    ticker,
-                    transaction.get('company_name') or transaction.get('name'),
-                    world_stock_id,
-                    transaction.get('transaction_type', 'BUY'),
-                    transaction_date.isoformat() if transaction_date else None,
-                    transaction.get('transaction_time'),
-                    transaction.get('quantity'),
-                    transaction.get('trade_price') or transaction.get('price'),
-                    transaction.get('proceeds') or transaction.get('total_value'),
-                    transaction.get('commission'),
-                    transaction.get('tax'),
-                    transaction.get('currency', 'USD'),
-                    'pending'
-                ))
-            
-            # Convert dividends to pending transactions
-            for dividend in dividends:
-                payment_date = dividend.get('payment_date') or dividend.get('transaction_date')
-                if isinstance(payment_date, str):
-                    payment_date = self.parse_date_string(payment_date)
+                # Convert holdings to pending transactions (type: BUY)
+                for holding in holdings:
+                    if holding.get('quantity') is None:
+                        continue
+                    
+                    transaction_date = holding.get('transaction_date') or holding.get('holding_date')
+                    if isinstance(transaction_date, str):
+                        transaction_date = _parse_date_string(transaction_date)
+                    
+                    # Basic validation
+                    if not holding.get('symbol'):
+                        validation_errors.append(f"Holding missing ticker symbol")
+                        continue
+                    
+                    ticker = holding.get('symbol')
+                    world_stock_id = ticker_to_id_map.get(ticker)
+                    
+                    pending_records.append((
+                        user_id,
+                        batch_id,
+                        pdf_filename,
+                        ticker,
+                        holding.get('name'),
+                        world_stock_id,
+                        'BUY',  # Holdings are treated as BUY transactions
+                        transaction_date.isoformat() if transaction_date else None,
+                        None,  # transaction_time - holdings don't have time
+                        holding.get('quantity'),
+                        holding.get('current_price') or holding.get('last_price'),
+                        holding.get('current_value'),
+                        None,  # commission - not available for holdings
+                        None,  # tax - not available for holdings
+                        holding.get('currency', 'USD'),
+                        'pending'
+                    ))
                 
-                # Basic validation
-                if not dividend.get('symbol'):
-                    validation_errors.append(f"Dividend missing ticker symbol")
-                    continue
+                # Convert regular transactions to pending transactions
+                for transaction in transactions:
+                    transaction_date = transaction.get('transaction_date')
+                    if isinstance(transaction_date, str):
+                        transaction_date = _parse_date_string(transaction_date)
+                    
+                    # Basic validation
+                    if not transaction.get('symbol'):
+                        validation_errors.append(f"Transaction missing ticker symbol")
+                        continue
+                    
+                    ticker = transaction.get('symbol')
+                    world_stock_id = ticker_to_id_map.get(ticker)
+                    
+                    pending_records.append((
+                        user_id,
+                        batch_id,
+                        pdf_filename,
+                        ticker,
+                        transaction.get('company_name') or transaction.get('name'),
+                        world_stock_id,
+                        transaction.get('transaction_type', 'BUY'),
+                        transaction_date.isoformat() if transaction_date else None,
+                        transaction.get('transaction_time'),
+                        transaction.get('quantity'),
+                        transaction.get('trade_price') or transaction.get('price'),
+                        transaction.get('proceeds') or transaction.get('total_value'),
+                        transaction.get('commission'),
+                        transaction.get('tax'),
+                        transaction.get('currency', 'USD'),
+                        'pending'
+                    ))
                 
-                ticker = dividend.get('symbol')
-                world_stock_id = ticker_to_id_map.get(ticker)
+                # Convert dividends to pending transactions
+                for dividend in dividends:
+                    payment_date = dividend.get('payment_date') or dividend.get('transaction_date')
+                    if isinstance(payment_date, str):
+                        payment_date = _parse_date_string(payment_date)
+                    
+                    # Basic validation
+                    if not dividend.get('symbol'):
+                        validation_errors.append(f"Dividend missing ticker symbol")
+                        continue
+                    
+                    ticker = dividend.get('symbol')
+                    world_stock_id = ticker_to_id_map.get(ticker)
+                    
+                    pending_records.append((
+                        user_id,
+                        batch_id,
+                        pdf_filename,
+                        ticker,
+                        dividend.get('company_name') or dividend.get('name'),
+                        world_stock_id,
+                        'DIVIDEND',
+                        payment_date.isoformat() if payment_date else None,
+                        None,  # transaction_time
+                        None,  # quantity - not applicable for dividends
+                        None,  # price - not applicable for dividends
+                        dividend.get('gross_amount') or dividend.get('amount'),
+                        dividend.get('commission'),
+                        dividend.get('withholding_tax') or dividend.get('tax'),
+                        dividend.get('currency', 'USD'),
+                        'pending'
+                    ))
                 
-                pending_records.append((
-                    user_id,
-                    batch_id,
-                    pdf_filename,
-                    ticker,
-                    dividend.get('company_name') or dividend.get('name'),
-                    world_stock_id,
-                    'DIVIDEND',
-                    payment_date.isoformat() if payment_date else None,
-                    None,  # transaction_time
-                    None,  # quantity - not applicable for dividends
-                    None,  # price - not applicable for dividends
-                    dividend.get('gross_amount') or dividend.get('amount'),
-                    dividend.get('commission'),
-                    dividend.get('withholding_tax') or dividend.get('tax'),
-                    dividend.get('currency', 'USD'),
-                    'pending'
-                ))
-            
-            # Batch insert all pending records
-            if pending_records:
-                cursor.executemany('''
-                    INSERT INTO "pending_world_transactions" 
-                    (user_id, upload_batch_id, pdf_filename, ticker, stock_name, world_stock_id, transaction_type,
-                     transaction_date, transaction_time, quantity, price, amount,
-                     commission, tax, currency, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ''', pending_records)
+                # Batch insert all pending records
+                if pending_records:
+                    execute_values(cursor, '''
+                        INSERT INTO "pending_world_transactions" 
+                        (user_id, upload_batch_id, pdf_filename, ticker, stock_name, world_stock_id, transaction_type,
+                         transaction_date, transaction_time, quantity, price, amount,
+                         commission, tax, currency, status)
+                        VALUES %s
+                    ''', pending_records, page_size=_INSERT_PAGE_SIZE)
+                    
+                    conn.commit()
                 
-                conn.commit()
-            
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             saved_count = len(pending_records)
             valid_count = saved_count - len(validation_errors)
             invalid_count = len(validation_errors)
             
-            print(f"Saved {saved_count} pending transactions (valid: {valid_count}, invalid: {invalid_count})")
+            logger.info("Saved %d pending transactions (valid: %d, invalid: %d)",
+                        saved_count, valid_count, invalid_count)
             
             return {
                 'saved_count': saved_count,
@@ -939,9 +1227,7 @@ class WorldStockService:
             }
             
         except Exception as e:
-            print(f"Error saving to pending transactions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error saving to pending transactions: %s", e)
             return {
                 'saved_count': 0,
                 'valid_count': 0,
@@ -983,7 +1269,7 @@ class WorldStockService:
                 if csv_type != 'transactions':
                     continue
                 
-                print(f"DEBUG: {filename} - Scanning for world stocks...")
+                logger.debug("%s - Scanning for world stocks...", filename)
                 
                 # Two-pass approach: first collect all transactions, then process commissions
                 all_rows = []
@@ -1142,7 +1428,7 @@ class WorldStockService:
                             # Try partial matching - check if stock ticker appears in either name
                             for stored_name, stored_txn_list in transactions_by_stock.items():
                                 # Extract ticker symbols
-                                stored_tickers = re.findall(r'\b([A-Z]{2,5})\b|\(([A-Z]+)\)', stored_name)
+                                stored_tickers = _NAME_TICKERS_RE.findall(stored_name)
                                 stored_tickers = [t[0] or t[1] for t in stored_tickers if (t[0] or t[1]) not in ('US', 'UK', 'JP')]
                                 
                                 # For commission names like "F US", extract the non-US part
@@ -1150,7 +1436,7 @@ class WorldStockService:
                                 if len(comm_parts) == 2 and comm_parts[1] in ('US', 'UK', 'JP') and len(comm_parts[0]) == 1:
                                     current_tickers = [comm_parts[0]]
                                 else:
-                                    current_tickers = re.findall(r'\b([A-Z]{2,5})\b|\(([A-Z]+)\)', comm_name)
+                                    current_tickers = _NAME_TICKERS_RE.findall(comm_name)
                                     current_tickers = [t[0] or t[1] for t in current_tickers if (t[0] or t[1]) not in ('US', 'UK', 'JP')]
                                 
                                 # Check if any ticker matches
@@ -1201,14 +1487,14 @@ class WorldStockService:
                         else:
                             # Try partial matching for dividends only
                             for stored_name, stored_txn_list in transactions_by_stock.items():
-                                stored_tickers = re.findall(r'\b([A-Z]{2,5})\b|\(([A-Z]+)\)', stored_name)
+                                stored_tickers = _NAME_TICKERS_RE.findall(stored_name)
                                 stored_tickers = [t[0] or t[1] for t in stored_tickers if (t[0] or t[1]) not in ('US', 'UK', 'JP')]
                                 
                                 tax_parts = tax_name.split()
                                 if len(tax_parts) == 2 and tax_parts[1] in ('US', 'UK', 'JP') and len(tax_parts[0]) == 1:
                                     current_tickers = [tax_parts[0]]
                                 else:
-                                    current_tickers = re.findall(r'\b([A-Z]{2,5})\b|\(([A-Z]+)\)', tax_name)
+                                    current_tickers = _NAME_TICKERS_RE.findall(tax_name)
                                     current_tickers = [t[0] or t[1] for t in current_tickers if (t[0] or t[1]) not in ('US', 'UK', 'JP')]
                                 
                                 if stored_tickers and current_tickers:
@@ -1235,10 +1521,10 @@ class WorldStockService:
                             transaction['total_value'] = amount - commission
                 
                 if all_world_transactions:
-                    print(f"DEBUG: {filename} - Extracted {len(all_world_transactions)} world stock transactions")
+                    logger.debug("%s - Extracted %d world stock transactions", filename, len(all_world_transactions))
                     
             except Exception as e:
-                print(f"Error scanning {csv_file} for world stocks: {e}")
+                logger.warning("Error scanning %s for world stocks: %s", csv_file, e)
                 continue
         
         return all_world_transactions
@@ -1249,12 +1535,12 @@ class WorldStockService:
             with pdfplumber.open(pdf_path) as pdf:
                 tables = []
                 for page in pdf.pages:
-                    page_tables = page.extract_tables()
+                    page_tables = page.extract_tables(_TABLE_SETTINGS)
                     if page_tables:
                         tables.extend(page_tables)
                 return tables
         except Exception as e:
-            print(f"Error extracting tables from PDF: {e}")
+            logger.error("Error extracting tables from PDF: %s", e)
             return []
     
     def save_tables_to_csv(self, tables: List[List[List[str]]], output_dir: str) -> List[str]:
@@ -1273,7 +1559,7 @@ class WorldStockService:
                     writer.writerows(table)
                 csv_files.append(csv_file)
             except Exception as e:
-                print(f"Error saving table {i+1} to CSV: {e}")
+                logger.warning("Error saving table %d to CSV: %s", i + 1, e)
         
         return csv_files
     
@@ -1284,11 +1570,7 @@ class WorldStockService:
             batch_id = str(uuid.uuid4())
             pdf_name = os.path.basename(pdf_path)
             
-            print(f"\n{'='*80}")
-            print(f"Processing PDF: {pdf_name}")
-            print(f"Broker: {broker}")
-            print(f"Batch ID: {batch_id}")
-            print(f"{'='*80}\n")
+            logger.info("Processing PDF: %s (broker: %s, batch: %s)", pdf_name, broker, batch_id)
             
             holdings = []
             transactions = []
@@ -1296,31 +1578,28 @@ class WorldStockService:
             
             # Detect format: Excellence broker uses Hebrew CSV format
             if broker == 'excellence':
-                print(f"Detected Excellence broker format (Hebrew CSV)")
-                print(f"Step 1: Extracting tables from PDF...")
+                logger.debug("Detected Excellence broker format (Hebrew CSV)")
                 tables = self.extract_tables_from_pdf(pdf_path)
-                print(f"  Found {len(tables)} tables")
+                logger.debug("Step 1: Found %d tables", len(tables))
                 
                 if not tables:
                     return {'success': False, 'error': 'No tables found in PDF'}
                 
-                print(f"Step 2: Saving tables to CSV...")
                 import shutil
                 temp_dir = f"temp_csv_world_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 csv_files = self.save_tables_to_csv(tables, temp_dir)
-                print(f"  Saved {len(csv_files)} CSV files")
+                logger.debug("Step 2: Saved %d CSV files", len(csv_files))
                 
                 try:
-                    print(f"Step 3: Extracting WORLD stocks only from CSV...")
                     holding_date = None  # TODO: Extract date from PDF if needed
                     all_transactions = self.extract_world_stocks_from_excellence_csv(csv_files, pdf_name, holding_date)
-                    print(f"  Found {len(all_transactions)} world stock transactions")
+                    logger.debug("Step 3: Found %d world stock transactions", len(all_transactions))
                     
                     # Separate dividends from transactions
                     dividends = [t for t in all_transactions if t.get('transaction_type') == 'DIVIDEND']
                     transactions = [t for t in all_transactions if t.get('transaction_type') != 'DIVIDEND']
                     
-                    print(f"  Transactions: {len(transactions)}, Dividends: {len(dividends)}")
+                    logger.debug("Transactions: %d, Dividends: %d", len(transactions), len(dividends))
                     
                 finally:
                     # Clean up temp files
@@ -1328,20 +1607,31 @@ class WorldStockService:
                         shutil.rmtree(temp_dir)
             else:
                 # US broker format with English tables
-                print(f"Detected US broker format (English tables)")
-                print(f"Step 1: Extracting holdings...")
-                holdings = self.extract_holdings_from_tables(pdf_path, pdf_name)
-                print(f"  Found {len(holdings)} holdings")
-                
-                print(f"Step 2: Extracting transactions...")
-                transactions = self.extract_transactions_from_tables(pdf_path, pdf_name)
-                print(f"  Found {len(transactions)} transactions")
-                
-                print(f"Step 3: Extracting dividends...")
-                dividends = self.extract_dividends_from_tables(pdf_path, pdf_name)
-                print(f"  Found {len(dividends)} dividends")
+                logger.debug("Detected US broker format (English tables)")
+                cache_key = _pdf_cache_key(pdf_path)
+                cached = _get_cached_report(cache_key)
+                if cached is not None:
+                    holdings, transactions, dividends = cached
+                    logger.info("Steps 1-3: Reusing extraction of an identical PDF: "
+                                "%d holdings, %d transactions, %d dividends",
+                                len(holdings), len(transactions), len(dividends))
+                else:
+                    # Open and parse the PDF once; the extractors share its pages
+                    with pdfplumber.open(pdf_path) as pdf:
+                        pages = [_PdfPageCache(page) for page in pdf.pages]
+                        _prefetch_pdf_pages(pdf_path, pages)
+                        
+                        holdings = self.extract_holdings_from_tables(pages, pdf_name)
+                        logger.debug("Step 1: Found %d holdings", len(holdings))
+                        
+                        transactions = self.extract_transactions_from_tables(pages, pdf_name)
+                        logger.debug("Step 2: Found %d transactions", len(transactions))
+                        
+                        dividends = self.extract_dividends_from_tables(pages, pdf_name)
+                        logger.debug("Step 3: Found %d dividends", len(dividends))
+                    
+                    _cache_report(cache_key, holdings, transactions, dividends)
             
-            print(f"Step 4: Saving to pending transactions...")
             save_result = self.save_to_pending_transactions(
                 holdings=holdings,
                 transactions=transactions,
@@ -1353,13 +1643,9 @@ class WorldStockService:
             
             total_extracted = len(holdings) + len(transactions) + len(dividends)
             
-            print(f"\n{'='*80}")
-            print(f"PROCESSING COMPLETE")
-            print(f"  Total extracted: {total_extracted}")
-            print(f"  Saved to pending: {save_result['saved_count']}")
-            print(f"  Valid: {save_result['valid_count']}")
-            print(f"  Invalid: {save_result['invalid_count']}")
-            print(f"{'='*80}\n")
+            logger.info("Processed %s: %d extracted, %d saved to pending (valid: %d, invalid: %d)",
+                        pdf_name, total_extracted, save_result['saved_count'],
+                        save_result['valid_count'], save_result['invalid_count'])
             
             return {
                 'success': True,
@@ -1380,278 +1666,8 @@ class WorldStockService:
             }
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("process_pdf_report failed for %s", pdf_path)
             return {'success': False, 'error': str(e)}
-    
-    def save_account_to_database(self, account_info: Dict, user_id: str) -> Optional[int]:
-        """Save account information to database"""
-        try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            account_number = account_info.get('account_number')
-            
-            # If no account number found in PDF, use a default based on user and broker
-            if not account_number:
-                broker_name = account_info.get('broker_name', 'UNKNOWN')
-                account_number = f"DEFAULT_{broker_name[:20]}_{user_id[:10]}"
-                print(f"  No account number found in PDF, using default: {account_number}")
-            
-            # Check if account already exists
-            cursor.execute(
-                'SELECT id FROM "WorldStockAccount" WHERE account_number = %s AND user_id = %s',
-                (account_number, user_id)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                account_id = result[0]
-                print(f"  Found existing account ID: {account_id}")
-                # Update existing account
-                cursor.execute('''
-                    UPDATE "WorldStockAccount" 
-                    SET account_alias = %s, broker_name = %s, base_currency = %s, 
-                        account_type = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                ''', (
-                    account_info.get('account_alias'),
-                    account_info.get('broker_name'),
-                    account_info.get('base_currency', 'USD'),
-                    account_info.get('account_type'),
-                    account_id
-                ))
-            else:
-                # Insert new account
-                print(f"  Creating new account with number: {account_number}")
-                cursor.execute('''
-                    INSERT INTO "WorldStockAccount" 
-                    (user_id, account_number, account_alias, account_type, base_currency, broker_name)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                ''', (
-                    user_id,
-                    account_number,
-                    account_info.get('account_alias'),
-                    account_info.get('account_type'),
-                    account_info.get('base_currency', 'USD'),
-                    account_info.get('broker_name')
-                ))
-                account_id = cursor.fetchone()[0]
-                print(f"  Created new account ID: {account_id}")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return account_id
-            
-        except Exception as e:
-            print(f"Error saving account to database: {e}")
-            return None
-    
-    def save_holdings_to_database(self, holdings: List[Dict], user_id: str, account_id: int) -> int:
-        """Save holdings to database"""
-        if not holdings:
-            return 0
-        
-        try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            # Clear existing holdings for this account
-            cursor.execute('DELETE FROM "world_stock_holdings" WHERE user_id = %s AND account_id = %s', 
-                         (user_id, account_id))
-            
-            saved_count = 0
-            for holding in holdings:
-                try:
-                    cursor.execute('''
-                        INSERT INTO "world_stock_holdings" 
-                        (user_id, account_id, symbol, company_name, quantity, avg_entry_price,
-                         current_price, current_value, purchase_cost, unrealized_pl, 
-                         unrealized_pl_percent, currency, source_pdf)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        user_id,
-                        account_id,
-                        holding.get('symbol'),
-                        holding.get('company_name'),
-                        holding.get('quantity'),
-                        holding.get('avg_entry_price'),
-                        holding.get('current_price'),
-                        holding.get('current_value'),
-                        holding.get('purchase_cost'),
-                        holding.get('unrealized_pl'),
-                        holding.get('unrealized_pl_percent'),
-                        holding.get('currency', 'USD'),
-                        holding.get('source_pdf')
-                    ))
-                    saved_count += 1
-                except Exception as e:
-                    print(f"Error saving holding {holding.get('symbol')}: {e}")
-                    continue
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return saved_count
-            
-        except Exception as e:
-            print(f"Error saving holdings to database: {e}")
-            return 0
-    
-    def save_transactions_to_database(self, transactions: List[Dict], user_id: str, account_id: int) -> int:
-        """Save transactions to database"""
-        if not transactions:
-            return 0
-        
-        try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            saved_count = 0
-            for transaction in transactions:
-                try:
-                    # Check if transaction already exists (by symbol, date, and time for precision)
-                    # Handle NULL transaction_time properly
-                    if transaction.get('transaction_time'):
-                        cursor.execute('''
-                            SELECT id FROM "world_stock_transactions" 
-                            WHERE user_id = %s AND account_id = %s AND symbol = %s 
-                            AND transaction_date = %s AND transaction_time = %s
-                        ''', (
-                            user_id,
-                            account_id,
-                            transaction.get('symbol'),
-                            transaction.get('transaction_date'),
-                            transaction.get('transaction_time')
-                        ))
-                    else:
-                        # If no time, check by symbol, date, quantity, and price
-                        cursor.execute('''
-                            SELECT id FROM "world_stock_transactions" 
-                            WHERE user_id = %s AND account_id = %s AND symbol = %s 
-                            AND transaction_date = %s AND transaction_time IS NULL
-                            AND quantity = %s AND trade_price = %s
-                        ''', (
-                            user_id,
-                            account_id,
-                            transaction.get('symbol'),
-                            transaction.get('transaction_date'),
-                            transaction.get('quantity'),
-                            transaction.get('trade_price')
-                        ))
-                    
-                    if cursor.fetchone():
-                        print(f"  Skipping duplicate transaction: {transaction.get('symbol')} on {transaction.get('transaction_date')} at {transaction.get('transaction_time')}")
-                        continue  # Skip duplicates
-                    
-                    cursor.execute('''
-                        INSERT INTO "world_stock_transactions" 
-                        (user_id, account_id, symbol, transaction_date, transaction_time,
-                         transaction_type, quantity, trade_price, close_price, proceeds,
-                         commission, basis, realized_pl, mtm_pl, trade_code, currency, source_pdf)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        user_id,
-                        account_id,
-                        transaction.get('symbol'),
-                        transaction.get('transaction_date'),
-                        transaction.get('transaction_time'),
-                        transaction.get('transaction_type'),
-                        transaction.get('quantity'),
-                        transaction.get('trade_price'),
-                        transaction.get('close_price'),
-                        transaction.get('proceeds'),
-                        transaction.get('commission'),
-                        transaction.get('basis'),
-                        transaction.get('realized_pl'),
-                        transaction.get('mtm_pl'),
-                        transaction.get('trade_code'),
-                        transaction.get('currency', 'USD'),
-                        transaction.get('source_pdf')
-                    ))
-                    saved_count += 1
-                except Exception as e:
-                    print(f"Error saving transaction {transaction.get('symbol')}: {e}")
-                    continue
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return saved_count
-            
-        except Exception as e:
-            print(f"Error saving transactions to database: {e}")
-            return 0
-    
-    def save_dividends_to_database(self, dividends: List[Dict], user_id: str, account_id: int) -> int:
-        """Save dividends to database"""
-        if not dividends:
-            return 0
-        
-        try:
-            conn = self.create_database_connection()
-            cursor = conn.cursor()
-            
-            saved_count = 0
-            for dividend in dividends:
-                try:
-                    # Check if dividend already exists (by symbol, payment_date, and amount)
-                    cursor.execute('''
-                        SELECT id FROM "world_dividends" 
-                        WHERE user_id = %s AND account_id = %s AND symbol = %s 
-                        AND payment_date = %s AND amount = %s
-                    ''', (
-                        user_id,
-                        account_id,
-                        dividend.get('symbol'),
-                        dividend.get('payment_date'),
-                        dividend.get('amount')
-                    ))
-                    
-                    if cursor.fetchone():
-                        print(f"  Skipping duplicate dividend: {dividend.get('symbol')} on {dividend.get('payment_date')} amount {dividend.get('amount')}")
-                        continue  # Skip duplicates
-                    
-                    cursor.execute('''
-                        INSERT INTO "world_dividends" 
-                        (user_id, account_id, symbol, isin, payment_date, amount,
-                         amount_per_share, withholding_tax, net_amount, dividend_type, 
-                         currency, source_pdf)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        user_id,
-                        account_id,
-                        dividend.get('symbol'),
-                        dividend.get('isin'),
-                        dividend.get('payment_date'),
-                        dividend.get('amount'),
-                        dividend.get('amount_per_share'),
-                        dividend.get('withholding_tax'),
-                        dividend.get('net_amount'),
-                        dividend.get('dividend_type', 'Cash Dividend'),
-                        dividend.get('currency', 'USD'),
-                        dividend.get('source_pdf')
-                    ))
-                    saved_count += 1
-                except Exception as e:
-                    print(f"Error saving dividend {dividend.get('symbol')}: {e}")
-                    continue
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return saved_count
-            
-        except Exception as e:
-            print(f"Error saving dividends to database: {e}")
-            return 0
-
 
 # For direct execution/testing
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Run via cron jobs (Railway) or manual API calls
 import logging
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,25 +14,26 @@ from app.core.database import SessionLocal
 from app.services.stock_price_service import (
     update_active_stocks_prices,
     update_catalog_stocks_prices,
-    recalculate_holdings_values
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CATALOG_MARKETS = ('world', 'israeli')
 
-def run_active_price_update():
+
+def run_active_price_update(use_cache: bool = True):
     """
     Update prices for stocks in user holdings.
     Run every 15 minutes during market hours.
+    use_cache=False skips the in-process quote cache (user-triggered refresh).
     """
     logger.info("Starting active stocks price update...")
     db = SessionLocal()
     try:
-        updated, failed = update_active_stocks_prices(db)
-        world_holdings_updated = recalculate_holdings_values(db, market='world')
-        israeli_holdings_updated = recalculate_holdings_values(db, market='israeli')
-        logger.info(f"Active update complete: {updated} prices updated, {failed} failed, {world_holdings_updated} world holdings and {israeli_holdings_updated} Israeli holdings recalculated")
+        # Holdings are revalued in the same statement as the price upsert
+        updated, failed = update_active_stocks_prices(db, use_cache=use_cache)
+        logger.info(f"Active update complete: {updated} prices updated, {failed} failed")
         
         # Also recalculate returns (TWR, MWR, unrealized gains) for all active users
         from sqlalchemy import text
@@ -54,21 +56,33 @@ def run_active_price_update():
         db.close()
 
 
+def _run_catalog_market(market: str, limit: int):
+    """Catalog update for one market on its own session (sessions aren't thread-safe)."""
+    db = SessionLocal()
+    try:
+        return update_catalog_stocks_prices(db, limit=limit, market=market)
+    finally:
+        db.close()
+
+
 def run_catalog_price_update():
     """
     Update prices for all stocks in catalog.
     Run once daily (overnight).
     """
     logger.info("Starting catalog stocks price update...")
-    db = SessionLocal()
-    try:
-        updated, failed = update_catalog_stocks_prices(db, limit=1000)
-        logger.info(f"Catalog update complete: {updated} prices updated, {failed} failed")
-    except Exception as e:
-        logger.error(f"Catalog price update failed: {e}")
-        raise
-    finally:
-        db.close()
+    # The markets share nothing but the database and fetch from separate
+    # Yahoo endpoints, so run them side by side; each keeps its own
+    # batch pacing from StockPriceService
+    with ThreadPoolExecutor(max_workers=len(CATALOG_MARKETS)) as pool:
+        futures = {pool.submit(_run_catalog_market, market, 1000): market for market in CATALOG_MARKETS}
+        try:
+            for future in as_completed(futures):
+                updated, failed = future.result()
+                logger.info(f"Catalog update complete ({futures[future]}): {updated} prices updated, {failed} failed")
+        except Exception as e:
+            logger.error(f"Catalog price update failed: {e}")
+            raise
 
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ import asyncio
 import argparse
 import logging
 import sys
-from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService
+from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService, close_shared_session
 
 # Configure logging
 logging.basicConfig(
@@ -201,6 +201,8 @@ Examples:
     except Exception as e:
         logger.error(f"Error during crawling: {str(e)}", exc_info=True)
         sys.exit(1)
+    finally:
+        await close_shared_session()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""
+Strip the "<!-- by TradingView -->" comment from logo SVGs stored before the
+logo crawlers started minifying SVGs on ingest.
+
+Rows are cleaned in id-ordered chunks, each its own short transaction, so the
+rewrite never holds locks on (or piles WAL for) the whole table at once.
+Rows already clean are never touched; re-runnable.
+
+Usage:
+    cd backend
+    python scripts/clean_logos.py            # clean
+    python scripts/clean_logos.py --dry-run  # count only
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+logging.disable(logging.CRITICAL)
+
+from sqlalchemy import text                        # noqa: E402
+from app.core.database import SessionLocal         # noqa: E402
+
+TV_COMMENT = '<!-- by TradingView -->'
+TABLES = ('israeli_stocks', 'world_stocks')
+BATCH_SIZE = 1000
+# Kept literal (not a bind) so the planner matches it to the partial
+# idx_*_tv_comment_logo indexes and reads only the rows still to clean
+HAS_TV_COMMENT = f"logo_svg LIKE '%{TV_COMMENT}%'"
+
+
+def clean_table(db, table: str, dry_run: bool) -> int:
+    if dry_run:
+        count = db.execute(text(
+            f"SELECT COUNT(*) FROM {table} WHERE {HAS_TV_COMMENT}"
+        )).scalar()
+        print(f"  {table}: {count} logo(s) to clean")
+        return count
+
+    cleaned = 0
+    last_id = 0
+    while True:
+        ids = db.execute(text(f"""
+            UPDATE {table} SET logo_svg = REPLACE(logo_svg, :comment, '')
+            WHERE id IN (
+                SELECT id FROM {table}
+                WHERE id > :last_id AND {HAS_TV_COMMENT}
+                ORDER BY id
+                LIMIT :batch
+            )
+            RETURNING id
+        """), {"comment": TV_COMMENT, "last_id": last_id, "batch": BATCH_SIZE}).scalars().all()
+        db.commit()
+        if not ids:
+            break
+        cleaned += len(ids)
+        last_id = max(ids)
+        print(f"  {table}: {cleaned} cleaned (up to id {last_id})")
+    return cleaned
+
+
+def main(dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        total = sum(clean_table(db, table, dry_run) for table in TABLES)
+    finally:
+        db.close()
+    if dry_run:
+        print(f"{total} logo(s) would be cleaned [DRY RUN — nothing changed]")
+    else:
+        print(f"Done: {total} logo(s) cleaned")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dry-run", action="store_true")
+    main(dry_run=ap.parse_args().dry_run)
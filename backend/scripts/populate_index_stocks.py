@@ -110,7 +110,7 @@ async def crawl_logo_url(crawler, session: aiohttp.ClientSession, ticker: str) -
 async def main():
     from app.core.database import engine
     from sqlalchemy import text
-    from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService
+    from app.services.world_stock_logo_crawler_service import WorldStockLogoCrawlerService, close_shared_session
 
     print("=== Fetching S&P 500 from Wikipedia ===")
     sp500 = fetch_sp500()
@@ -191,26 +191,28 @@ async def main():
     print(f"  (throttled to 1 request/sec — safe for production)\n")
 
     async with WorldStockLogoCrawlerService() as crawler:
-        async with aiohttp.ClientSession() as session:
-            succeeded = 0
-            for i, (ticker, exchange) in enumerate(missing_url):
-                url = await crawl_logo_url(crawler, session, ticker)
-                if url:
-                    with engine.connect() as conn:
-                        conn.execute(text(
-                            "UPDATE world_stocks SET logo_url = :url WHERE ticker = :ticker"
-                        ), {"url": url, "ticker": ticker})
-                        conn.commit()
-                    succeeded += 1
-                    print(f"  [{i+1}/{len(missing_url)}] {ticker}: {url[len(_TV_BASE)+1:50]}")
-                else:
-                    print(f"  [{i+1}/{len(missing_url)}] {ticker}: NOT FOUND")
-
-                # Throttle: 1 request/sec — avoids bursting TradingView and
-                # keeps Railway egress minimal (SVGs are ~10-30KB each)
-                await asyncio.sleep(1)
-
-            print(f"\n  logo_url crawl: {succeeded}/{len(missing_url)} found")
+        # Direct S3 guesses reuse the crawler's shared (keep-alive) session
+        # rather than opening a second, throwaway connection pool
+        session = crawler.session
+        succeeded = 0
+        for i, (ticker, exchange) in enumerate(missing_url):
+            url = await crawl_logo_url(crawler, session, ticker)
+            if url:
+                with engine.connect() as conn:
+                    conn.execute(text(
+                        "UPDATE world_stocks SET logo_url = :url WHERE ticker = :ticker"
+                    ), {"url": url, "ticker": ticker})
+                    conn.commit()
+                succeeded += 1
+                print(f"  [{i+1}/{len(missing_url)}] {ticker}: {url[len(_TV_BASE)+1:50]}")
+            else:
+                print(f"  [{i+1}/{len(missing_url)}] {ticker}: NOT FOUND")
+
+            # Throttle: 1 request/sec — avoids bursting TradingView and
+            # keeps Railway egress minimal (SVGs are ~10-30KB each)
+            await asyncio.sleep(1)
+
+        print(f"\n  logo_url crawl: {succeeded}/{len(missing_url)} found")
 
     # ── Phase 2: download SVGs (batch of 3 to stay gentle) ───────────────
     print("\n=== Downloading SVGs (Phase 2) for index stocks ===")
@@ -234,6 +236,8 @@ async def main():
         print(f"  logo_url: {row[0]}/{row[2]} ({100*row[0]//row[2] if row[2] else 0}%)")
         print(f"  logo_svg: {row[1]}/{row[2]} ({100*row[1]//row[2] if row[2] else 0}%)")
 
+    await close_shared_session()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.services import logo_utils
+from app.services.logo_utils import clean_svg, minify_svg, scan_tradingview_page
+
+_LOGO = (
+    b'<!-- by TradingView -->\n'
+    b'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 56 56">\n'
+    b'  <path fill="#1A1A1A" d="M0 0h56v56H0z"/>\n'
+    b'  <path fill="#fff" d="M18 18h20v20H18z"/>\n'
+    b'</svg>\n'
+)
+
+
+def test_minify_svg_strips_comments_whitespace_and_unused_xlink():
+    assert minify_svg(_LOGO) == (
+        b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 56 56">'
+        b'<path fill="#1A1A1A" d="M0 0h56v56H0z"/><path fill="#fff" d="M18 18h20v20H18z"/></svg>'
+    )
+
+
+def test_minify_svg_keeps_referenced_xlink():
+    raw = b'<svg xmlns:xlink="http://www.w3.org/1999/xlink">\n  <use xlink:href="#a"/>\n</svg>'
+    assert minify_svg(raw) == b'<svg xmlns:xlink="http://www.w3.org/1999/xlink"><use xlink:href="#a"/></svg>'
+
+
+def test_minify_svg_keeps_whitespace_inside_text():
+    raw = (
+        b'<svg>\n'
+        b'  <text x="0">  A  <tspan>B</tspan> <tspan> C</tspan>\n  </text>\n'
+        b'  <rect/>\n'
+        b'</svg>'
+    )
+    assert minify_svg(raw) == (
+        b'<svg><text x="0">  A  <tspan>B</tspan> <tspan> C</tspan>\n  </text><rect/></svg>'
+    )
+
+
+def test_clean_svg():
+    assert clean_svg(_LOGO, require_namespace=True).startswith('<svg xmlns=')
+    assert clean_svg(b'<?xml version="1.0"?><Error><Code>NoSuchKey</Code></Error>') is None
+    # Without the namespace or the TradingView comment it's only accepted when not required
+    bare = b'<svg viewBox="0 0 1 1"><rect/></svg>'
+    assert clean_svg(bare) == '<svg viewBox="0 0 1 1"><rect/></svg>'
+    assert clean_svg(bare, require_namespace=True) is None
+
+
+class _FakeContent:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def iter_chunked(self, size):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class _FakeResponse:
+    def __init__(self, chunks):
+        self.content = _FakeContent(chunks)
+
+
+def _scan(chunks):
+    return asyncio.run(scan_tradingview_page(_FakeResponse(chunks)))
+
+
+_BIG = 'https://s3-symbol-logo.tradingview.com/apple--big.svg'
+_SMALL = 'https://s3-symbol-logo.tradingview.com/apple.svg'
+
+
+def test_scan_finds_big_logo():
+    page = f'<html><img src="{_BIG}"></html>'.encode()
+    assert _scan([page]) == (_BIG, False)
+
+
+def test_scan_finds_big_logo_split_across_chunks():
+    page = ('x' * 1000 + f'<img src="{_BIG}">' + 'y' * 1000).encode()
+    split = page.index(b'apple--big')
+    assert _scan([page[:split], page[split:]]) == (_BIG, False)
+
+
+def test_scan_finds_logo_split_inside_a_multibyte_character():
+    page = f'<span>שלום</span><img src="{_BIG}">'.encode()
+    split = page.index('ל'.encode()) + 1
+    assert _scan([page[:split], page[split:]]) == (_BIG, False)
+
+
+def test_scan_prefers_big_logo_in_a_later_chunk_over_earlier_fallback():
+    source_icon = 'https://s3-symbol-logo.tradingview.com/source/nasdaq.svg'
+    first = f'<img src="{source_icon}"><img src="{_SMALL}">'.encode()
+    second = ('z' * logo_utils._TV_MATCH_OVERLAP + f'<img src="{_BIG}">').encode()
+    assert _scan([first, second]) == (_BIG, False)
+
+
+def test_scan_falls_back_to_any_svg():
+    assert _scan([f'<img src="{_SMALL}">'.encode(), b'<p>no more logos</p>']) == (_SMALL, True)
+
+
+def test_scan_skips_source_icons():
+    page = b'<img src="https://s3-symbol-logo.tradingview.com/source/nasdaq.svg">'
+    assert _scan([page]) == (None, False)
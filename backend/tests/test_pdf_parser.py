@@ -1,88 +1,220 @@
-import os
-import re
-from datetime import datetime
-from sqlalchemy import create_engine, text
-from app.core.config import settings
-from app.services.israeli_stock_service import IsraeliStockService
-
-service = IsraeliStockService()
-reports_dir = "/Users/michaelbabushkin/Desktop/projects/investracker/backend/reports"
-
-all_pdf_paths = []
-for root, dirs, files in os.walk(reports_dir):
-    for file in files:
-        if file.endswith(".pdf"):
-            all_pdf_paths.append(os.path.join(root, file))
-
-print(f"Found {len(all_pdf_paths)} PDFs.")
-
-# We want to check what transactions are found in the CSVs for each PDF
-for pdf_path in all_pdf_paths:
-    pdf_name = os.path.basename(pdf_path)
-    holding_date = service.extract_date_from_pdf(pdf_path)
+"""
+US broker report parsing helpers (world_stock_service), plus the original
+ad-hoc scan of local Israeli reports, which now only runs as a script:
+
+    python -m tests.test_pdf_parser
+"""
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("psycopg2")
+
+from app.services.world_stock_service import (
+    WorldStockService,
+    _HOLDING_ROW_RE,
+    _HOLDINGS_HEADER_RULES,
+    _TRADES_HEADER_RULES,
+    _map_columns,
+    _parse_decimal,
+)
+
+
+def test_map_columns_holdings_header():
+    header = ['Symbol', 'Description', 'Qty', 'Avg Price', 'Close Price', 'Market Value', 'Unrealized P/L', 'Cost Basis']
+    assert _map_columns(header, _HOLDINGS_HEADER_RULES) == {
+        'symbol': 0,
+        'company': 1,
+        'quantity': 2,
+        'avg_price': 3,
+        'price': 4,
+        'value': 5,
+        'pl': 6,
+        'cost': 7,
+    }
+
+
+def test_map_columns_trades_header():
+    header = ['Symbol', 'Date/Time', 'Quantity', 'T. Price', 'C. Price', 'Proceeds', 'Comm/Fee', 'Basis', 'Realized P/L', 'MTM P/L', 'Code']
+    assert _map_columns(header, _TRADES_HEADER_RULES) == {
+        'symbol': 0,
+        'date_time': 1,
+        'quantity': 2,
+        'trade_price': 3,
+        'close_price': 4,
+        'proceeds': 5,
+        'commission': 6,
+        'basis': 7,
+        'realized_pl': 8,
+        'mtm_pl': 9,
+        'code': 10,
+    }
+
+
+def test_map_columns_skips_empty_and_unknown_headers():
+    header = [None, '', ' SYMBOL ', 'Currency', 'T.Price']
+    assert _map_columns(header, _TRADES_HEADER_RULES) == {'symbol': 2, 'trade_price': 4}
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('AAPL Apple Inc. 100 150.00 15,000.00 1,200.50',
+     ('AAPL', 'Apple Inc.', '100', '150.00', '15,000.00', '1,200.50')),
+    ('  MSFT 10 300.00 3,000.00 (45.10)  ',
+     ('MSFT', None, '10', '300.00', '3,000.00', '(45.10)')),
+])
+def test_holding_row_re(line, expected):
+    match = _HOLDING_ROW_RE.match(line)
+    assert match is not None
+    assert match.groups() == expected
+
+
+@pytest.mark.parametrize('line', ['Total 15,000.00', 'AAPL 100 150.00 15,000.00', ''])
+def test_holding_row_re_rejects_short_rows(line):
+    assert _HOLDING_ROW_RE.match(line) is None
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,234.56', Decimal('1234.56')),
+    ('$1,234.56', Decimal('1234.56')),
+    ('(1,234.56)', Decimal('-1234.56')),
+    ('-12.5', Decimal('-12.5')),
+    (' 7 ', Decimal('7')),
+])
+def test_parse_decimal(value, expected):
+    assert _parse_decimal(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', '-', '   ', 'n/a', '1.2.3'])
+def test_parse_decimal_rejects_blank_and_garbage(value):
+    assert _parse_decimal(value) is None
+
+
+def test_extract_dividends_from_tables_matches_later_withholding():
+    dividends_page = SimpleNamespace(
+        text='Dividends',
+        tables=[[
+            ['Dividends', None, None],
+            ['Date', 'Description', 'Amount'],
+            ['03/15/2024', 'LOW(US5486611073) Cash Dividend USD 1.10 per Share', '11.00'],
+            ['04/10/2024', 'KO(US1912161007) Cash Dividend USD 0.48 per Share', '4.80'],
+            ['Total', '', '15.80'],
+        ]],
+    )
+    # The withholding table comes after the dividends it applies to
+    withholding_page = SimpleNamespace(
+        text='Withholding Tax',
+        tables=[[
+            ['Withholding Tax', None, None],
+            ['03/15/2024', 'LOW(US5486611073) Cash Dividend - US Tax', '(2.75)'],
+        ]],
+    )
+    unrelated_page = SimpleNamespace(text='Open Positions', tables=[[['Symbol'], ['AAPL']]])
+
+    dividends = WorldStockService().extract_dividends_from_tables(
+        [dividends_page, unrelated_page, withholding_page], 'report.pdf'
+    )
+
+    assert [d.symbol for d in dividends] == ['LOW', 'KO']
+    low, ko = dividends
+    assert low.payment_date == date(2024, 3, 15)
+    assert low.gross_amount == Decimal('11.00')
+    assert low.withholding_tax == Decimal('2.75')
+    assert low.net_amount == Decimal('8.25')
+    assert low.source_pdf == 'report.pdf'
+    # No withholding row: the 25% US rate is assumed
+    assert ko.withholding_tax == Decimal('4.80') * Decimal('0.25')
+    assert ko.net_amount == Decimal('4.80') * Decimal('0.75')
+
+
+def main():
+    import os
+    from app.services.israeli_stock_service import IsraeliStockService
+
+    service = IsraeliStockService()
+    reports_dir = "/Users/michaelbabushkin/Desktop/projects/investracker/backend/reports"
+
+    all_pdf_paths = []
+    for root, dirs, files in os.walk(reports_dir):
+        for file in files:
+            if file.endswith(".pdf"):
+                all_pdf_paths.append(os.path.join(root, file))
+
+    print(f"Found {len(all_pdf_paths)} PDFs.")
+
+    # We want to check what transactions are found in the CSVs for each PDF
+    for pdf_path in all_pdf_paths:
+        pdf_name = os.path.basename(pdf_path)
+        holding_date = service.extract_date_from_pdf(pdf_path)
     
-    tables = service.extract_tables_from_pdf(pdf_path)
-    if not tables:
-        continue
+        tables = service.extract_tables_from_pdf(pdf_path)
+        if not tables:
+            continue
         
-    temp_dir = f"temp_test_csv"
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
+        temp_dir = f"temp_test_csv"
+        if not os.path.exists(temp_dir):
+            os.makedirs(temp_dir)
         
-    csv_files = service.save_tables_to_csv(tables, temp_dir)
+        csv_files = service.save_tables_to_csv(tables, temp_dir)
     
-    # We want to see all rows from the transactions CSV where type matches world trade types
-    import pandas as pd
-    WORLD_TRADE_TYPES = {'ל"וח/ק', 'ק/חו"ל', 'ק/חול', 'ל"וח/מ', 'מ/חו"ל', 'מ/חול'}
+        # We want to see all rows from the transactions CSV where type matches world trade types
+        import pandas as pd
+        WORLD_TRADE_TYPES = {'ל"וח/ק', 'ק/חו"ל', 'ק/חול', 'ל"וח/מ', 'מ/חו"ל', 'מ/חול'}
     
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file, encoding='utf-8')
-            csv_type = service.determine_csv_type(df, csv_file)
-            if csv_type != 'transactions':
-                # Try excellence_broker's determine_table_type too
-                csv_type = service.broker_parser.determine_table_type(df, csv_file)
+        for csv_file in csv_files:
+            try:
+                df = pd.read_csv(csv_file, encoding='utf-8')
+                csv_type = service.determine_csv_type(df, csv_file)
                 if csv_type != 'transactions':
-                    continue
+                    # Try excellence_broker's determine_table_type too
+                    csv_type = service.broker_parser.determine_table_type(df, csv_file)
+                    if csv_type != 'transactions':
+                        continue
             
-            # Let's inspect the columns
-            col_map = service.broker_parser.detect_column_indices(df)
-            idx_security_id = col_map.get('security_id', 10)
-            idx_description = col_map.get('description', 9)
-            idx_type = col_map.get('type', 8)
+                # Let's inspect the columns
+                col_map = service.broker_parser.detect_column_indices(df)
+                idx_security_id = col_map.get('security_id', 10)
+                idx_description = col_map.get('description', 9)
+                idx_type = col_map.get('type', 8)
             
-            for idx, row in df.iterrows():
-                if len(row) <= max(idx_security_id, idx_description, idx_type):
-                    continue
-                sec_id = str(row.iloc[idx_security_id]).replace('.0', '').strip()
-                name = str(row.iloc[idx_description]).strip()
-                t_type = str(row.iloc[idx_type]).strip()
+                for idx, row in df.iterrows():
+                    if len(row) <= max(idx_security_id, idx_description, idx_type):
+                        continue
+                    sec_id = str(row.iloc[idx_security_id]).replace('.0', '').strip()
+                    name = str(row.iloc[idx_description]).strip()
+                    t_type = str(row.iloc[idx_type]).strip()
                 
-                # Check if it matches world trade types
-                is_world_type = any(wt in t_type for wt in WORLD_TRADE_TYPES)
+                    # Check if it matches world trade types
+                    is_world_type = any(wt in t_type for wt in WORLD_TRADE_TYPES)
                 
-                # Also check what _is_world_stock would say
-                # Clean name like the parser does
-                hebrew_prefixes = [
-                    'ביד/פה', 'סמ/שמ', 'למע/שמ', 'חסמ/שמ', 'ל"וח/ק', 'ל"וח/מ',
-                    'הפ/דיב', 'מש/מסח', 'מש/עמל', 'ק/חו"ל', 'מ/חו"ל',
-                    'ביד/', 'חסמ/', 'ח"טמ.ע', 'סמ/', 'הפ/', 'מש/',
-                    'הינק', 'הריכמ', 'ףיצר/ק', 'ףיצר/מ',
-                ]
-                cleaned_name = name
-                for prefix in hebrew_prefixes:
-                    if cleaned_name.startswith(prefix):
-                        cleaned_name = cleaned_name[len(prefix):].strip()
-                        break
+                    # Also check what _is_world_stock would say
+                    # Clean name like the parser does
+                    hebrew_prefixes = [
+                        'ביד/פה', 'סמ/שמ', 'למע/שמ', 'חסמ/שמ', 'ל"וח/ק', 'ל"וח/מ',
+                        'הפ/דיב', 'מש/מסח', 'מש/עמל', 'ק/חו"ל', 'מ/חו"ל',
+                        'ביד/', 'חסמ/', 'ח"טמ.ע', 'סמ/', 'הפ/', 'מש/',
+                        'הינק', 'הריכמ', 'ףיצר/ק', 'ףיצר/מ',
+                    ]
+                    cleaned_name = name
+                    for prefix in hebrew_prefixes:
+                        if cleaned_name.startswith(prefix):
+                            cleaned_name = cleaned_name[len(prefix):].strip()
+                            break
                         
-                is_world_by_name = service.broker_parser._is_world_stock(cleaned_name, sec_id)
+                    is_world_by_name = service.broker_parser._is_world_stock(cleaned_name, sec_id)
                 
-                if is_world_type or is_world_by_name:
-                    print(f"PDF: {os.path.relpath(pdf_path, reports_dir)}, SecID: {sec_id}, Name: {name}, Cleaned: {cleaned_name}, Type: {t_type}, is_world_by_name: {is_world_by_name}, is_world_type: {is_world_type}")
-        except Exception as e:
-            # print(f"Error {csv_file}: {e}")
-            pass
+                    if is_world_type or is_world_by_name:
+                        print(f"PDF: {os.path.relpath(pdf_path, reports_dir)}, SecID: {sec_id}, Name: {name}, Cleaned: {cleaned_name}, Type: {t_type}, is_world_by_name: {is_world_by_name}, is_world_type: {is_world_type}")
+            except Exception as e:
+                # print(f"Error {csv_file}: {e}")
+                pass
             
-    # clean up temp_dir
-    import shutil
-    shutil.rmtree(temp_dir)
+        # clean up temp_dir
+        import shutil
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
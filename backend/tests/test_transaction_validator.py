@@ -0,0 +1,122 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services.transaction_validator import TransactionValidator, validate_transaction
+
+
+def _buy(**overrides):
+    transaction = {
+        'transaction_type': 'BUY',
+        'security_no': '1234567',
+        'name': 'TEST',
+        'quantity': '10',
+        'price': '25.5',
+        'total_value': '255',
+        'transaction_date': date.today().isoformat(),
+    }
+    transaction.update(overrides)
+    return transaction
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-03-15', date(2024, 3, 15)),     # %Y-%m-%d
+    ('15/03/2024', date(2024, 3, 15)),     # %d/%m/%Y
+    ('15/03/24', date(2024, 3, 15)),       # %d/%m/%y
+    ('15-03-2024', date(2024, 3, 15)),     # %d-%m-%Y
+    ('15-03-24', date(2024, 3, 15)),       # %d-%m-%y
+    ('2024/03/15', date(2024, 3, 15)),     # %Y/%m/%d
+    ('  2024-03-15  ', date(2024, 3, 15)),
+    (date(2024, 3, 15), date(2024, 3, 15)),
+    (datetime(2024, 3, 15, 10, 30), date(2024, 3, 15)),
+])
+def test_parse_date_accepted_shapes(value, expected):
+    assert TransactionValidator()._parse_date(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    'yesterday',
+    '2024-03',
+    '2024-03-15-01',
+    '15/03/202',       # 3-digit year: no matching shape
+    '2024-13-01',      # right shape, impossible month
+    '31/02/2024',
+    '15.03.2024',
+    None,
+    20240315,
+])
+def test_parse_date_rejects_invalid_input(value):
+    assert TransactionValidator()._parse_date(value) is None
+
+
+def test_invalid_date_is_reported():
+    is_valid, errors, _ = validate_transaction(_buy(transaction_date='31/02/2024'))
+    assert not is_valid
+    assert 'Invalid date format: 31/02/2024' in errors
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('9:05', True),
+    ('09:05:30', True),
+    (' 14:00 ', True),
+    ('14', False),
+    ('14:0', False),
+    ('14:00:00:00', False),
+    (None, False),
+])
+def test_is_valid_time(value, expected):
+    assert TransactionValidator()._is_valid_time(value) is expected
+
+
+def test_valid_buy_has_no_errors():
+    is_valid, errors, warnings = validate_transaction(_buy())
+    assert is_valid
+    assert errors == []
+    assert warnings == []
+
+
+@pytest.mark.parametrize('field, message', [
+    ('quantity', 'Invalid quantity value: abc'),
+    ('price', 'Invalid price value: abc'),
+    ('total_value', 'Invalid total value: abc'),
+])
+def test_non_numeric_value_is_an_error_not_an_exception(field, message):
+    # float() rejects the value in the numeric checks; Decimal() then raises
+    # InvalidOperation in the total-value cross check, which must be swallowed
+    is_valid, errors, _ = validate_transaction(_buy(**{field: 'abc'}))
+    assert not is_valid
+    assert message in errors
+
+
+def test_nan_quantity_does_not_raise():
+    # Decimal('nan') only fails (InvalidOperation) when compared
+    is_valid, errors, warnings = validate_transaction(_buy(quantity='nan'))
+    assert is_valid
+    assert not any('mismatch' in w for w in warnings)
+
+
+@pytest.mark.parametrize('quantity, price, message', [
+    ('0', '25.5', 'Quantity must be greater than 0'),
+    ('-1', '25.5', 'Quantity must be greater than 0'),
+    ('10', '0', 'Price must be greater than 0'),
+])
+def test_sign_checks(quantity, price, message):
+    is_valid, errors, _ = validate_transaction(_buy(quantity=quantity, price=price))
+    assert not is_valid
+    assert message in errors
+
+
+def test_magnitude_and_mismatch_warnings():
+    _, _, warnings = validate_transaction(
+        _buy(quantity='2000000', price='200000', total_value='1', commission='-1')
+    )
+    assert 'Unusually large quantity: 2000000' in warnings
+    assert 'Unusually high price: 200000' in warnings
+    assert any(w.startswith('Total value mismatch') for w in warnings)
+
+
+def test_negative_commission_is_an_error():
+    is_valid, errors, _ = validate_transaction(_buy(commission='-1'))
+    assert not is_valid
+    assert 'Commission cannot be negative' in errors